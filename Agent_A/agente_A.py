@@ -11,67 +11,62 @@ Responsabilidades:
 5. Consolidar resposta final ao veterinário (CORRIGIDO)
 """
 
-import os
 from typing import Dict, Any, Optional
 
+from log_config import get_logger
+from llm_client import get_llm, llm_disponivel
+
+logger = get_logger(__name__)
+
 # =====================================================================
 # CONFIGURAÇÃO LLM - MÚLTIPLAS OPÇÕES COM FALLBACK
 # =====================================================================
 
-llm = None
-LLM_DISPONIVEL = False
-LLM_PROVIDER = None
+# O cliente vem da fábrica compartilhada (llm_client.py), na primeira chamada
+# a _get_llm(): os SDKs (langchain_openai, langchain_groq, ...) só são
+# carregados se usados, e o pool HTTP e o cache de respostas são do processo
 
-# Tentar múltiplos provedores em ordem de preferência
-providers_to_try = []
+# (provedor, modelo, temperatura, nome exibido) em ordem de preferência
+LLM_PROVEDORES = [
+    ("openai", "gpt-3.5-turbo", 0.3, "OpenAI"),                   # melhor qualidade
+    ("groq", "openai/gpt-oss-120b", 0.3, "Groq"),                  # rápido e gratuito
+    ("huggingface", "google/flan-t5-large", 0.2, "HuggingFace"),   # gratuito, menos confiável
+]
 
-# 1. OpenAI (melhor qualidade, requer API key)
-if os.environ.get("OPENAI_API_KEY"):
-    providers_to_try.append(("openai", "OpenAI GPT-3.5"))
+_llm_cache = None
 
-# 2. Groq (rápido e gratuito, requer API key)
-if os.environ.get("GROQ_API_KEY"):
-    providers_to_try.append(("groq", "Groq gpt-oss-120b"))
 
-# 3. HuggingFace (gratuito, menos confiável)
-if os.environ.get("HUGGINGFACEHUB_API_TOKEN"):
-    providers_to_try.append(("huggingface", "HuggingFace"))
+def _criar_llm():
+    """
+    Tenta os provedores configurados em ordem de preferência
 
-# Tentar cada provedor
-for provider, name in providers_to_try:
-    try:
-        if provider == "openai":
-            from langchain_openai import ChatOpenAI
-            llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3)
-            LLM_PROVIDER = "OpenAI"
-            
-        elif provider == "groq":
-            from langchain_groq import ChatGroq
-            llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0.3)
-            LLM_PROVIDER = "Groq"
-            
-        elif provider == "huggingface":
-            from langchain_huggingface import HuggingFaceEndpoint
-            llm = HuggingFaceEndpoint(
-                repo_id="google/flan-t5-large",
-                temperature=0.2,
-                max_new_tokens=512,
-                huggingfacehub_api_token=os.environ.get("HUGGINGFACEHUB_API_TOKEN")
-            )
-            LLM_PROVIDER = "HuggingFace"
-        
-        # Testar se funciona
-        LLM_DISPONIVEL = True
-        print(f"[AGENTE A] LLM {LLM_PROVIDER} configurado")
-        break
-        
-    except Exception as e:
-        print(f"[AGENTE A] {name} não disponível: {e}")
-        continue
+    Returns:
+        (cliente LLM, nome do provedor) ou (None, None) se nenhum estiver disponível
+    """
+    for provider, modelo, temperatura, name in LLM_PROVEDORES:
+        if not llm_disponivel(provider):
+            continue
+        try:
+            llm = get_llm(provider, modelo, temperatura)
+            logger.info("[AGENTE A] LLM %s configurado", name)
+            return llm, name
+
+        except Exception as e:
+            logger.info("[AGENTE A] %s não disponível: %s", name, e)
+            continue
+
+    logger.info("[AGENTE A] Nenhum LLM disponível - usando modo texto direto")
+    logger.info("[AGENTE A] Configure: OPENAI_API_KEY, GROQ_API_KEY ou HUGGINGFACEHUB_API_TOKEN")
+    return None, None
+
+
+def _get_llm():
+    """Retorna (llm, provedor), criando o cliente uma vez por processo"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = _criar_llm()
+    return _llm_cache
 
-if not LLM_DISPONIVEL:
-    print("[AGENTE A] Nenhum LLM disponível - usando modo texto direto")
-    print("[AGENTE A] Configure: OPENAI_API_KEY, GROQ_API_KEY ou HUGGINGFACEHUB_API_TOKEN")
 
 def gerar_explicacao_clinica(
     resultado_b: Dict[str, Any],
@@ -105,8 +100,9 @@ def gerar_explicacao_clinica(
     valida_b = resultado_c.get("valida_b")
     
     # Se não tem LLM, retornar direto a mensagem do C
-    if not LLM_DISPONIVEL or llm is None:
-        print("[AGENTE A] !! LLM não disponível, usando texto direto do Agente C")
+    llm, llm_provider = _get_llm()
+    if llm is None:
+        logger.info("[AGENTE A] !! LLM não disponível, usando texto direto do Agente C")
         return mensagem_c
     
     # Construir prompt para humanizar o texto
@@ -128,22 +124,15 @@ INSTRUÇÕES:
 Avaliação reescrita em português:"""
     
     try:
-        print(f"[AGENTE A]...Humanizando texto com LLM ({LLM_PROVIDER})...")
+        logger.info("[AGENTE A]...Humanizando texto com LLM (%s)...", llm_provider)
         
-        # Diferentes métodos de invocação por provider
-        if LLM_PROVIDER in ["OpenAI", "Groq"]:
-            from langchain_core.messages import HumanMessage
-            resposta = llm.invoke([HumanMessage(content=prompt)])
-            texto = resposta.content if hasattr(resposta, 'content') else str(resposta)
-        else:
-            resposta = llm.invoke(prompt)
-            texto = resposta if isinstance(resposta, str) else str(resposta)
+        texto = llm.gerar(prompt)
         
-        print("[AGENTE A] Texto humanizado com sucesso")
+        logger.info("[AGENTE A] Texto humanizado com sucesso")
         return texto.strip()
         
     except Exception as e:
-        print(f"[AGENTE A] !! Erro ao humanizar com LLM: {str(e)[:100]}")
+        logger.error("[AGENTE A] !! Erro ao humanizar com LLM: %s", str(e)[:100])
         # Fallback: retornar texto do C sem modificação
         return mensagem_c
 
@@ -287,8 +276,8 @@ def consolidar_resultados(
     # LLM pode introduzir erros ou "alucinar" informações médicas
     mensagem = resultado_c.get("resposta_clinica", "")
     
-    print("[AGENTE A] Usando resposta validada do Agente C (sem LLM)")
-    print("[AGENTE A] Resposta científica preservada para garantir precisão")
+    logger.info("[AGENTE A] Usando resposta validada do Agente C (sem LLM)")
+    logger.info("[AGENTE A] Resposta científica preservada para garantir precisão")
     
     # Plano terapêutico
     plano = resultado_c.get("tratamento_recomendado", [])
@@ -2,7 +2,14 @@
 import os
 import sys
 import json
+import math
 import uuid
+import queue
+import shlex
+import atexit
+import itertools
+import threading
+import subprocess
 
 # Forçar UTF-8 em todo o Python (se possível)
 if hasattr(sys.stdout, 'reconfigure') and sys.stdout.encoding != 'utf-8':
@@ -13,38 +20,186 @@ if hasattr(sys.stdout, 'reconfigure') and sys.stdout.encoding != 'utf-8':
 
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
-from owlready2 import (
-    World, Thing,
-    DataProperty, ObjectProperty,
-    sync_reasoner_hermit
+
+from log_config import get_logger, log_banner
+from iris_thresholds import (
+    estagio_creatinina, estagio_sdma, subestagio_ap, subestagio_ht,
+    estagiar_lote, SUBESTAGIOS_AP, SUBESTAGIOS_HT
 )
 
+# owlready2 é importado sob demanda: respostas vindas do cache de
+# inferências não precisam carregá-lo
+from Agent_B.inference_cache import InferenceCache, ontology_hash, chave_inferencia
+
 
 # CONFIGURAÇÃO
 
+logger = get_logger(__name__)
+
 ONTO_PATH = Path(r"ontologia.owl")  # Raiz do projeto, sem espaços no caminho
 
+# Namespace das sub-ontologias temporárias de cada requisição
+SCRATCH_IRI_BASE = "http://mas-iris.local/pacientes"
+
+# Política do reasoner HermiT:
+# - "always": executa sempre
+# - "never": nunca executa (apenas classificação numérica)
+# - "only-when-needed": executa só quando a ontologia pode acrescentar algo
+#   que o classificador numérico não decide
+REASONER_POLICIES = ("always", "never", "only-when-needed")
+REASONER_POLICY = os.environ.get("AGENTE_B_REASONER_POLICY", "only-when-needed")
+
+# GatoIdoso ≡ idade some xsd:integer[>= 7]: decidido pelo mesmo corte,
+# sem reasoner (como estágio e subestágios AP/HT)
+IDADE_GATO_IDOSO = 7
+
+# Classes definidas da ontologia que o classificador numérico não decide,
+# com os campos clínicos que as alimentam no indivíduo do paciente. O
+# reasoner só acrescenta algo quando um desses campos está presente.
+# Hoje vazio: as demais definições (GatoComFatorRisco, GatoComSintomasIRC,
+# GatoParaInvestigacao) dependem de propriedades de objeto (hasComorbidade,
+# hasRaca, hasSintoma) que o paciente não recebe, e o restante da ontologia
+# sobre os dados numéricos é coberto pelas tabelas IRIS e por GatoIdoso.
+CLASSES_SO_ONTOLOGIA: Dict[str, Tuple[str, ...]] = {}
+CAMPOS_SO_ONTOLOGIA = tuple(sorted({
+    campo for campos in CLASSES_SO_ONTOLOGIA.values() for campo in campos
+}))
+
+# Campos gravados como inteiros: as restrições da ontologia sobre eles são
+# xsd:integer e um literal float nunca as satisfaz
+CAMPOS_INTEIROS = ("idade",)
+
+# Campo clínico -> propriedades de dados candidatas (usa a primeira que a
+# ontologia declara)
+MAPEAMENTO_PROPRIEDADES = {
+    "creatinine": ["nivelCreatinina", "creatinina"],
+    "creatinina": ["nivelCreatinina", "creatinina"],
+    "sdma": ["nivelSDMA", "sdma"],
+    "idade": ["idade", "temIdade"],
+    "peso": ["peso", "temPeso"],
+    "pressao": ["pressaoArterial", "pressao"],
+    "upc": ["razaoProteina", "proteinuria", "upc"],
+    "proteinuria": ["razaoProteina", "proteinuria"],
+}
+
+# Onde o reasoner é executado:
+# - "local": owlready2 neste processo (serializa o World e inicia uma JVM
+#   por chamada)
+# - "server": processo HermiT persistente com a ontologia já carregada
+#   (Agent_B/reasoner, ou qualquer comando em AGENTE_B_REASONER_CMD que
+#   fale o mesmo protocolo, como Agent_B/reasoner_substituto.py)
+REASONER_BACKEND = os.environ.get("AGENTE_B_REASONER_BACKEND", "local")
+REASONER_CMD = os.environ.get("AGENTE_B_REASONER_CMD", "")
+REASONER_TIMEOUT = float(os.environ.get("AGENTE_B_REASONER_TIMEOUT", "60"))
+REASONER_JAR = Path(__file__).resolve().parent / "reasoner" / "target" / "servidor-hermit.jar"
+
+# Cache LRU de inferências (0 desativa)
+INFERENCE_CACHE_SIZE = int(os.environ.get("AGENTE_B_INFERENCE_CACHE_SIZE", "1024"))
+INFERENCE_CACHE = InferenceCache(INFERENCE_CACHE_SIZE)
+
 
 def _load_ontology():
     """Carrega a ontologia com suporte para caminhos com espaços"""
+    from owlready2 import World
+    
     world = World()
     
     if not ONTO_PATH.exists():
         raise FileNotFoundError(f"Arquivo OWL não encontrado em: {ONTO_PATH}")
     
-    print(f"[AGENTE B] Carregando ontologia de: {ONTO_PATH}")
+    logger.info("[AGENTE B] Carregando ontologia de: %s", ONTO_PATH)
     
     try:
         # Usar caminho relativo ao invés de URL para evitar problemas com espaços
         onto = world.get_ontology(str(ONTO_PATH)).load()
-        print(f"[AGENTE B] Ontologia carregada")
-        print(f"[AGENTE B] - Classes: {len(list(onto.classes()))}")
+        logger.info("[AGENTE B] Ontologia carregada")
         return world, onto
     except Exception as e:
-        print(f"[AGENTE B] Aviso: Falha ao carregar ontologia: {e}")
-        print(f"[AGENTE B] Continuando com validação numérica apenas...")
+        logger.warning("[AGENTE B] Aviso: Falha ao carregar ontologia: %s", e)
+        logger.info("[AGENTE B] Continuando com validação numérica apenas...")
         raise Exception(f"Erro ao carregar ontologia: {e}")
 
+
+class PoolOntologias:
+    """
+    Pool limitado de ontologias base (World do owlready2 já carregado)
+    
+    O quadstore e o reasoner não são seguros entre threads: cada requisição
+    retira um World do pool, usa-o sozinha e o devolve. Os Worlds não
+    pertencem a nenhuma thread, então o grafo assíncrono (asyncio.to_thread
+    em um executor novo a cada asyncio.run) reutiliza as mesmas ontologias
+    já carregadas. Um World novo só é carregado quando todos estão em uso e
+    o pool ainda não atingiu o tamanho máximo; acima disso a requisição
+    espera um World livre.
+    """
+    
+    def __init__(self, tamanho_maximo: int):
+        self.tamanho_maximo = max(1, tamanho_maximo)
+        self._livres = queue.LifoQueue()
+        self._criados = 0
+        self._lock = threading.Lock()
+    
+    def retirar(self):
+        """Retira (world, onto) do pool; devolver com devolver()"""
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            criar = self._criados < self.tamanho_maximo
+            if criar:
+                self._criados += 1
+        if not criar:
+            return self._livres.get()
+        try:
+            return _load_ontology()
+        except Exception:
+            with self._lock:
+                self._criados -= 1
+            raise
+    
+    def devolver(self, base):
+        """Devolve ao pool o (world, onto) retirado"""
+        self._livres.put(base)
+    
+    @property
+    def carregadas(self) -> int:
+        return self._criados
+
+
+# Worlds carregados por processo (no máximo um por requisição simultânea;
+# o worker usa --threads N como padrão)
+ONTOLOGY_POOL_SIZE = int(os.environ.get("AGENTE_B_ONTOLOGY_POOL_SIZE", "4"))
+_pool_ontologias = PoolOntologias(ONTOLOGY_POOL_SIZE)
+
+
+def aquecer_ontologia():
+    """
+    Carrega a primeira ontologia do pool antes da primeira requisição e,
+    com AGENTE_B_REASONER_BACKEND=server, inicia o processo reasoner
+    """
+    _pool_ontologias.devolver(_pool_ontologias.retirar())
+    if REASONER_BACKEND == "server":
+        _get_reasoner_client()._conexao_ativa()
+
+
+def _create_scratch_ontology(world, patient_id: str):
+    """
+    Cria a sub-ontologia temporária de uma requisição
+    
+    O indivíduo do paciente e as inferências do reasoner ficam nela, e não
+    na ontologia base; ao final da requisição ela é destruída.
+    """
+    return world.get_ontology(f"{SCRATCH_IRI_BASE}/{patient_id}#")
+
+
+def _destroy_scratch_ontology(scratch):
+    """Remove a sub-ontologia da requisição e desfaz seus efeitos no world"""
+    try:
+        scratch.destroy(update_relation=True, update_is_a=True)
+    except Exception as e:
+        logger.warning("[AGENTE B] Aviso: Falha ao descartar ontologia temporária: %s", e)
+
 # CLASSIFICAÇÃO IRIS COM VALIDAÇÃO DE DISCREPÂNCIA
 
 def classificar_estagio_iris_com_validacao(
@@ -83,113 +238,89 @@ def classificar_estagio_iris_com_validacao(
     if creat is None and sdma is None:
         return None, False, "Creatinina e SDMA ausentes"
     
-    # Determinar estágio pela creatinina
-    stage_creat = None
-    if creat is not None:
-        if creat < 1.6:
-            stage_creat = 1
-        elif 1.6 <= creat <= 2.8:
-            stage_creat = 2
-        elif 2.9 <= creat <= 5.0:
-            stage_creat = 3
-        else:  # creat > 5.0
-            stage_creat = 4
-    
-    # Determinar estágio pelo SDMA
-    stage_sdma = None
-    if sdma is not None:
-        if sdma < 18.0:
-            stage_sdma = 1
-        elif 18.0 <= sdma <= 25.0:
-            stage_sdma = 2
-        elif 26.0 <= sdma <= 38.0:
-            stage_sdma = 3
-        else:  # sdma > 38.0
-            stage_sdma = 4
+    # Estágio indicado por cada biomarcador (tabela IRIS compartilhada)
+    stage_creat = estagio_creatinina(creat)
+    stage_sdma = estagio_sdma(sdma)
+    
+    # NaN/±inf não recebem estágio
+    if stage_creat is None and stage_sdma is None:
+        return None, False, f"Creatinina e SDMA inválidos: creatinina={creat}, SDMA={sdma}"
     
     #VALIDAÇÃO DE DISCREPÂNCIA
     
     # Caso 1: Só tem um biomarcador
     if stage_creat is None and stage_sdma is not None:
-        print(f"[AGENTE B] Apenas SDMA disponível -> IRIS {stage_sdma}")
-        print(f"[AGENTE B]    Recomendado: confirmar com creatinina")
+        logger.info("[AGENTE B] Apenas SDMA disponível -> IRIS %s", stage_sdma)
+        logger.info("[AGENTE B]    Recomendado: confirmar com creatinina")
         return f"EstagioIRIS{stage_sdma}", True, None
     
     if stage_sdma is None and stage_creat is not None:
-        print(f"[AGENTE B] Apenas Creatinina disponível -> IRIS {stage_creat}")
-        print(f"[AGENTE B]    Recomendado: confirmar com SDMA")
+        logger.info("[AGENTE B] Apenas Creatinina disponível -> IRIS %s", stage_creat)
+        logger.info("[AGENTE B]    Recomendado: confirmar com SDMA")
         return f"EstagioIRIS{stage_creat}", True, None
     
     # Caso 2: Tem ambos - VALIDAR DISCREPÂNCIA
     discrepancia = abs(stage_creat - stage_sdma)
     
-    print(f"[AGENTE B] Valores:")
-    print(f"[AGENTE B]   Creatinina {creat} mg/dL -> IRIS {stage_creat}")
-    print(f"[AGENTE B]   SDMA {sdma} ug/dL -> IRIS {stage_sdma}")
-    print(f"[AGENTE B]   Discrepância: {discrepancia} estágios")
+    logger.info("[AGENTE B] Valores:")
+    logger.info("[AGENTE B]   Creatinina %s mg/dL -> IRIS %s", creat, stage_creat)
+    logger.info("[AGENTE B]   SDMA %s ug/dL -> IRIS %s", sdma, stage_sdma)
+    logger.info("[AGENTE B]   Discrepância: %s estágios", discrepancia)
     
     # REGRA DE VALIDAÇÃO
     
     if discrepancia == 0:
         # Concordância perfeita
-        print(f"[AGENTE B] Concordância perfeita")
+        logger.info("[AGENTE B] Concordância perfeita")
         return f"EstagioIRIS{stage_creat}", True, None
     
     elif discrepancia == 1:
         # Discrepância de 1 estágio - ACEITAR (usar o maior)
         estagio_final = max(stage_creat, stage_sdma)
-        print(f"[AGENTE B] Discrepância de 1 estágio aceita (regra IRIS)")
-        print(f"[AGENTE B]    Usando IRIS {estagio_final} (maior valor)")
+        logger.info("[AGENTE B] Discrepância de 1 estágio aceita (regra IRIS)")
+        logger.info("[AGENTE B]    Usando IRIS %s (maior valor)", estagio_final)
         return f"EstagioIRIS{estagio_final}", True, None
     
     else:
         # Discrepância >=2 estágios - NÃO CLASSIFICAR!
         motivo = f"Discrepância de {discrepancia} estágios: Creatinina indica IRIS {stage_creat}, SDMA indica IRIS {stage_sdma}"
-        print(f"[AGENTE B] ERRO: Discrepância muito grande ({discrepancia} estágios)")
-        print(f"[AGENTE B]  Creat={creat} -> IRIS {stage_creat}")
-        print(f"[AGENTE B]  SDMA={sdma} -> IRIS {stage_sdma}")
-        print(f"[AGENTE B]  -> NÃO É POSSÍVEL CLASSIFICAR COM SEGURANÇA")
-        print(f"[AGENTE B]  Possíveis causas:")
-        print(f"[AGENTE B]  - Erro laboratorial")
-        print(f"[AGENTE B]  - Interferência pré-analítica")
-        print(f"[AGENTE B]  - Condição clínica atípica")
-        print(f"[AGENTE B]  - Desidratação (eleva creatinina)")
-        print(f"[AGENTE B]  - Massa muscular reduzida (reduz creatinina)")
+        logger.warning("[AGENTE B] ERRO: Discrepância muito grande (%s estágios)", discrepancia)
+        logger.info("[AGENTE B]  Creat=%s -> IRIS %s", creat, stage_creat)
+        logger.info("[AGENTE B]  SDMA=%s -> IRIS %s", sdma, stage_sdma)
+        logger.info("[AGENTE B]  -> NÃO É POSSÍVEL CLASSIFICAR COM SEGURANÇA")
+        logger.info("[AGENTE B]  Possíveis causas:")
+        logger.info("[AGENTE B]  - Erro laboratorial")
+        logger.info("[AGENTE B]  - Interferência pré-analítica")
+        logger.info("[AGENTE B]  - Condição clínica atípica")
+        logger.info("[AGENTE B]  - Desidratação (eleva creatinina)")
+        logger.info("[AGENTE B]  - Massa muscular reduzida (reduz creatinina)")
         return None, False, motivo
 
 
 
 # CRIAR PACIENTE NA ONTOLOGIA
 
-def _create_patient_instance(world, onto, patient_id: str, clinical: Dict[str, Any]):
-    """Cria instância de paciente na ontologia"""
+def _create_patient_instance(world, onto, patient_id: str, clinical: Dict[str, Any], namespace=None):
+    """Cria instância de paciente na ontologia (ou na sub-ontologia namespace)"""
+    from owlready2 import Thing
+    
     Gato = onto.search_one(iri="*Gato")
     if not Gato:
         Gato = Thing
     
     inst_name = f"GatoPaciente_{patient_id}"
-    patient = Gato(inst_name, namespace=onto)
-    
-    prop_mappings = {
-        "creatinine": ["nivelCreatinina", "creatinina"],
-        "creatinina": ["nivelCreatinina", "creatinina"],
-        "sdma": ["nivelSDMA", "sdma"],
-        "idade": ["idade", "temIdade"],
-        "peso": ["peso", "temPeso"],
-        "pressao": ["pressaoArterial", "pressao"],
-        "upc": ["razaoProteina", "proteinuria", "upc"],
-        "proteinuria": ["razaoProteina", "proteinuria"],
-    }
+    patient = Gato(inst_name, namespace=namespace or onto)
     
     for key, value in clinical.items():
-        if key in prop_mappings and value is not None:
-            for prop_name in prop_mappings[key]:
+        if key in MAPEAMENTO_PROPRIEDADES and value is not None:
+            for prop_name in MAPEAMENTO_PROPRIEDADES[key]:
                 prop = onto.search_one(iri=f"*{prop_name}")
                 if prop:
                     try:
-                        val = float(value)
+                        # Idade em anos completos
+                        val = int(float(value)) if key in CAMPOS_INTEIROS else float(value)
                         prop[patient].append(val)
-                        print(f"[AGENTE B]     {prop.name} = {val}")
+                        logger.debug("[AGENTE B]     %s = %s", prop.name, val)
                         break
                     except:
                         continue
@@ -200,6 +331,8 @@ def _create_patient_instance(world, onto, patient_id: str, clinical: Dict[str, A
 
 def _extract_claims_from_instance(instance):
     """Extrai informações inferidas"""
+    from owlready2 import DataProperty
+    
     is_a = []
     for cls in instance.is_a:
         try:
@@ -215,7 +348,8 @@ def _extract_claims_from_instance(instance):
             prop_name = prop.name
             prop_value = getattr(instance, prop_name, None)
             if prop_value:
-                data_properties[prop_name] = prop_value
+                # Copiar para lista simples: o indivíduo é destruído ao final da requisição
+                data_properties[prop_name] = list(prop_value) if isinstance(prop_value, list) else prop_value
     
     return {
         "is_a": is_a,
@@ -252,15 +386,7 @@ def _classificar_subestagio_proteinuria(upc: Optional[float]) -> Optional[str]:
     Returns:
         Subetágio AP (AP0, AP1, AP2) ou None
     """
-    if upc is None:
-        return None
-    
-    if upc < 0.2:
-        return "AP0"  # Não proteinúrico
-    elif 0.2 <= upc <= 0.4:
-        return "AP1"  # Borderline
-    else:  # upc > 0.4
-        return "AP2"  # Proteinúrico
+    return subestagio_ap(upc)
 
 
 def _classificar_subestagio_hipertensao(pressao: Optional[float]) -> Optional[str]:
@@ -279,17 +405,7 @@ def _classificar_subestagio_hipertensao(pressao: Optional[float]) -> Optional[st
     Returns:
         Subetágio HT (HT0, HT1, HT2, HT3) ou None
     """
-    if pressao is None:
-        return None
-    
-    if pressao < 140:
-        return "HT0"  # Risco mínimo
-    elif 140 <= pressao < 160:
-        return "HT1"  # Risco baixo
-    elif 160 <= pressao < 180:
-        return "HT2"  # Risco moderado
-    else:  # pressao >= 180
-        return "HT3"  # Risco grave
+    return subestagio_ht(pressao)
 
 
 def _extract_substage(is_a_list: List[str]) -> Optional[str]:
@@ -316,28 +432,473 @@ def _extract_substage(is_a_list: List[str]) -> Optional[str]:
     return ", ".join(parts) if parts else None
 
 
+def _gato_idoso(idade: Any) -> bool:
+    """GatoIdoso da ontologia: idade em anos completos (xsd:integer) >= 7"""
+    try:
+        return int(float(idade)) >= IDADE_GATO_IDOSO
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+
+def _extract_defined_classes(
+    is_a_list: List[str],
+    estagio_name: Optional[str],
+    clinical_data: Dict[str, Any]
+) -> List[str]:
+    """
+    Classes definidas da ontologia que descrevem o paciente
+    
+    GatoIdoso sai da idade e GatoEstagioAvancado (união de EstagioIRIS3 e
+    EstagioIRIS4) do estágio calculado, com ou sem reasoner; as classes de
+    CLASSES_SO_ONTOLOGIA só vêm do reasoner.
+    """
+    nomes = {str(cls).rsplit(".", 1)[-1] for cls in is_a_list}
+    classes = []
+    if _gato_idoso(clinical_data.get("idade")) or "GatoIdoso" in nomes:
+        classes.append("GatoIdoso")
+    classes += [nome for nome in CLASSES_SO_ONTOLOGIA if nome in nomes]
+    if estagio_name in ("EstagioIRIS3", "EstagioIRIS4") or "GatoEstagioAvancado" in nomes:
+        classes.append("GatoEstagioAvancado")
+    return classes
+
+
+
+# INFERÊNCIA NA ONTOLOGIA (por requisição)
+
+class InstanciaPacienteError(Exception):
+    """Falha ao criar o indivíduo do paciente na ontologia"""
+
+
+def _inferir_na_ontologia(
+    world,
+    onto,
+    patient_id: str,
+    clinical_data: Dict[str, Any],
+    estagio_name: Optional[str],
+    executar_reasoner: bool
+) -> Dict[str, Any]:
+    """
+    Cria o paciente em uma sub-ontologia temporária, executa o reasoner se
+    pedido, extrai as informações e descarta a sub-ontologia
+    
+    Returns:
+        {"is_a": [...], "properties": {...}, "reasoner_ok": bool}
+    """
+    scratch = _create_scratch_ontology(world, patient_id)
+    
+    try:
+        try:
+            patient = _create_patient_instance(world, onto, patient_id, clinical_data, namespace=scratch)
+        except Exception as e:
+            raise InstanciaPacienteError(str(e)) from e
+        
+        # CLASSIFICAÇÃO VÁLIDA - PROSSEGUIR 
+        if estagio_name:
+            logger.info("[AGENTE B] ✓ Estágio calculado: %s", estagio_name)
+            
+            estagio_class = onto.search_one(iri=f"*{estagio_name}")
+            if estagio_class:
+                patient.is_a.append(estagio_class)
+                logger.info("[AGENTE B]   ✓ Paciente classificado como %s", estagio_name)
+        
+        #  EXECUTAR REASONER (inferências gravadas na sub-ontologia)
+        reasoner_ok = False
+        
+        if executar_reasoner:
+            logger.info("[AGENTE B] Executando reasoner HermiT...")
+            try:
+                from owlready2 import sync_reasoner_hermit
+                
+                with scratch:
+                    sync_reasoner_hermit(world, infer_property_values=True)
+                reasoner_ok = True
+                logger.info("[AGENTE B] ✓ Reasoner executado")
+            except Exception as e:
+                logger.error("[AGENTE B] Erro no reasoner: %s", e)
+        
+        # EXTRAIR INFERÊNCIAS 
+        extracted = _extract_claims_from_instance(patient)
+    finally:
+        _destroy_scratch_ontology(scratch)
+    
+    extracted["reasoner_ok"] = reasoner_ok
+    return extracted
+
+
+# CLIENTE DO PROCESSO REASONER PERSISTENTE
+
+class _ConexaoReasoner:
+    """
+    Um processo reasoner em execução e as requisições à espera de resposta
+    
+    Uma thread leitora entrega cada linha do stdout à requisição de mesmo
+    id; várias threads do worker podem ter requisições em andamento ao
+    mesmo tempo (só a escrita de cada linha no stdin é serializada).
+    """
+    
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+        self.pid = None
+        self.aberta = True
+        self._pendentes: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+        self._escrita_lock = threading.Lock()
+        self._pronto = queue.Queue()
+        threading.Thread(target=self._ler_respostas, daemon=True).start()
+    
+    @property
+    def viva(self) -> bool:
+        """Processo em execução (a thread leitora pode ainda não ter visto o fim)"""
+        return self.aberta and self.process.poll() is None
+    
+    def aguardar_pronto(self, timeout: float):
+        """Espera o evento "ready" (ontologia carregada no processo)"""
+        try:
+            evento = self._pronto.get(timeout=timeout)
+        except queue.Empty:
+            evento = None
+        if not evento or evento.get("event") != "ready":
+            self.encerrar()
+            raise RuntimeError(f"Processo reasoner não ficou pronto: {evento}")
+        self.pid = evento.get("pid")
+    
+    def _ler_respostas(self):
+        try:
+            for line in self.process.stdout:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning("[AGENTE B] Aviso: Linha inválida do reasoner: %s", line.strip()[:200])
+                    continue
+                if message.get("event") == "ready":
+                    self._pronto.put(message)
+                    continue
+                with self._lock:
+                    espera = self._pendentes.pop(str(message.get("id")), None)
+                if espera is not None:
+                    espera.put(message)
+        finally:
+            # Processo terminou: as requisições pendentes falham
+            self._pronto.put(None)
+            with self._lock:
+                self.aberta = False
+                pendentes, self._pendentes = self._pendentes, {}
+            for espera in pendentes.values():
+                espera.put(None)
+    
+    def enviar(self, request_id: str, linha: str) -> queue.Queue:
+        """Registra a requisição e escreve a linha; a resposta chega na fila retornada"""
+        espera = queue.Queue(maxsize=1)
+        with self._lock:
+            if not self.aberta:
+                raise RuntimeError("Processo reasoner finalizado")
+            self._pendentes[request_id] = espera
+        try:
+            with self._escrita_lock:
+                self.process.stdin.write(linha)
+                self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self.cancelar(request_id)
+            raise RuntimeError(f"Falha ao escrever no reasoner: {e}") from e
+        return espera
+    
+    def cancelar(self, request_id: str):
+        with self._lock:
+            self._pendentes.pop(request_id, None)
+    
+    def encerrar(self):
+        try:
+            self.process.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.process.terminate()
+        except Exception:
+            pass
+
+
+class ReasonerClient:
+    """
+    Cliente do processo reasoner persistente
+    
+    O processo é iniciado na primeira chamada e mantido vivo, com a ontologia
+    base já carregada. Cada chamada envia só o delta do paciente (uma linha
+    JSON) e recebe as classes inferidas (uma linha JSON com o mesmo id). Se
+    o processo terminar, a chamada seguinte inicia outro.
+    """
+    
+    def __init__(self, command: List[str], timeout: float = REASONER_TIMEOUT):
+        self.command = command
+        self.timeout = timeout
+        self.partidas = 0
+        self._conexao: Optional[_ConexaoReasoner] = None
+        self._inicio_lock = threading.Lock()
+        self._ids = itertools.count(1)
+    
+    def _conexao_ativa(self) -> _ConexaoReasoner:
+        conexao = self._conexao
+        if conexao is not None and conexao.viva:
+            return conexao
+        with self._inicio_lock:
+            if self._conexao is None or not self._conexao.viva:
+                logger.info("[AGENTE B] Iniciando processo reasoner: %s", " ".join(self.command))
+                process = subprocess.Popen(
+                    self.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    encoding="utf-8",
+                    bufsize=1
+                )
+                conexao = _ConexaoReasoner(process)
+                conexao.aguardar_pronto(self.timeout)
+                self._conexao = conexao
+                self.partidas += 1
+                logger.info("[AGENTE B] ✓ Processo reasoner pronto (pid %s)", conexao.pid)
+            return self._conexao
+    
+    @property
+    def pid(self) -> Optional[int]:
+        """pid do processo reasoner em execução (None antes da primeira chamada)"""
+        conexao = self._conexao
+        return conexao.pid if conexao is not None and conexao.viva else None
+    
+    def inferir(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """Envia o delta do paciente e retorna {"is_a", "properties", "reasoner_ok"}"""
+        conexao = self._conexao_ativa()
+        request_id = str(next(self._ids))
+        espera = conexao.enviar(request_id, json.dumps({"id": request_id, **delta}, ensure_ascii=False) + "\n")
+        
+        try:
+            message = espera.get(timeout=self.timeout)
+        except queue.Empty:
+            # Processo travado: descartado, a próxima chamada inicia outro
+            conexao.cancelar(request_id)
+            conexao.encerrar()
+            raise TimeoutError(f"Reasoner não respondeu em {self.timeout}s")
+        
+        if message is None:
+            raise RuntimeError("Processo reasoner finalizado")
+        if not message.get("ok"):
+            raise RuntimeError(message.get("erro", "Erro desconhecido no reasoner"))
+        return message
+    
+    def close(self):
+        if self._conexao is not None:
+            self._conexao.encerrar()
+            self._conexao = None
+
+
+_reasoner_client = None
+_reasoner_client_lock = threading.Lock()
+
+
+def _get_reasoner_client() -> ReasonerClient:
+    """Retorna o cliente do processo reasoner (criado uma vez por processo)"""
+    global _reasoner_client
+    with _reasoner_client_lock:
+        if _reasoner_client is None:
+            command = shlex.split(REASONER_CMD) if REASONER_CMD else [
+                "java", "-jar", str(REASONER_JAR), str(ONTO_PATH.resolve())
+            ]
+            _reasoner_client = ReasonerClient(command)
+            atexit.register(_reasoner_client.close)
+        return _reasoner_client
+
+
+def _delta_paciente(clinical_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Valores clínicos do paciente no formato do protocolo do reasoner"""
+    dados = []
+    for key, value in clinical_data.items():
+        if key not in MAPEAMENTO_PROPRIEDADES or value is None or isinstance(value, bool):
+            continue
+        try:
+            valor = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not math.isfinite(valor):
+            continue
+        inteiro = key in CAMPOS_INTEIROS
+        dados.append({
+            "propriedades": MAPEAMENTO_PROPRIEDADES[key],
+            "valor": int(valor) if inteiro else valor,
+            "inteiro": inteiro
+        })
+    return dados
+
+
+def _inferir_no_servidor(
+    patient_id: str,
+    clinical_data: Dict[str, Any],
+    estagio_name: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """
+    Executa a inferência no processo reasoner persistente
+    
+    Returns:
+        Informações extraídas ou None se o servidor falhou (usar inferência local)
+    """
+    try:
+        resposta = _get_reasoner_client().inferir({
+            "paciente": patient_id,
+            "estagio": estagio_name,
+            "dados": _delta_paciente(clinical_data)
+        })
+    except Exception as e:
+        logger.warning("[AGENTE B] Aviso: Reasoner persistente indisponível (%s), usando reasoner local", e)
+        return None
+    
+    if resposta.get("reasoner_ok"):
+        logger.info("[AGENTE B] ✓ Reasoner executado (servidor persistente)")
+    else:
+        logger.error("[AGENTE B] Erro no reasoner: %s", resposta.get("erro"))
+    return {
+        "is_a": resposta.get("is_a", []),
+        "properties": resposta.get("properties", {"annotations": [], "data_properties": {}}),
+        "reasoner_ok": bool(resposta.get("reasoner_ok"))
+    }
+
+
+# POLÍTICA DO REASONER
+
+def _resolver_politica_reasoner(politica: Optional[str]) -> str:
+    """Valida a política pedida (ou a configurada) e retorna uma política conhecida"""
+    politica = (politica or REASONER_POLICY or "").strip().lower()
+    if politica not in REASONER_POLICIES:
+        logger.warning("[AGENTE B] Aviso: política de reasoner desconhecida '%s', usando 'only-when-needed'", politica)
+        politica = "only-when-needed"
+    return politica
+
+
+def _reasoner_necessario(clinical_data: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Decide se o reasoner pode acrescentar algo à classificação numérica
+    
+    Estágio, subestágios AP/HT e GatoIdoso são decididos numericamente (só
+    classificações válidas chegam aqui); a ontologia só contribui com as
+    classes de CLASSES_SO_ONTOLOGIA, quando há dados que as alimentam.
+    
+    Returns:
+        (necessario, motivo)
+    """
+    campos = [campo for campo in CAMPOS_SO_ONTOLOGIA if clinical_data.get(campo) is not None]
+    if campos:
+        return True, f"classes definidas na ontologia dependem de: {', '.join(campos)}"
+    
+    return False, "estágio, subestágios e classes definidas decididos pelo classificador numérico"
+
 
 # FUNÇÃO PRINCIPAL
 
-def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
+def handle_inference(
+    clinical_data: Dict[str, Any],
+    reasoner_policy: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Função principal com validação de discrepância
     
+    Painéis já inferidos (mesmos dados clínicos, mesma ontologia e mesma
+    política) são respondidos pelo cache sem carregar a ontologia.
+    
+    Args:
+        clinical_data: Dados clínicos normalizados pelo Agente A
+        reasoner_policy: "always", "never" ou "only-when-needed"
+            (padrão: REASONER_POLICY / AGENTE_B_REASONER_POLICY)
+    
     SAÍDA AMPLIADA:
     {
         "estagio": str ou None,
         "subestagio": str ou None,
         "reasoner_ok": bool,
+        "reasoner_politica": str,
+        "reasoner_executado": bool,
+        "reasoner_motivo": str,
+        "classes_definidas": [str],  # ex.: GatoIdoso, GatoEstagioAvancado
         "classificacao_valida": bool,  # ← NOVO!
         "motivo_invalido": str ou None,  # ← NOVO!
         "properties": {...},
-        "question": str
+        "question": str,
+        "cache_hit": bool
     }
     """
-    print("\n" + "="*70)
-    print("[AGENTE B] Iniciando inferência ontológica...")
-    print("="*70)
+    log_banner(logger, "[AGENTE B] Iniciando inferência ontológica...")
+    
+    politica = _resolver_politica_reasoner(reasoner_policy)
+    
+    chave = None
+    if clinical_data and INFERENCE_CACHE.enabled:
+        try:
+            chave = chave_inferencia(clinical_data, ontology_hash(ONTO_PATH), politica)
+        except OSError as e:
+            logger.warning("[AGENTE B] Aviso: Cache de inferências indisponível: %s", e)
+        
+        if chave is not None:
+            cached = INFERENCE_CACHE.get(chave)
+            if cached is not None:
+                logger.info("[AGENTE B] ✓ Inferência em cache: %s", cached.get('estagio'))
+                cached["question"] = clinical_data.get("question", "")
+                cached["cache_hit"] = True
+                return cached
+    
+    result = _inferir_paciente(clinical_data, politica)
+    result["cache_hit"] = False
     
+    # Só resultados completos vão para o cache (falhas podem ser transitórias)
+    if chave is not None and result.get("classificacao_valida") and (
+        result.get("reasoner_ok") or not result.get("reasoner_executado")
+    ):
+        INFERENCE_CACHE.put(chave, result)
+    
+    return result
+
+
+def inference_cache_stats() -> Dict[str, Any]:
+    """Contadores do cache de inferências deste processo"""
+    return INFERENCE_CACHE.stats()
+
+
+# ESTADIAMENTO EM LOTE (coortes, exportações)
+
+def stage_batch(creatinine, sdma, upc=None, pressure=None) -> Dict[str, Any]:
+    """
+    Estadia arrays de painéis sem criar indivíduos na ontologia
+    
+    Reproduz classificar_estagio_iris_com_validacao e os subestágios AP/HT
+    elemento a elemento (incluindo a rejeição de discrepância >= 2), mas com
+    operações vetorizadas: milhões de linhas por segundo.
+    
+    Args:
+        creatinine: Array de creatinina (mg/dL); NaN/None = ausente, ±inf = inválido
+        sdma: Array de SDMA (µg/dL), mesmo tamanho
+        upc: Array de UPC (opcional)
+        pressure: Array de pressão sistólica em mmHg (opcional)
+    
+    Returns:
+        Dict de arrays NumPy, um elemento por painel:
+        - "estagio": 1-4, 0 quando classificar_estagio_iris_com_validacao
+          retornaria None
+        - "valido": mesma validade da função escalar
+        - "discrepancia": diferença entre os estágios de creatinina e SDMA
+          (-1 se faltar um dos dois)
+        - "estagio_creatinina", "estagio_sdma": 1-4, 0 se ausente
+        - "subestagio_ap", "subestagio_ht": "AP0".."HT3" ou None
+    """
+    import numpy as np
+    
+    resultado = estagiar_lote(creatinine, sdma, upc, pressure)
+    
+    # Índice -1 (ausente) cai no último elemento: None
+    nomes_ap = np.array(SUBESTAGIOS_AP + (None,), dtype=object)
+    nomes_ht = np.array(SUBESTAGIOS_HT + (None,), dtype=object)
+    resultado["subestagio_ap"] = nomes_ap[resultado["subestagio_ap"]]
+    resultado["subestagio_ht"] = nomes_ht[resultado["subestagio_ht"]]
+    return resultado
+
+
+def _inferir_paciente(clinical_data: Dict[str, Any], politica: str) -> Dict[str, Any]:
+    """Classificação numérica + inferência ontológica (sem cache)"""
     if not clinical_data:
         return {
             "estagio": None,
@@ -353,9 +914,9 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
     creatinina_val = clinical_data.get("creatinina") or clinical_data.get("creatinine")
     sdma_val = clinical_data.get("sdma")
     
-    print(f"[AGENTE B] Dados recebidos:")
-    print(f"[AGENTE B]   Creatinina: {creatinina_val}")
-    print(f"[AGENTE B]   SDMA: {sdma_val}")
+    logger.info("[AGENTE B] Dados recebidos:")
+    logger.info("[AGENTE B]   Creatinina: %s", creatinina_val)
+    logger.info("[AGENTE B]   SDMA: %s", sdma_val)
     
     if creatinina_val is None and sdma_val is None:
         return {
@@ -368,37 +929,6 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
             "question": question
         }
     
-    #CARREGAR ONTOLOGIA
-    try:
-        world, onto = _load_ontology()
-    except Exception as e:
-        return {
-                    print(f"[AGENTE B] Estágio calculado: {estagio_name}")
-            "subestagio": None,
-            "reasoner_ok": False,
-            "classificacao_valida": False,
-            "motivo_invalido": f"Erro na ontologia: {e}",
-                        print(f"[AGENTE B]   Paciente classificado como {estagio_name}")
-            "question": question
-        }
-    
-    #CRIAR INSTÂNCIA
-    patient_id = str(uuid.uuid4())[:8]
-    print(f"[AGENTE B] Criando paciente: {patient_id}")
-    
-    try:
-                    print("[AGENTE B] Reasoner executado")
-    except Exception as e:
-        return {
-            "estagio": None,
-            "subestagio": None,
-            "reasoner_ok": False,
-            "classificacao_valida": False,
-            "motivo_invalido": f"Erro ao criar instância: {e}",
-            "properties": {"annotations": [], "data_properties": {}},
-            "question": question
-        }
-    
     # VALIDAR E CLASSIFICAR COM VERIFICAÇÃO DE DISCREPÂNCIA
     estagio_name, classificacao_valida, motivo_invalido = classificar_estagio_iris_com_validacao(
         float(creatinina_val) if creatinina_val is not None else None,
@@ -407,7 +937,7 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
     
     # Se classificação inválida, RETORNAR SEM INFERIR
     if not classificacao_valida:
-        print(f"[AGENTE B] CLASSIFICAÇÃO INVÁLIDA - NÃO SERÁ INFERIDO")
+        logger.warning("[AGENTE B] CLASSIFICAÇÃO INVÁLIDA - NÃO SERÁ INFERIDO")
         return {
             "estagio": None,
             "subestagio": None,
@@ -419,28 +949,66 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
             "alerta": "ERRO DE CLASSIFICAÇÃO: " + motivo_invalido
         }
     
-    # CLASSIFICAÇÃO VÁLIDA - PROSSEGUIR 
-    if estagio_name:
-        print(f"[AGENTE B] ✓ Estágio calculado: {estagio_name}")
-        
-        estagio_class = onto.search_one(iri=f"*{estagio_name}")
-        if estagio_class:
-            patient.is_a.append(estagio_class)
-            print(f"[AGENTE B]   ✓ Paciente classificado como {estagio_name}")
+    #  CLASSIFICAR SUBETÁGIOS IRIS (AP e HT) 
+    upc = clinical_data.get("upc") or clinical_data.get("proteinuria")
+    pressao = clinical_data.get("pressao") or clinical_data.get("pressao_arterial")
     
-    #  EXECUTAR REASONER
-    print("[AGENTE B] Executando reasoner HermiT...")
-    reasoner_ok = False
+    subestagio_ap = _classificar_subestagio_proteinuria(upc)
+    subestagio_ht = _classificar_subestagio_hipertensao(pressao)
     
-    try:
-        sync_reasoner_hermit(world, infer_property_values=True)
-        reasoner_ok = True
-        print("[AGENTE B] ✓ Reasoner executado")
-    except Exception as e:
-        print(f"[AGENTE B] Erro no reasoner: {e}")
+    # DECIDIR SE O REASONER SERÁ EXECUTADO
+    if politica == "always":
+        executar_reasoner, motivo_reasoner = True, "política always"
+    elif politica == "never":
+        executar_reasoner, motivo_reasoner = False, "política never"
+    else:
+        executar_reasoner, motivo_reasoner = _reasoner_necessario(clinical_data)
+    logger.info("[AGENTE B] Reasoner (%s): %s - %s", politica, 'executar' if executar_reasoner else 'pular', motivo_reasoner)
+    
+    #CRIAR INSTÂNCIA E INFERIR
+    patient_id = str(uuid.uuid4())[:8]
+    logger.info("[AGENTE B] Criando paciente: %s", patient_id)
+    
+    # Reasoner persistente: só o delta do paciente, sem carregar a ontologia aqui
+    extracted = None
+    if executar_reasoner and REASONER_BACKEND == "server":
+        extracted = _inferir_no_servidor(patient_id, clinical_data, estagio_name)
     
-    # EXTRAIR INFERÊNCIAS 
-    extracted = _extract_claims_from_instance(patient)
+    if extracted is None:
+        #CARREGAR ONTOLOGIA (base emprestada do pool, carregada uma única vez)
+        try:
+            base = _pool_ontologias.retirar()
+        except Exception as e:
+            return {
+                "estagio": None,
+                "subestagio": None,
+                "reasoner_ok": False,
+                "classificacao_valida": False,
+                "motivo_invalido": f"Erro na ontologia: {e}",
+                "properties": {"annotations": [], "data_properties": {}},
+                "question": question
+            }
+        
+        # Paciente em sub-ontologia descartada ao final da requisição
+        try:
+            world, onto = base
+            extracted = _inferir_na_ontologia(
+                world, onto, patient_id, clinical_data, estagio_name, executar_reasoner
+            )
+        except InstanciaPacienteError as e:
+            return {
+                "estagio": None,
+                "subestagio": None,
+                "reasoner_ok": False,
+                "classificacao_valida": False,
+                "motivo_invalido": f"Erro ao criar instância: {e}",
+                "properties": {"annotations": [], "data_properties": {}},
+                "question": question
+            }
+        finally:
+            _pool_ontologias.devolver(base)
+    
+    reasoner_ok = extracted["reasoner_ok"]
     is_a = extracted["is_a"]
     properties = extracted["properties"]
     
@@ -451,13 +1019,7 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
         detected_stage = f"IRIS {numero}"
     
     substage = _extract_substage(is_a)
-    
-    #  CLASSIFICAR SUBETÁGIOS IRIS (AP e HT) 
-    upc = clinical_data.get("upc") or clinical_data.get("proteinuria")
-    pressao = clinical_data.get("pressao") or clinical_data.get("pressao_arterial")
-    
-    subestagio_ap = _classificar_subestagio_proteinuria(upc)
-    subestagio_ht = _classificar_subestagio_hipertensao(pressao)
+    classes_definidas = _extract_defined_classes(is_a, estagio_name, clinical_data)
     
     # Montar descrição de subetágios
     subestagios_iris = []
@@ -468,7 +1030,7 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
             "AP2": "proteinúrico"
         }.get(subestagio_ap, subestagio_ap)
         subestagios_iris.append(f"{subestagio_ap} ({descricao_ap})")
-        print(f"[AGENTE B]   Proteinúria: {subestagio_ap} - UPC={upc}")
+        logger.info("[AGENTE B]   Proteinúria: %s - UPC=%s", subestagio_ap, upc)
     
     if subestagio_ht:
         descricao_ht = {
@@ -478,7 +1040,7 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
             "HT3": "risco grave"
         }.get(subestagio_ht, subestagio_ht)
         subestagios_iris.append(f"{subestagio_ht} ({descricao_ht})")
-        print(f"[AGENTE B]   Hipertensão: {subestagio_ht} - PA={pressao} mmHg")
+        logger.info("[AGENTE B]   Hipertensão: %s - PA=%s mmHg", subestagio_ht, pressao)
     
     subestagios_completo = ", ".join(subestagios_iris) if subestagios_iris else substage
     
@@ -489,18 +1051,23 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
         "subestagio_ap": subestagio_ap,  # ← NOVO
         "subestagio_ht": subestagio_ht,  # ← NOVO
         "reasoner_ok": reasoner_ok,
+        "reasoner_politica": politica,
+        "reasoner_executado": executar_reasoner,
+        "reasoner_motivo": motivo_reasoner,
+        "classes_definidas": classes_definidas,
         "classificacao_valida": classificacao_valida,
         "motivo_invalido": motivo_invalido,
         "properties": properties,
         "question": question
     }
     
-    print(f"[AGENTE B] Inferência concluída")
-    print(f"[AGENTE B]   Estágio: {detected_stage}")
+    logger.info("[AGENTE B] Inferência concluída")
+    logger.info("[AGENTE B]   Estágio: %s", detected_stage)
     if subestagios_completo:
-        print(f"[AGENTE B]   Subetágios: {subestagios_completo}")
-    print(f"[AGENTE B]   Classificação válida: {classificacao_valida}")
-    print("="*70 + "\n")
+        logger.info("[AGENTE B]   Subetágios: %s", subestagios_completo)
+    if classes_definidas:
+        logger.info("[AGENTE B]   Classes da ontologia: %s", ", ".join(classes_definidas))
+    logger.info("[AGENTE B]   Classificação válida: %s", classificacao_valida)
     
     return result
 
@@ -508,6 +1075,9 @@ def handle_inference(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
     # TESTE
 
 if __name__ == "__main__":
+    from log_config import configurar_logging
+    configurar_logging()
+    
     print("="*70)
     print("TESTES DE VALIDAÇÃO DE DISCREPÂNCIA")
     print("="*70)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de inferências do Agente B
+
+O resultado da inferência é função apenas dos dados clínicos que viram
+propriedades do paciente na ontologia, da própria ontologia e da política
+do reasoner. Painéis repetidos são respondidos sem tocar no owlready2.
+
+Chave: (dados clínicos normalizados, hash do arquivo OWL, política)
+"""
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+
+# Campos que viram propriedades do paciente (ver _create_patient_instance)
+CAMPOS_CHAVE = (
+    "creatinina", "creatinine", "sdma",
+    "upc", "proteinuria",
+    "pressao", "pressao_arterial",
+    "idade", "peso",
+)
+
+# Casas decimais usadas na normalização (1.60 e 1.6 são o mesmo painel)
+CASAS_DECIMAIS = 6
+
+
+class InferenceCache:
+    """Cache LRU com contadores de acerto/erro, seguro entre threads"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        """Retorna uma cópia do resultado em cache (ou None)"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+    
+    def put(self, key, value: Dict[str, Any]):
+        """Armazena uma cópia do resultado, removendo o menos usado se cheio"""
+        if not self.enabled:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# HASH DA ONTOLOGIA
+
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+
+def ontology_hash(path: Path) -> str:
+    """
+    SHA-256 do arquivo OWL
+    
+    Recalculado apenas quando mtime ou tamanho do arquivo mudam.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    assinatura = (stat.st_mtime_ns, stat.st_size)
+    
+    with _hash_lock:
+        memo = _hash_memo.get(path)
+        if memo and memo[0] == assinatura:
+            return memo[1]
+    
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloco)
+    digest = sha.hexdigest()
+    
+    with _hash_lock:
+        _hash_memo[path] = (assinatura, digest)
+    return digest
+
+
+# CHAVE
+
+def _normalizar_valor(value):
+    try:
+        return round(float(value), CASAS_DECIMAIS)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def chave_inferencia(
+    clinical_data: Dict[str, Any],
+    onto_hash: str,
+    politica: str
+) -> Tuple:
+    """
+    Monta a chave do cache a partir dos dados clínicos
+    
+    Campos ausentes (None) não entram na chave; campos de texto como a
+    pergunta do usuário não afetam a inferência e são ignorados.
+    """
+    dados = tuple(
+        (campo, _normalizar_valor(clinical_data[campo]))
+        for campo in CAMPOS_CHAVE
+        if clinical_data.get(campo) is not None
+    )
+    return (dados, onto_hash, politica)
@@ -0,0 +1,233 @@
+package br.mas.iris.reasoner;
+
+import com.google.gson.Gson;
+import com.google.gson.JsonArray;
+import com.google.gson.JsonElement;
+import com.google.gson.JsonObject;
+import com.google.gson.JsonParser;
+import org.semanticweb.HermiT.ReasonerFactory;
+import org.semanticweb.owlapi.apibinding.OWLManager;
+import org.semanticweb.owlapi.io.StringDocumentSource;
+import org.semanticweb.owlapi.model.OWLClass;
+import org.semanticweb.owlapi.model.OWLClassExpression;
+import org.semanticweb.owlapi.model.OWLDataFactory;
+import org.semanticweb.owlapi.model.OWLDataProperty;
+import org.semanticweb.owlapi.model.OWLLiteral;
+import org.semanticweb.owlapi.model.OWLOntology;
+import org.semanticweb.owlapi.model.OWLOntologyManager;
+import org.semanticweb.owlapi.reasoner.InferenceType;
+import org.semanticweb.owlapi.reasoner.Node;
+import org.semanticweb.owlapi.reasoner.OWLReasoner;
+
+import java.io.BufferedReader;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+import java.util.ArrayDeque;
+import java.util.ArrayList;
+import java.util.Deque;
+import java.util.HashMap;
+import java.util.HashSet;
+import java.util.LinkedHashMap;
+import java.util.LinkedHashSet;
+import java.util.List;
+import java.util.Map;
+import java.util.Set;
+
+/**
+ * Reasoner HermiT persistente do Agente B.
+ *
+ * A ontologia é carregada e classificada uma única vez, na partida. Cada
+ * requisição (uma linha JSON no stdin) traz só o delta do paciente: estágio
+ * calculado e valores clínicos. O paciente é descrito como uma expressão de
+ * classe (Gato ⊓ Estágio ⊓ ∃prop.{valor} ...) e os tipos são obtidos por
+ * testes de subsunção contra a hierarquia já classificada, sem alterar a
+ * ontologia e sem reprocessá-la. A resposta sai em uma linha JSON no
+ * stdout, com o mesmo id.
+ *
+ * Protocolo (o mesmo de Agent_B/reasoner_substituto.py):
+ *   partida:    {"event": "ready", "pid": 123, "classes": 63}
+ *   requisição: {"id": "1", "paciente": "ab12cd34", "estagio": "EstagioIRIS2",
+ *                "dados": [{"propriedades": ["nivelCreatinina", "creatinina"],
+ *                           "valor": 2.1, "inteiro": false}, ...]}
+ *   resposta:   {"id": "1", "ok": true, "reasoner_ok": true,
+ *                "is_a": ["EstagioIRIS2", "GatoIdoso"],
+ *                "properties": {"annotations": [], "data_properties": {...}}}
+ *   erro:       {"id": "1", "ok": false, "erro": "..."}
+ *
+ * Uso: java -jar servidor-hermit.jar ontologia.owl
+ */
+public final class ServidorHermit {
+
+    private final OWLDataFactory df;
+    private final OWLReasoner reasoner;
+    private final Map<String, OWLClass> classes = new HashMap<>();
+    private final Map<String, OWLDataProperty> propriedades = new HashMap<>();
+    private final OWLClass gato;
+
+    private ServidorHermit(OWLOntology ontologia) {
+        this.df = ontologia.getOWLOntologyManager().getOWLDataFactory();
+        ontologia.classesInSignature().forEach(c -> classes.put(c.getIRI().getShortForm(), c));
+        ontologia.dataPropertiesInSignature().forEach(p -> propriedades.put(p.getIRI().getShortForm(), p));
+        this.gato = classes.getOrDefault("Gato", df.getOWLThing());
+
+        this.reasoner = new ReasonerFactory().createReasoner(ontologia);
+        this.reasoner.precomputeInferences(InferenceType.CLASS_HIERARCHY);
+    }
+
+    /** Carrega a ontologia ignorando o comentário antes da declaração XML (ontologia.owl) */
+    private static OWLOntology carregar(String caminho) throws Exception {
+        String texto = new String(Files.readAllBytes(Paths.get(caminho)), StandardCharsets.UTF_8);
+        int inicio = texto.indexOf("<?xml");
+        if (inicio > 0) {
+            texto = texto.substring(inicio);
+        }
+        OWLOntologyManager manager = OWLManager.createOWLOntologyManager();
+        return manager.loadOntologyFromOntologyDocument(new StringDocumentSource(texto));
+    }
+
+    private JsonObject classificar(JsonObject requisicao) {
+        Set<OWLClassExpression> partes = new LinkedHashSet<>();
+        partes.add(gato);
+
+        JsonElement estagio = requisicao.get("estagio");
+        if (estagio != null && !estagio.isJsonNull() && classes.containsKey(estagio.getAsString())) {
+            partes.add(classes.get(estagio.getAsString()));
+        }
+
+        Map<String, JsonArray> valores = new LinkedHashMap<>();
+        JsonArray dados = requisicao.has("dados") ? requisicao.getAsJsonArray("dados") : new JsonArray();
+        for (JsonElement elemento : dados) {
+            JsonObject dado = elemento.getAsJsonObject();
+            OWLDataProperty propriedade = null;
+            for (JsonElement nome : dado.getAsJsonArray("propriedades")) {
+                propriedade = propriedades.get(nome.getAsString());
+                if (propriedade != null) {
+                    break;
+                }
+            }
+            if (propriedade == null) {
+                continue;
+            }
+            boolean inteiro = dado.has("inteiro") && dado.get("inteiro").getAsBoolean();
+            OWLLiteral literal = inteiro
+                    ? df.getOWLLiteral(dado.get("valor").getAsInt())
+                    : df.getOWLLiteral(dado.get("valor").getAsDouble());
+            partes.add(df.getOWLDataHasValue(propriedade, literal));
+
+            String nome = propriedade.getIRI().getShortForm();
+            valores.computeIfAbsent(nome, k -> new JsonArray());
+            valores.get(nome).add(inteiro ? dado.get("valor").getAsInt() : dado.get("valor").getAsDouble());
+        }
+
+        OWLClassExpression paciente = partes.size() == 1
+                ? gato
+                : df.getOWLObjectIntersectionOf(partes);
+
+        JsonObject resposta = new JsonObject();
+        JsonArray isA = new JsonArray();
+        if (reasoner.isSatisfiable(paciente)) {
+            for (OWLClass tipo : tiposDiretos(paciente)) {
+                isA.add(tipo.getIRI().getShortForm());
+            }
+            resposta.addProperty("reasoner_ok", true);
+        } else {
+            // Mesmo efeito de uma ontologia inconsistente no owlready2
+            for (OWLClassExpression parte : partes) {
+                if (!parte.isAnonymous()) {
+                    isA.add(parte.asOWLClass().getIRI().getShortForm());
+                }
+            }
+            resposta.addProperty("reasoner_ok", false);
+            resposta.addProperty("erro", "paciente inconsistente com a ontologia");
+        }
+
+        JsonObject dataProperties = new JsonObject();
+        valores.forEach(dataProperties::add);
+        JsonObject properties = new JsonObject();
+        properties.add("annotations", new JsonArray());
+        properties.add("data_properties", dataProperties);
+
+        resposta.addProperty("ok", true);
+        resposta.add("is_a", isA);
+        resposta.add("properties", properties);
+        return resposta;
+    }
+
+    /**
+     * Tipos diretos do paciente: desce a hierarquia classificada a partir de
+     * owl:Thing e só testa as subclasses diretas das classes já satisfeitas.
+     */
+    private List<OWLClass> tiposDiretos(OWLClassExpression paciente) {
+        Set<OWLClass> visitadas = new HashSet<>();
+        Set<OWLClass> satisfeitas = new HashSet<>();
+        List<OWLClass> diretas = new ArrayList<>();
+        Deque<OWLClass> fila = new ArrayDeque<>();
+        fila.add(df.getOWLThing());
+
+        while (!fila.isEmpty()) {
+            OWLClass atual = fila.poll();
+            boolean temSubclasse = false;
+            for (Node<OWLClass> no : reasoner.getSubClasses(atual, true)) {
+                if (no.isBottomNode()) {
+                    continue;
+                }
+                for (OWLClass sub : no) {
+                    if (!visitadas.add(sub)) {
+                        temSubclasse |= satisfeitas.contains(sub);
+                        continue;
+                    }
+                    if (reasoner.isEntailed(df.getOWLSubClassOfAxiom(paciente, sub))) {
+                        satisfeitas.add(sub);
+                        temSubclasse = true;
+                        fila.add(sub);
+                    }
+                }
+            }
+            if (!temSubclasse && !atual.isOWLThing()) {
+                diretas.add(atual);
+            }
+        }
+        return diretas;
+    }
+
+    public static void main(String[] args) throws Exception {
+        // stdout é só do protocolo: mensagens das bibliotecas vão para stderr
+        PrintStream protocolo = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        System.setOut(System.err);
+
+        ServidorHermit servidor = new ServidorHermit(carregar(args.length > 0 ? args[0] : "ontologia.owl"));
+        Gson gson = new Gson();
+
+        JsonObject pronto = new JsonObject();
+        pronto.addProperty("event", "ready");
+        pronto.addProperty("pid", ProcessHandle.current().pid());
+        pronto.addProperty("classes", servidor.classes.size());
+        protocolo.println(gson.toJson(pronto));
+
+        BufferedReader entrada = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String linha;
+        while ((linha = entrada.readLine()) != null) {
+            if (linha.isBlank()) {
+                continue;
+            }
+            JsonObject resposta;
+            JsonElement id = null;
+            try {
+                JsonObject requisicao = JsonParser.parseString(linha).getAsJsonObject();
+                id = requisicao.get("id");
+                resposta = servidor.classificar(requisicao);
+            } catch (Exception e) {
+                resposta = new JsonObject();
+                resposta.addProperty("ok", false);
+                resposta.addProperty("erro", String.valueOf(e));
+            }
+            resposta.add("id", id);
+            protocolo.println(gson.toJson(resposta));
+        }
+    }
+}
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Substituto local do servidor HermiT - Multi-Agent IRIS System
+=============================================================
+Processo persistente que fala o mesmo protocolo de
+Agent_B/reasoner/ServidorHermit.java (uma linha JSON por mensagem no
+stdin/stdout), para rodar o backend "server" do Agente B e os testes sem
+JVM.
+
+Não é um reasoner OWL: avalia apenas as classes definidas da ontologia
+(EquivalentClasses) escritas com Class, ObjectIntersectionOf,
+ObjectUnionOf e DataSomeValuesFrom sobre faixas de xsd:integer/xsd:double,
+que é o fragmento usado pelas definições clínicas (estágios IRIS, AP/HT,
+GatoIdoso, GatoEstagioAvancado). Restrições sobre propriedades de objeto
+nunca são satisfeitas (o delta do paciente só traz valores numéricos).
+
+A ontologia é lida uma única vez, na partida.
+
+Uso:
+    python Agent_B/reasoner_substituto.py ontologia.owl
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import json
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Set, Tuple
+
+OWL = "{http://www.w3.org/2002/07/owl#}"
+
+# Facetas XSD suportadas: valor do paciente x limite da restrição
+FACETAS = {
+    "minInclusive": lambda valor, limite: valor >= limite,
+    "minExclusive": lambda valor, limite: valor > limite,
+    "maxInclusive": lambda valor, limite: valor <= limite,
+    "maxExclusive": lambda valor, limite: valor < limite,
+}
+
+
+def _nome(elemento) -> str:
+    iri = elemento.get("IRI") or elemento.get("abbreviatedIRI") or ""
+    return iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1].rsplit(":", 1)[-1]
+
+
+def carregar_ontologia(caminho: str) -> Tuple[Dict[str, Any], Set[str]]:
+    """
+    Lê a ontologia (OWL/XML)
+    
+    Returns:
+        ({classe definida: expressão}, nomes das propriedades de dados)
+    """
+    with open(caminho, encoding="utf-8") as f:
+        texto = f.read()
+    # ontologia.owl tem um comentário antes da declaração XML
+    raiz = ET.fromstring(texto[texto.find("<?xml"):].encode("utf-8"))
+
+    definicoes = {}
+    for equivalencia in raiz.iter(f"{OWL}EquivalentClasses"):
+        classe, expressao = equivalencia[0], equivalencia[1]
+        if classe.tag == f"{OWL}Class":
+            definicoes[_nome(classe)] = expressao
+    propriedades = {_nome(p) for p in raiz.iter(f"{OWL}DataProperty")}
+    return definicoes, propriedades
+
+
+def _satisfaz(expressao, tipos: Set[str], valores: Dict[str, tuple]) -> bool:
+    tag = expressao.tag[len(OWL):]
+    if tag == "Class":
+        return _nome(expressao) in tipos
+    if tag == "ObjectIntersectionOf":
+        return all(_satisfaz(parte, tipos, valores) for parte in expressao)
+    if tag == "ObjectUnionOf":
+        return any(_satisfaz(parte, tipos, valores) for parte in expressao)
+    if tag == "DataSomeValuesFrom":
+        propriedade, faixa = expressao[0], expressao[1]
+        if _nome(propriedade) not in valores:
+            return False
+        valor, inteiro = valores[_nome(propriedade)]
+        return _na_faixa(faixa, valor, inteiro)
+    return False
+
+
+def _na_faixa(faixa, valor: float, inteiro: bool) -> bool:
+    """Valor na faixa de dados (xsd:integer e xsd:double são disjuntos, como no HermiT)"""
+    tipo = faixa if faixa.tag == f"{OWL}Datatype" else faixa.find(f"{OWL}Datatype")
+    if tipo is None or (_nome(tipo) == "integer") != inteiro:
+        return False
+    for faceta in faixa.iter(f"{OWL}FacetRestriction"):
+        teste = FACETAS.get(faceta.get("facet", "").rsplit("#", 1)[-1])
+        if teste is None or not teste(valor, float(faceta[0].text)):
+            return False
+    return True
+
+
+def classificar(definicoes: Dict[str, Any], propriedades: Set[str], requisicao: Dict[str, Any]) -> Dict[str, Any]:
+    """Classes do paciente (asserções + definidas satisfeitas, até o ponto fixo)"""
+    tipos = {"Gato"}
+    if requisicao.get("estagio"):
+        tipos.add(requisicao["estagio"])
+
+    valores, data_properties = {}, {}
+    for dado in requisicao.get("dados", []):
+        # Primeira propriedade candidata que a ontologia usa
+        nome = next((p for p in dado["propriedades"] if p in propriedades), None)
+        if nome is None:
+            continue
+        valores[nome] = (dado["valor"], bool(dado.get("inteiro")))
+        data_properties.setdefault(nome, []).append(dado["valor"])
+
+    mudou = True
+    while mudou:
+        novos = {
+            classe for classe, expressao in definicoes.items()
+            if classe not in tipos and _satisfaz(expressao, tipos, valores)
+        }
+        tipos |= novos
+        mudou = bool(novos)
+
+    return {
+        "ok": True,
+        "reasoner_ok": True,
+        "is_a": sorted(tipos),
+        "properties": {"annotations": [], "data_properties": data_properties}
+    }
+
+
+def main(argv: List[str]) -> int:
+    caminho = argv[1] if len(argv) > 1 else "ontologia.owl"
+    definicoes, propriedades = carregar_ontologia(caminho)
+
+    def responder(mensagem: Dict[str, Any]):
+        sys.stdout.write(json.dumps(mensagem, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    responder({"event": "ready", "pid": os.getpid(), "classes": len(definicoes)})
+
+    for linha in sys.stdin:
+        if not linha.strip():
+            continue
+        requisicao_id = None
+        try:
+            requisicao = json.loads(linha)
+            requisicao_id = requisicao.get("id")
+            resposta = classificar(definicoes, propriedades, requisicao)
+        except Exception as e:
+            resposta = {"ok": False, "erro": str(e)}
+        resposta["id"] = requisicao_id
+        responder(resposta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
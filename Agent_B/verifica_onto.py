@@ -3,6 +3,8 @@ import json
 import uuid
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+
+from iris_thresholds import estagio_creatinina, estagio_sdma
 from owlready2 import (
     World, Thing,
     DataProperty, ObjectProperty, AnnotationProperty,
@@ -41,30 +43,11 @@ def classificar_estagio_manual(creat: Optional[float], sdma: Optional[float]) ->
     Classificação manual seguindo a lógica IRIS correta:
     Usa o estágio MAIS ALTO entre creatinina e SDMA
     """
-    stage_creat = None
-    stage_sdma = None
-    
-    # Classificar por creatinina
-    if creat is not None:
-        if creat < 1.6:
-            stage_creat = "EstagioIRIS1"
-        elif 1.6 <= creat <= 2.8:
-            stage_creat = "EstagioIRIS2"
-        elif 2.9 <= creat <= 5.0:
-            stage_creat = "EstagioIRIS3"
-        elif creat > 5.0:
-            stage_creat = "EstagioIRIS4"
-    
-    # Classificar por SDMA
-    if sdma is not None:
-        if 15.0 <= sdma <= 17.0:
-            stage_sdma = "EstagioIRIS1"
-        elif 18.0 <= sdma <= 25.0:
-            stage_sdma = "EstagioIRIS2"
-        elif 26.0 <= sdma <= 38.0:
-            stage_sdma = "EstagioIRIS3"
-        elif sdma > 38.0:
-            stage_sdma = "EstagioIRIS4"
+    # Classificar por creatinina e SDMA (tabela IRIS compartilhada)
+    stage_creat = estagio_creatinina(creat)
+    stage_sdma = estagio_sdma(sdma)
+    stage_creat = f"EstagioIRIS{stage_creat}" if stage_creat else None
+    stage_sdma = f"EstagioIRIS{stage_sdma}" if stage_sdma else None
     
     # Escolher o estágio mais alto
     ordem = {"EstagioIRIS1": 1, "EstagioIRIS2": 2, "EstagioIRIS3": 3, "EstagioIRIS4": 4}
@@ -4,26 +4,109 @@
 # ==========================================================
 
 import re
+import io
 import csv
 import os
+import threading
+import importlib.util
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+from log_config import get_logger, log_banner
+from iris_thresholds import (
+    estagio_creatinina, estagio_sdma, subestagio_ap, subestagio_ht, combinar_estagios
+)
+from llm_client import get_llm, llm_disponivel
+from .keyword_matcher import KeywordMatcher
+
+logger = get_logger(__name__)
 
 # ----------------------
 # Imports condicionais com fallback
 # ----------------------
 RAG_AVAILABLE = False
 
+# agent_c_db adia os imports pesados (Chroma, embeddings) até a primeira
+# busca; a disponibilidade é verificada sem importá-los
 try:
+    from .agent_c_db import RAG_DEPENDENCIAS
+    _faltando = [m for m in RAG_DEPENDENCIAS if importlib.util.find_spec(m) is None]
+    if _faltando:
+        raise ImportError(f"módulos ausentes: {', '.join(_faltando)}")
     from .agent_c_db import rag_search, CHROMA_PATH
     RAG_AVAILABLE = True
-    print("[AGENTE C] RAG disponível")
+    logger.info("[AGENTE C] RAG disponível")
 except ImportError as e:
-    print(f"[AGENTE C] RAG não disponível: {e}")
-    print(f"[AGENTE C] Instale: pip install langchain langchain-chroma chromadb")
+    logger.info("[AGENTE C] RAG não disponível: %s", e)
+    logger.info("[AGENTE C] Instale: pip install langchain langchain-chroma chromadb")
     CHROMA_PATH = None
 
+# Parâmetros da busca na literatura (usados também pelo processamento em lote).
+# O contexto é limitado em tokens do LLM (RAG_MAX_CONTEXT_CHARS vale só para
+# quem chama rag_search sem limite de tokens)
+RAG_K = 5
+RAG_MAX_CONTEXT_CHARS = 3000
+RAG_MAX_CONTEXT_TOKENS = int(os.environ.get("AGENTE_C_RAG_MAX_CONTEXT_TOKENS", "512"))
+
+# LLM das respostas às perguntas do veterinário (cliente de llm_client.py,
+# reutilizado entre requisições; prompts repetidos vêm do cache)
+LLM_PROVEDOR = "groq"
+LLM_MODELO = "llama-3.1-8b-instant"
+LLM_TEMPERATURA = 0.3
+
+
+# ----------------------
+# Palavras-chave de escopo e de tópico (responder_pergunta_usuario)
+# ----------------------
+KEYWORDS_ESCOPO = [
+    'drc', 'doença renal', 'kidney disease', 'renal', 'creatinina', 'creatinine',
+    'sdma', 'upc', 'proteinúria', 'proteinuria', 'pressão', 'pressure',
+    'felino', 'gato', 'cat', 'feline', 'veterinário', 'veterinary',
+    'tratamento', 'treatment', 'therapy', 'terapia',
+    'dieta', 'diet', 'alimentação', 'nutrition',
+    'sintoma', 'symptom', 'sinal', 'sign',
+    'prognóstico', 'prognosis', 'expectativa',
+    'medicação', 'medication', 'drug', 'remédio',
+    'monitoramento', 'monitoring', 'follow-up',
+    'comorbidade', 'comorbidity',
+    'risco', 'risk', 'complicação', 'complication',
+    'hipertensão', 'hypertension',
+    'fósforo', 'phosphorus', 'phosphate',
+    'estágio iris', 'iris stage', 'iris',
+    'clínico', 'clinical', 'diagnóstico', 'diagnosis'
+]
+
+# Menções ao animal, que sozinhas não tornam a pergunta clínica ("gato de botas")
+KEYWORDS_ANIMAL = ['gato', 'cat', 'felino', 'feline']
+
+KEYWORDS_MEDICAS = [
+    'tratamento', 'treatment', 'therapy', 'terapia',
+    'dieta', 'diet', 'alimentação', 'nutrition',
+    'sintoma', 'symptom', 'sinal', 'sign',
+    'prognóstico', 'prognosis', 'expectativa',
+    'medicação', 'medication', 'drug', 'remédio',
+    'monitoramento', 'monitoring', 'follow-up',
+    'comorbidade', 'comorbidity',
+    'risco', 'risk', 'complicação', 'complication',
+    'pressão', 'pressure', 'hipertensão', 'hypertension',
+    'proteinúria', 'proteinuria', 'upc',
+    'fósforo', 'phosphorus', 'phosphate',
+    'raça', 'breed', 'birmanês', 'birmanese', 'persa', 'persian'
+]
+
+# Compilado uma vez: uma passada pela pergunta encontra todas as
+# palavras-chave, com suas categorias
+_KEYWORDS = KeywordMatcher({
+    "escopo": KEYWORDS_ESCOPO,
+    "animal": KEYWORDS_ANIMAL,
+    "medica": KEYWORDS_MEDICAS,
+})
+_ORDEM_MEDICAS = {palavra: i for i, palavra in enumerate(KEYWORDS_MEDICAS)}
+
+RESPOSTA_FORA_DO_ESCOPO = "Não encontrei informações sobre isso no RAG. O sistema foi desenvolvido para responder perguntas sobre diagnóstico e manejo de doença renal crônica felina (DRC) conforme diretrizes IRIS."
+
 
 
 # ----------------------
@@ -46,6 +129,60 @@ CSV_HEADERS = [
     "regra_aplicada"
 ]
 
+# Gravações no CSV: lock entre threads do processo + lock do arquivo entre
+# processos (os workers da API gravam no mesmo arquivo)
+_csv_lock = threading.Lock()
+
+
+@contextmanager
+def _travar_arquivo(arquivo):
+    """Lock exclusivo do arquivo aberto (fcntl no Linux/macOS, msvcrt no Windows)"""
+    if os.name == "nt":
+        import msvcrt
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+
+
+def _anexar_linha_csv(row_data: Dict[str, Any]) -> bool:
+    """
+    Anexa uma linha ao CSV de validações (header se o arquivo estiver vazio)
+    
+    A linha é montada em memória e gravada em um único write sob lock, para
+    que gravações concorrentes não se intercalem.
+    
+    Returns:
+        True se o arquivo foi criado (header escrito) nesta chamada
+    """
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=CSV_HEADERS).writerow(row_data)
+    linha = buffer.getvalue()
+
+    with _csv_lock:
+        with open(CSV_DATABASE_PATH, mode='a', newline='', encoding='utf-8') as csvfile:
+            with _travar_arquivo(csvfile):
+                # Tamanho verificado sob o lock: só um gravador escreve o header
+                criado = os.fstat(csvfile.fileno()).st_size == 0
+                if criado:
+                    header = io.StringIO()
+                    csv.DictWriter(header, fieldnames=CSV_HEADERS).writeheader()
+                    linha = header.getvalue() + linha
+                csvfile.write(linha)
+                csvfile.flush()
+    return criado
+
+
 def salvar_validacao_csv(resultado: Dict[str, Any], dados_clinicos: Dict[str, Any], user_question: str = ""):
     """
     Salva validação bem-sucedida no banco de dados CSV
@@ -61,16 +198,13 @@ def salvar_validacao_csv(resultado: Dict[str, Any], dados_clinicos: Dict[str, An
     valida_b = resultado.get("valida_b")
     
     if caso not in [1, 2] or valida_b is False:
-        print("[AGENTE C] Validação não salva (não confirmada ou com inconsistência)")
+        logger.info("[AGENTE C] Validação não salva (não confirmada ou com inconsistência)")
         return
     
     try:
         # Criar diretório se não existir
         CSV_DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
         
-        # Verificar se arquivo existe para decidir se escreve header
-        file_exists = CSV_DATABASE_PATH.exists()
-        
         # Preparar dados para salvar
         dados_validacao = resultado.get("dados_validacao", {})
         resposta_pergunta = resultado.get("resposta_pergunta", "")
@@ -91,20 +225,13 @@ def salvar_validacao_csv(resultado: Dict[str, Any], dados_clinicos: Dict[str, An
             "regra_aplicada": "RAG" if resultado.get("estagio_rag") else "Regras IRIS"
         }
         
-        # Escrever no CSV
-        with open(CSV_DATABASE_PATH, mode='a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
-            
-            # Escrever header se arquivo é novo
-            if not file_exists:
-                writer.writeheader()
-                print(f"[AGENTE C] Arquivo CSV criado: {CSV_DATABASE_PATH}")
-            
-            writer.writerow(row_data)
-            print(f"[AGENTE C] Validação salva no banco de dados CSV")
+        # Escrever no CSV (seguro entre threads e processos)
+        if _anexar_linha_csv(row_data):
+            logger.info("[AGENTE C] Arquivo CSV criado: %s", CSV_DATABASE_PATH)
+        logger.info("[AGENTE C] Validação salva no banco de dados CSV")
             
     except Exception as e:
-        print(f" Erro ao salvar no CSV: {e}")
+        logger.error(" Erro ao salvar no CSV: %s", e)
 
 # ----------------------
 # Tratamentos IRIS
@@ -162,12 +289,7 @@ def validar_subestagios_iris(
     
     # Validar AP (proteinúria)
     if upc is not None:
-        if upc < 0.2:
-            ap_esperado = "AP0"
-        elif 0.2 <= upc <= 0.4:
-            ap_esperado = "AP1"
-        else:
-            ap_esperado = "AP2"
+        ap_esperado = subestagio_ap(upc)
         
         resultado["ap_esperado"] = ap_esperado
         resultado["ap_valido"] = (subestagio_ap_b == ap_esperado)
@@ -177,14 +299,7 @@ def validar_subestagios_iris(
     
     # Validar HT (hipertensão)
     if pressao is not None:
-        if pressao < 140:
-            ht_esperado = "HT0"
-        elif 140 <= pressao < 160:
-            ht_esperado = "HT1"
-        elif 160 <= pressao < 180:
-            ht_esperado = "HT2"
-        else:
-            ht_esperado = "HT3"
+        ht_esperado = subestagio_ht(pressao)
         
         resultado["ht_esperado"] = ht_esperado
         resultado["ht_valido"] = (subestagio_ht_b == ht_esperado)
@@ -226,27 +341,10 @@ def validar_por_regras_iris(
         }
     
     # Classificar segundo tabela IRIS oficial
-    stage_creat = None
-    if creat < 1.6:
-        stage_creat = 1
-    elif 1.6 <= creat <= 2.8:
-        stage_creat = 2
-    elif 2.9 <= creat <= 5.0:
-        stage_creat = 3
-    else:
-        stage_creat = 4
-    
-    stage_sdma = None
-    if sdma < 18.0:
-        stage_sdma = 1
-    elif 18.0 <= sdma <= 25.0:
-        stage_sdma = 2
-    elif 26.0 <= sdma <= 38.0:
-        stage_sdma = 3
-    else:
-        stage_sdma = 4
+    stage_creat = estagio_creatinina(creat)
+    stage_sdma = estagio_sdma(sdma)
     
-    discrepancia = abs(stage_creat - stage_sdma)
+    estagio_esperado, discrepancia = combinar_estagios(stage_creat, stage_sdma)
     
     # Extrair número do estágio B
     estagio_b_num = int(re.search(r'\d', estagio_b).group()) if re.search(r'\d', estagio_b) else None
@@ -270,7 +368,6 @@ def validar_por_regras_iris(
     
     elif discrepancia == 1:
         # Usar o maior (regra IRIS)
-        estagio_esperado = max(stage_creat, stage_sdma)
         if estagio_b_num == estagio_esperado:
             return {
                 "valido": True,
@@ -344,55 +441,36 @@ def responder_pergunta_usuario(user_question: str, context_rag: str, docs: list,
     if not context_rag or len(docs) == 0:
         return None
     
-    print(f"[AGENTE C] Tentando responder pergunta do usuário...")
+    logger.info("[AGENTE C] Tentando responder pergunta do usuário...")
     
     # PRIMEIRO: Validar se pergunta está no escopo veterinário/clínico
-    keywords_escopo = [
-        'drc', 'doença renal', 'kidney disease', 'renal', 'creatinina', 'creatinine',
-        'sdma', 'upc', 'proteinúria', 'proteinuria', 'pressão', 'pressure',
-        'felino', 'gato', 'cat', 'feline', 'veterinário', 'veterinary',
-        'tratamento', 'treatment', 'therapy', 'terapia',
-        'dieta', 'diet', 'alimentação', 'nutrition',
-        'sintoma', 'symptom', 'sinal', 'sign',
-        'prognóstico', 'prognosis', 'expectativa',
-        'medicação', 'medication', 'drug', 'remédio',
-        'monitoramento', 'monitoring', 'follow-up',
-        'comorbidade', 'comorbidity',
-        'risco', 'risk', 'complicação', 'complication',
-        'hipertensão', 'hypertension',
-        'fósforo', 'phosphorus', 'phosphate',
-        'estágio iris', 'iris stage', 'iris',
-        'clínico', 'clinical', 'diagnóstico', 'diagnosis'
-    ]
-    
     question_lower = user_question.lower()
     
+    # Uma passada pela pergunta: todas as palavras-chave e suas categorias
+    por_categoria = KeywordMatcher.por_categoria(_KEYWORDS.encontrar(question_lower))
+    escopo = por_categoria.get("escopo", set())
+    
     # Verificar se contém pelo menos UMA palavra-chave do escopo
-    tem_palavra_chave = any(keyword in question_lower for keyword in keywords_escopo)
+    tem_palavra_chave = bool(escopo)
     
     # EXCEPTION: Se a pergunta tem "gato" mas não tem nenhuma outra palavra-chave clínica/IRIS,
     # é provavelmente uma pergunta fora do escopo (como "gato de botas")
-    if ("gato" in question_lower or "cat" in question_lower) and tem_palavra_chave:
+    if ("gato" in escopo or "cat" in escopo) and tem_palavra_chave:
         # Verificar se tem contexto clínico além de "gato"
-        palavras_clinicas = [k for k in keywords_escopo if k not in ['gato', 'cat', 'felino', 'feline']]
-        tem_contexto_clinico = any(palavra in question_lower for palavra in palavras_clinicas)
+        tem_contexto_clinico = bool(escopo - por_categoria.get("animal", set()))
         
         if not tem_contexto_clinico:
-            print(f"[AGENTE C] Pergunta menciona 'gato' mas sem contexto clínico - fora do escopo")
-            return "Não encontrei informações sobre isso no RAG. O sistema foi desenvolvido para responder perguntas sobre diagnóstico e manejo de doença renal crônica felina (DRC) conforme diretrizes IRIS."
+            logger.info("[AGENTE C] Pergunta menciona 'gato' mas sem contexto clínico - fora do escopo")
+            return RESPOSTA_FORA_DO_ESCOPO
     
     if not tem_palavra_chave:
-        print(f"[AGENTE C] Pergunta fora do escopo veterinário/clínico")
-        return "Não encontrei informações sobre isso no RAG. O sistema foi desenvolvido para responder perguntas sobre diagnóstico e manejo de doença renal crônica felina (DRC) conforme diretrizes IRIS."
+        logger.info("[AGENTE C] Pergunta fora do escopo veterinário/clínico")
+        return RESPOSTA_FORA_DO_ESCOPO
     
     # SEGUNDO: Tentar usar LLM se disponível (mais preciso)
     try:
-        import os
-        from langchain_groq import ChatGroq
-        from langchain_core.messages import HumanMessage
-        
-        if os.environ.get("GROQ_API_KEY"):
-            llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0.3)
+        if llm_disponivel(LLM_PROVEDOR):
+            llm = get_llm(LLM_PROVEDOR, LLM_MODELO, LLM_TEMPERATURA)
             
             # Construir contexto clínico específico se disponível
             clinical_context = ""
@@ -400,38 +478,21 @@ def responder_pergunta_usuario(user_question: str, context_rag: str, docs: list,
                 creat = clinical_data.get("creatinina")
                 sdma = clinical_data.get("sdma")
                 if creat is not None and sdma is not None:
-                    # Detectar estágios individuais
-                    creat_stage = "desconhecido"
-                    sdma_stage = "desconhecido"
+                    # Detectar estágios individuais (tabela IRIS compartilhada)
+                    creat_stage = estagio_creatinina(creat)
+                    sdma_stage = estagio_sdma(sdma)
                     
-                    if creat < 1.6:
-                        creat_stage = "IRIS 1"
-                    elif 1.6 <= creat <= 2.8:
-                        creat_stage = "IRIS 2"
-                    elif 2.9 <= creat <= 5.0:
-                        creat_stage = "IRIS 3"
-                    elif creat > 5.0:
-                        creat_stage = "IRIS 4"
-                    
-                    if sdma < 25:
-                        sdma_stage = "IRIS 1-2"
-                    elif 25 <= sdma <= 35:
-                        sdma_stage = "IRIS 3"
-                    elif sdma > 35:
-                        sdma_stage = "IRIS 4"
-                    
-                    discrepancia = abs(hash(creat_stage) - hash(sdma_stage)) > 0
                     clinical_context = f"\nDADOS CLÍNICOS DO PACIENTE:\n"
-                    clinical_context += f"• Creatinina: {creat} mg/dL → Sugere {creat_stage}\n"
-                    clinical_context += f"• SDMA: {sdma} µg/dL → Sugere {sdma_stage}\n"
-                    if discrepancia or creat_stage != sdma_stage:
+                    clinical_context += f"• Creatinina: {creat} mg/dL → Sugere IRIS {creat_stage}\n"
+                    clinical_context += f"• SDMA: {sdma} µg/dL → Sugere IRIS {sdma_stage}\n"
+                    if creat_stage != sdma_stage:
                         clinical_context += f"⚠️ DISCREPÂNCIA DETECTADA: Há divergência entre os biomarcadores.\n"
                         clinical_context += f"   Segundo IRIS: usar o MAIOR valor entre os dois marcadores quando diferem.\n"
             
             prompt = f"""Você é um especialista veterinário em doença renal crônica felina.
 
 CONTEXTO DA LITERATURA IRIS:
-{context_rag[:2000]}
+{context_rag}
 {clinical_context}
 
 PERGUNTA DO VETERINÁRIO:
@@ -449,73 +510,109 @@ INSTRUÇÕES:
 
 Resposta:"""
             
-            response = llm.invoke([HumanMessage(content=prompt)])
-            resposta_texto = response.content.strip()
+            resposta_texto = llm.gerar(prompt).strip()
             
             # Qualquer resposta válida do LLM é aceita
             if len(resposta_texto) > 20:
-                print(f"[AGENTE C]  Resposta gerada com LLM (com contexto clínico)")
+                logger.info("[AGENTE C]  Resposta gerada com LLM (com contexto clínico)")
                 return f" {resposta_texto}"
     
     except Exception as e:
-        print(f"[AGENTE C]  LLM não disponível para responder: {str(e)[:50]}")
+        logger.info("[AGENTE C]  LLM não disponível para responder: %s", str(e)[:50])
     
     # TERCEIRO: Fallback - busca por palavras-chave (método antigo)
-    keywords_medicas = [
-        'tratamento', 'treatment', 'therapy', 'terapia',
-        'dieta', 'diet', 'alimentação', 'nutrition',
-        'sintoma', 'symptom', 'sinal', 'sign',
-        'prognóstico', 'prognosis', 'expectativa',
-        'medicação', 'medication', 'drug', 'remédio',
-        'monitoramento', 'monitoring', 'follow-up',
-        'comorbidade', 'comorbidity',
-        'risco', 'risk', 'complicação', 'complication',
-        'pressão', 'pressure', 'hipertensão', 'hypertension',
-        'proteinúria', 'proteinuria', 'upc',
-        'fósforo', 'phosphorus', 'phosphate',
-        'raça', 'breed', 'birmanês', 'birmanese', 'persa', 'persian'
-    ]
-    
-    is_medical_question = any(keyword in question_lower for keyword in keywords_medicas)
-    
-    if not is_medical_question:
-        print(f"[AGENTE C] Pergunta não é sobre aspectos clínicos específicos")
+    keywords_pergunta = sorted(por_categoria.get("medica", set()), key=_ORDEM_MEDICAS.get)
+    
+    if not keywords_pergunta:
+        logger.info("[AGENTE C] Pergunta não é sobre aspectos clínicos específicos")
         return None
     
-    # Buscar resposta no contexto RAG
-    sentences = context_rag.split('.')
+    # Buscar resposta no contexto RAG: uma passada da expressão compilada
+    # sobre o contexto inteiro, cada ocorrência levada à sua sentença
+    sentences, sentencas_por_keyword = _KEYWORDS.localizar_sentencas(context_rag, keywords_pergunta)
     relevant_sentences = []
     
-    for keyword in keywords_medicas:
-        if keyword in question_lower:
-            for sentence in sentences:
-                if keyword in sentence.lower() and len(sentence.strip()) > 20:
-                    relevant_sentences.append(sentence.strip())
+    for keyword in keywords_pergunta:
+        for i in sentencas_por_keyword.get(keyword, []):
+            if len(sentences[i].strip()) > 20:
+                relevant_sentences.append(sentences[i].strip())
     
     if relevant_sentences:
         unique_sentences = list(dict.fromkeys(relevant_sentences))[:3]
         resposta = '. '.join(unique_sentences)
         if resposta:
-            print(f"[AGENTE C]  Resposta encontrada por palavra-chave")
+            logger.info("[AGENTE C]  Resposta encontrada por palavra-chave")
             return f" Baseado na literatura IRIS:\n\n{resposta}."
     
-    print(f"[AGENTE C]  Pergunta fora do escopo dos documentos indexados")
+    logger.info("[AGENTE C]  Pergunta fora do escopo dos documentos indexados")
     return None
 
 
 
+# ----------------------
+# 🔎 QUERY RAG
+# ----------------------
+def montar_query_rag(clinical_data: Dict[str, Any], user_question: Optional[str] = "") -> str:
+    """
+    Monta a query de busca na literatura a partir dos biomarcadores e da pergunta
+    
+    Usada por gerar_recomendacao e pelo processamento em lote, que precisa das
+    queries antes de validar para codificá-las todas de uma vez.
+    """
+    creat = clinical_data.get("creatinina")
+    sdma = clinical_data.get("sdma")
+    
+    q_parts = ["feline chronic kidney disease IRIS guideline cat"]
+    if creat is not None:
+        q_parts.append(f"creatinine {creat}")
+    if sdma is not None:
+        q_parts.append(f"SDMA {sdma}")
+    if user_question:
+        q_parts.append(user_question)
+    return " ".join(q_parts)
+
+
+def particao_cache_rag(clinical_data: Dict[str, Any]) -> Tuple:
+    """
+    Partição do cache semântico do RAG: estágio e subestágios IRIS do paciente
+    
+    Calculada dos dados clínicos (tabelas de iris_thresholds), sem esperar o
+    Agente B: a busca antecipada corre em paralelo com ele. Queries de
+    pacientes em estágios diferentes nunca compartilham resultado em cache,
+    por mais próximos que sejam os embeddings.
+    """
+    estagio, _ = combinar_estagios(
+        estagio_creatinina(clinical_data.get("creatinina")),
+        estagio_sdma(clinical_data.get("sdma"))
+    )
+    return (
+        estagio,
+        subestagio_ap(clinical_data.get("upc") or clinical_data.get("proteinuria")),
+        subestagio_ht(clinical_data.get("pressao") or clinical_data.get("pressao_arterial")),
+    )
+
+
 # ----------------------
 # 🔬 FUNÇÃO PRINCIPAL DE VALIDAÇÃO
 # ----------------------
 def gerar_recomendacao(
     inference: Dict[str, Any],
     clinical_data: Dict[str, Any],
-    user_question: Optional[str] = ""
+    user_question: Optional[str] = "",
+    rag_result: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
+    """
+    Valida a inferência do Agente B e monta a resposta clínica
+    
+    Args:
+        inference: Resultado do Agente B
+        clinical_data: Dados clínicos normalizados pelo Agente A
+        user_question: Pergunta do usuário
+        rag_result: Resultado de busca já calculado (ex.: rag_search_batch);
+            se None, a busca é feita aqui
+    """
 
-    print("\n" + "=" * 60)
-    print("[AGENTE C] VALIDADOR CIENTÍFICO")
-    print("=" * 60)
+    log_banner(logger, "[AGENTE C] VALIDADOR CIENTÍFICO")
 
     # ----------- Dados do Agent B -----------
     estagio_b = normalize_stage(inference.get("estagio") if inference else None)
@@ -528,18 +625,18 @@ def gerar_recomendacao(
     classificacao_b_valida = inference.get("classificacao_valida", True)
     motivo_invalido_b = inference.get("motivo_invalido")
 
-    print(f"[AGENTE C]  Estágio B: {estagio_b}")
+    logger.info("[AGENTE C]  Estágio B: %s", estagio_b)
     if subestagio_ap_b or subestagio_ht_b:
-        print(f"[AGENTE C]  Subetágios B: AP={subestagio_ap_b}, HT={subestagio_ht_b}")
-    print(f"[AGENTE C]  Classificação B válida: {classificacao_b_valida}")
-    print(f"[AGENTE C]  Creatinina: {creat}, SDMA: {sdma}")
+        logger.info("[AGENTE C]  Subetágios B: AP=%s, HT=%s", subestagio_ap_b, subestagio_ht_b)
+    logger.info("[AGENTE C]  Classificação B válida: %s", classificacao_b_valida)
+    logger.info("[AGENTE C]  Creatinina: %s, SDMA: %s", creat, sdma)
     if upc is not None or pressao is not None:
-        print(f"[AGENTE C]  UPC: {upc}, Pressão: {pressao}")
-    print(f"[AGENTE C]  RAG: {'ATIVO' if RAG_AVAILABLE else 'INDISPONÍVEL (usando regras científicas)'}")
+        logger.info("[AGENTE C]  UPC: %s, Pressão: %s", upc, pressao)
+    logger.info("[AGENTE C]  RAG: %s", 'ATIVO' if RAG_AVAILABLE else 'INDISPONÍVEL (usando regras científicas)')
     
     # ----------- VALIDAR SUBETÁGIOS -----------
     validacao_subestagios = validar_subestagios_iris(upc, pressao, subestagio_ap_b, subestagio_ht_b)
-    print(f"[AGENTE C]  {validacao_subestagios['mensagem']}")
+    logger.info("[AGENTE C]  %s", validacao_subestagios['mensagem'])
 
     # ----------- CASO 3: Discrepância detectada pelo B -----------
     if not classificacao_b_valida:
@@ -583,25 +680,22 @@ def gerar_recomendacao(
     
     if RAG_AVAILABLE and CHROMA_PATH:
         try:
-            # Query RAG
-            q_parts = ["feline chronic kidney disease IRIS guideline cat"]
-            if creat is not None:
-                q_parts.append(f"creatinine {creat}")
-            if sdma is not None:
-                q_parts.append(f"SDMA {sdma}")
-            if user_question:
-                q_parts.append(user_question)
-            query = " ".join(q_parts)
-            
-            print(f"[AGENTE C]  Buscando na literatura: {query}")
-            rag_result = rag_search(CHROMA_PATH, query, k=5, max_context_length_chars=3000)
+            # Query RAG (pode vir pronta do processamento em lote)
+            if rag_result is None:
+                query = montar_query_rag(clinical_data, user_question)
+                logger.info("[AGENTE C]  Buscando na literatura: %s", query)
+                rag_result = rag_search(
+                    CHROMA_PATH, query, k=RAG_K,
+                    max_context_length_chars=RAG_MAX_CONTEXT_CHARS, max_context_tokens=RAG_MAX_CONTEXT_TOKENS,
+                    particao=particao_cache_rag(clinical_data)
+                )
             context_rag = rag_result.get("context", "")
             docs = rag_result.get("docs", [])
             
             # Marcar que RAG foi tentado
             if context_rag and len(docs) > 0:
                 rag_disponivel = True
-                print(f"[AGENTE C] RAG disponível com {len(docs)} documentos")
+                logger.info("[AGENTE C] RAG disponível com %s documentos", len(docs))
             
             # Tentar responder pergunta específica do usuário
             if user_question and context_rag:
@@ -609,34 +703,34 @@ def gerar_recomendacao(
             
             # Extrair estágio do contexto RAG usando múltiplas estratégias
             if context_rag:
-                print(f"[AGENTE C] Contexto RAG recuperado ({len(context_rag)} chars)")
+                logger.info("[AGENTE C] Contexto RAG recuperado (%s chars)", len(context_rag))
                 context_upper = context_rag.upper()
                 
                 # Estratégia 1: Buscar padrões de "STAGE X" ou "IRIS X"
                 for i in range(1, 5):
                     if f"STAGE {i}" in context_upper or f"IRIS {i}" in context_upper:
                         estagio_rag = f"IRIS{i}"
-                        print(f"[AGENTE C]  Estágio encontrado no RAG: {estagio_rag}")
+                        logger.info("[AGENTE C]  Estágio encontrado no RAG: %s", estagio_rag)
                         break
                 
                 # Estratégia 2: Se não encontrou padrão, deixar None para depois
                 if estagio_rag is None:
-                    print(f"[AGENTE C] Nenhum padrão encontrado no contexto RAG")
-                    print(f"[AGENTE C] Será determinado por validação das regras IRIS")
+                    logger.info("[AGENTE C] Nenhum padrão encontrado no contexto RAG")
+                    logger.info("[AGENTE C] Será determinado por validação das regras IRIS")
                         
             else:
                 # RAG não retornou documentos
-                print(f"[AGENTE C] RAG não retornou documentos relevantes")
+                logger.info("[AGENTE C] RAG não retornou documentos relevantes")
                 if user_question:
                     resposta_pergunta = "Não há informações disponíveis na base de conhecimento indexada para responder esta pergunta. Recomenda-se consultar a literatura IRIS oficial ou indexar mais documentos."
                 
         except Exception as e:
-            print(f"[AGENTE C] Erro no RAG: {e}")
+            logger.error("[AGENTE C] Erro no RAG: %s", e)
 
     # ----------- VALIDAÇÃO: SEMPRE usar REGRAS IRIS (não comparação textual RAG) -----------
     # LÓGICA CORRIGIDA: RAG serve para Q&A, NÃO para validar estágios
     # Validação deve ser feita contra as REGRAS numéricas oficiais IRIS
-    print("[AGENTE C] Validando por regras IRIS oficiais...")
+    logger.info("[AGENTE C] Validando por regras IRIS oficiais...")
     validacao_regras = validar_por_regras_iris(creat, sdma, estagio_b)
     
     valida_b = validacao_regras["valido"]
@@ -646,9 +740,9 @@ def gerar_recomendacao(
     # Se RAG não retornou estágio explícito, usar o estagio_esperado das regras IRIS
     if estagio_rag is None or estagio_rag == "":
         estagio_rag = estagio_esperado
-        print(f"[AGENTE C] ✓ estagio_rag definido por validação de regras IRIS: {estagio_rag}")
+        logger.info("[AGENTE C] ✓ estagio_rag definido por validação de regras IRIS: %s", estagio_rag)
     else:
-        print(f"[AGENTE C] ✓ estagio_rag extraído do RAG: {estagio_rag}")
+        logger.info("[AGENTE C] ✓ estagio_rag extraído do RAG: %s", estagio_rag)
     
     # Construir mensagem detalhada
     resposta_texto = f"ANÁLISE CLÍNICA - DOENÇA RENAL CRÔNICA FELINA\n\n"
@@ -760,16 +854,16 @@ def gerar_recomendacao(
         }
     }
 
-    print(f"[AGENTE C]  Validação concluída - CASO {caso}, Estágio: {estagio_final}")
-    print(f"[AGENTE C]  ✓ estagio_rag FINAL = {estagio_rag}")
-    print(f"[AGENTE C]  ✓ estagio_b = {estagio_b}")
-    print(f"[AGENTE C]  ✓ estagio_esperado (regras) = {estagio_esperado}")
+    logger.info("[AGENTE C]  Validação concluída - CASO %s, Estágio: %s", caso, estagio_final)
+    logger.info("[AGENTE C]  ✓ estagio_rag FINAL = %s", estagio_rag)
+    logger.info("[AGENTE C]  ✓ estagio_b = %s", estagio_b)
+    logger.info("[AGENTE C]  ✓ estagio_esperado (regras) = %s", estagio_esperado)
     if subestagio_ap_b or subestagio_ht_b:
-        print(f"[AGENTE C] Subetágios: AP={subestagio_ap_b}, HT={subestagio_ht_b}")
-    print(f"[AGENTE C] Validação: {' ✓ Confirmada' if valida_b else ' Reprovada' if valida_b is False else ' Inconclusiva'}")
+        logger.info("[AGENTE C] Subetágios: AP=%s, HT=%s", subestagio_ap_b, subestagio_ht_b)
+    logger.info("[AGENTE C] Validação: %s", ' ✓ Confirmada' if valida_b else ' Reprovada' if valida_b is False else ' Inconclusiva')
     if inconsistencia:
         estagio_comparacao = estagio_rag if estagio_rag else (estagio_esperado if 'estagio_esperado' in locals() else 'N/A')
-        print(f"[AGENTE C]  Inconsistência: B={estagio_b} vs RAG/Regras={estagio_comparacao}")
+        logger.info("[AGENTE C]  Inconsistência: B=%s vs RAG/Regras=%s", estagio_b, estagio_comparacao)
 
     # Salvar validação no CSV se foi bem-sucedida
     if valida_b is not False and caso in [1, 2]:
@@ -783,7 +877,8 @@ def gerar_recomendacao(
 def agent_c_answer(
     resultado_b: Dict[str, Any],
     clinical_data: Dict[str, Any],
-    pergunta: Optional[str] = ""
+    pergunta: Optional[str] = "",
+    rag_result: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Interface pública do Agente C - VALIDADOR CIENTÍFICO
@@ -796,5 +891,6 @@ def agent_c_answer(
     return gerar_recomendacao(
         inference=resultado_b,
         clinical_data=clinical_data,
-        user_question=pergunta or ""
+        user_question=pergunta or "",
+        rag_result=rag_result
     )
\ No newline at end of file
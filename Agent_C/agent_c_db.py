@@ -1,20 +1,35 @@
 """
 Agent_C/agent_c_db.py - VERSÃO COMPLETA
 Funções para RAG: busca + indexação de PDFs
+
+Imports adiados: o caminho de consulta carrega apenas langchain_chroma e
+langchain_huggingface (na primeira busca); loaders, splitter e requests só
+são importados pelas funções de indexação.
 """
 
 import os
-import requests
+import time
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from .reranker import CrossEncoderReranker
+
+from .semantic_cache import SemanticCache
+from .vector_store import VectorStore, ChromaVectorStore, MmapVectorStore, exportar_mmap
+from .bm25_index import Bm25Index, ARQUIVO_BM25, construir_bm25, fundir_rrf
+from .reranker import RERANK_MODEL, reordenar
+from .context_packer import empacotar_contexto, estimar_tokens
+from log_config import get_logger, log_banner
 
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader, WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModel
-import torch
+logger = get_logger(__name__)
 
 
 # =====================================================================
@@ -22,185 +37,972 @@ import torch
 # =====================================================================
 CHROMA_PATH = "Agent_C/chroma_db"
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_DEVICE = os.environ.get("AGENTE_C_EMBED_DEVICE", "cpu")
+
+# Backend dos embeddings: "torch" (sentence-transformers), "onnx" ou
+# "onnx-int8" (onnxruntime, modelo exportado por Agent_C/onnx_embeddings.py)
+EMBED_BACKEND = os.environ.get("AGENTE_C_EMBED_BACKEND", "torch")
+
+# Módulos que o backend escolhido exige (verificados por agent_c sem importar)
+EMBED_DEPENDENCIAS = ("langchain_huggingface",) if EMBED_BACKEND == "torch" else ("onnxruntime", "tokenizers")
+
+# Armazenamento usado nas buscas: "chroma" ou "mmap" (cópia somente leitura
+# em <chroma_path>/mmap, gerada por exportar_indice_mmap; ver vector_store.py)
+VECTOR_STORE = os.environ.get("AGENTE_C_VECTOR_STORE", "chroma")
+MMAP_DIR = "mmap"
+
+# Busca híbrida: BM25 (bm25_index.npz, gerado na indexação) + vetorial,
+# fundidas por reciprocal rank fusion. Cada lado contribui com até
+# RAG_CANDIDATES chunks (mínimo k).
+RAG_HYBRID = os.environ.get("AGENTE_C_RAG_HYBRID", "1") != "0"
+RAG_CANDIDATES = int(os.environ.get("AGENTE_C_RAG_CANDIDATES", "20"))
+
+# Reranking (opcional): busca RAG_RERANK_CANDIDATES candidatos, pontua com
+# um cross-encoder (reranker.py) e monta o contexto pelos k melhores. Se a
+# pontuação não cabe em RAG_RERANK_BUDGET_MS, fica a ordem da busca. O
+# modelo é carregado no aquecimento do worker (carregar_reranker); sem
+# aquecimento (modo único, scripts), na primeira consulta.
+RAG_RERANK = os.environ.get("AGENTE_C_RAG_RERANK", "0") == "1"
+RAG_RERANK_CANDIDATES = int(os.environ.get("AGENTE_C_RAG_RERANK_CANDIDATES", "20"))
+RAG_RERANK_BUDGET_MS = float(os.environ.get("AGENTE_C_RAG_RERANK_BUDGET_MS", "150"))
+
+# Módulos exigidos pela busca com a configuração atual
+RAG_DEPENDENCIAS = (
+    "numpy",
+    "langchain_chroma" if VECTOR_STORE == "chroma" else "langchain_core",
+    *EMBED_DEPENDENCIAS,
+    *(("sentence_transformers",) if RAG_RERANK else ()),
+)
+
+# Perfis de embeddings: consulta (latência de uma query) e indexação
+# (vazão de muitos chunks). threads = threads intra-op (0 = padrão). No
+# onnxruntime valem por sessão; no torch valem para o processo inteiro, e
+# só o primeiro perfil carregado no processo as define (ver
+# _configurar_threads): cada perfil roda no seu processo (workers da API
+# para consulta, setup_rag.py para indexação). Medir com
+# Agent_C/benchmark_embeddings.py.
+EMBED_PERFIS = {
+    "consulta": {
+        "batch_size": int(os.environ.get("AGENTE_C_EMBED_BATCH_SIZE", "32")),
+        "threads": int(os.environ.get("AGENTE_C_EMBED_THREADS", "0")),
+    },
+    "indexacao": {
+        "batch_size": int(os.environ.get("AGENTE_C_INDEX_EMBED_BATCH_SIZE", "64")),
+        "threads": int(os.environ.get("AGENTE_C_INDEX_EMBED_THREADS", "0")),
+    },
+}
 
 # Configuração do text splitter
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 
+# Cache semântico de buscas (AGENTE_C_RAG_CACHE_SIZE=0 desativa)
+RAG_CACHE_SIZE = int(os.environ.get("AGENTE_C_RAG_CACHE_SIZE", "256"))
+RAG_CACHE_TTL = float(os.environ.get("AGENTE_C_RAG_CACHE_TTL", "3600"))
+RAG_CACHE_MAX_DISTANCE = float(os.environ.get("AGENTE_C_RAG_CACHE_MAX_DISTANCE", "0.05"))
+
+
+# =====================================================================
+# REGISTRO DE RECURSOS (um modelo de embeddings e um Chroma por processo)
+# =====================================================================
+_embeddings_cache: Dict[tuple, "HuggingFaceEmbeddings"] = {}
+_vectordb_cache: Dict[tuple, "Chroma"] = {}
+_mmap_cache: Dict[str, MmapVectorStore] = {}
+_bm25_cache: Dict[str, Optional[Bm25Index]] = {}
+_reranker_cache: Dict[tuple, "CrossEncoderReranker"] = {}
+_resources_lock = threading.Lock()
+# Lock próprio: a carga do cross-encoder (segundos) não bloqueia os demais recursos
+_reranker_lock = threading.Lock()
+# Carga já pedida (aquecimento ou primeira consulta); lock separado para
+# que a consulta que consulta a flag nunca espere a carga em andamento
+_reranker_carga_iniciada = False
+_reranker_flag_lock = threading.Lock()
+_rag_cache = SemanticCache(RAG_CACHE_SIZE, RAG_CACHE_TTL, RAG_CACHE_MAX_DISTANCE)
+
+
+def _resource_key(chroma_path: str, perfil: str = "consulta") -> tuple:
+    """Chave do registro: (caminho absoluto do Chroma, modelo, backend, device, perfil)"""
+    return (str(Path(chroma_path).resolve()), EMBED_MODEL, EMBED_BACKEND, EMBED_DEVICE, perfil)
+
+
+# (perfil, threads) aplicados ao torch neste processo
+_threads_torch: Optional[Tuple[str, int]] = None
+
+
+def _configurar_threads(perfil: str, threads: int):
+    """
+    Define as threads intra-op do torch para o perfil (0 = manter o padrão)
+    
+    torch.set_num_threads vale para o processo inteiro: o primeiro perfil
+    carregado define as threads, e um perfil carregado depois com outro
+    valor não as altera (os dois perfis disputariam o mesmo ajuste).
+    """
+    global _threads_torch
+    if threads <= 0:
+        return
+    if _threads_torch is None:
+        import torch
+        torch.set_num_threads(threads)
+        _threads_torch = (perfil, threads)
+    elif _threads_torch[1] != threads:
+        logger.warning("[RAG] Threads do torch já definidas pelo perfil %s (%s); perfil %s (%s) usa as mesmas. "
+                       "Rode cada perfil em um processo próprio", _threads_torch[0], _threads_torch[1], perfil, threads)
+
+
+def _get_embeddings(perfil: str = "consulta"):
+    """
+    Retorna a função de embeddings do perfil (criada uma vez por processo)
+    
+    Args:
+        perfil: "consulta" ou "indexacao" (ver EMBED_PERFIS)
+    """
+    key = (EMBED_MODEL, EMBED_BACKEND, EMBED_DEVICE, perfil)
+    embeddings = _embeddings_cache.get(key)
+    if embeddings is None:
+        with _resources_lock:
+            embeddings = _embeddings_cache.get(key)
+            if embeddings is None:
+                config = EMBED_PERFIS[perfil]
+                if EMBED_BACKEND in ("onnx", "onnx-int8"):
+                    from .onnx_embeddings import OnnxEmbeddings
+                    embeddings = OnnxEmbeddings(
+                        quantizado=(EMBED_BACKEND == "onnx-int8"),
+                        batch_size=config["batch_size"],
+                        threads=config["threads"]
+                    )
+                    if embeddings.modelo != EMBED_MODEL:
+                        raise ValueError(f"Modelo ONNX exportado de {embeddings.modelo}, esperado {EMBED_MODEL}")
+                elif EMBED_BACKEND == "torch":
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    _configurar_threads(perfil, config["threads"])
+                    embeddings = HuggingFaceEmbeddings(
+                        model_name=EMBED_MODEL,
+                        model_kwargs={'device': EMBED_DEVICE},
+                        encode_kwargs={'normalize_embeddings': True, 'batch_size': config["batch_size"]}
+                    )
+                else:
+                    raise ValueError(f"AGENTE_C_EMBED_BACKEND inválido: {EMBED_BACKEND}")
+                _embeddings_cache[key] = embeddings
+    return embeddings
+
+
+def _get_vectordb(chroma_path: str, perfil: str = "consulta") -> "Chroma":
+    """Retorna o Chroma aberto para chroma_path (aberto uma vez por processo e perfil)"""
+    key = _resource_key(chroma_path, perfil)
+    vectordb = _vectordb_cache.get(key)
+    if vectordb is None:
+        embeddings = _get_embeddings(perfil)
+        with _resources_lock:
+            vectordb = _vectordb_cache.get(key)
+            if vectordb is None:
+                from langchain_chroma import Chroma
+                vectordb = Chroma(persist_directory=chroma_path, embedding_function=embeddings)
+                _vectordb_cache[key] = vectordb
+    return vectordb
+
+
+def _get_store(chroma_path: str) -> VectorStore:
+    """Armazenamento de busca configurado (VECTOR_STORE) para chroma_path"""
+    if VECTOR_STORE == "chroma":
+        return ChromaVectorStore(_get_vectordb(chroma_path), _manifest_path(chroma_path))
+    if VECTOR_STORE != "mmap":
+        raise ValueError(f"AGENTE_C_VECTOR_STORE inválido: {VECTOR_STORE}")
+    
+    key = _resource_key(chroma_path)[0]
+    store = _mmap_cache.get(key)
+    if store is None or store.desatualizado():
+        with _resources_lock:
+            store = _mmap_cache.get(key)
+            if store is None or store.desatualizado():
+                store = MmapVectorStore(str(Path(chroma_path) / MMAP_DIR))
+                _mmap_cache[key] = store
+                logger.info("[RAG] 🗺️ Índice mmap aberto: %s chunks", len(store))
+    return store
+
+
+def _get_bm25(chroma_path: str) -> Optional[Bm25Index]:
+    """Índice BM25 do banco (reaberto se regravado), ou None se não existir"""
+    key = _resource_key(chroma_path)[0]
+    caminho = Path(chroma_path) / ARQUIVO_BM25
+    if key in _bm25_cache:
+        indice = _bm25_cache[key]
+        if indice is None and not caminho.exists():
+            return None
+        if indice is not None and not indice.desatualizado():
+            return indice
+    
+    with _resources_lock:
+        if caminho.exists():
+            indice = Bm25Index(str(caminho))
+            logger.info("[RAG] 🔤 Índice BM25 aberto: %s chunks", len(indice))
+        else:
+            indice = None
+            logger.warning("[RAG] Índice BM25 ausente em %s: busca só vetorial (rode setup_rag.py --bm25)", chroma_path)
+        _bm25_cache[key] = indice
+    return indice
+
+
+def _get_reranker() -> "CrossEncoderReranker":
+    """Cross-encoder de reranking (carregado uma vez por processo)"""
+    key = (RERANK_MODEL, EMBED_DEVICE)
+    reranker = _reranker_cache.get(key)
+    if reranker is None:
+        with _reranker_lock:
+            reranker = _reranker_cache.get(key)
+            if reranker is None:
+                from .reranker import CrossEncoderReranker
+                reranker = CrossEncoderReranker(RERANK_MODEL, device=EMBED_DEVICE)
+                _reranker_cache[key] = reranker
+    return reranker
+
+
+def carregar_reranker() -> Optional["CrossEncoderReranker"]:
+    """
+    Carrega e aquece o cross-encoder se o reranking está ativo
+    
+    Chamado no aquecimento do worker (run_lg_api.py), antes da primeira
+    consulta.
+    
+    Returns:
+        O reranker, ou None com RAG_RERANK desativado
+    """
+    global _reranker_carga_iniciada
+    if not RAG_RERANK:
+        return None
+    with _reranker_flag_lock:
+        _reranker_carga_iniciada = True
+    return _get_reranker()
+
+
+def _reranker_pronto() -> Optional["CrossEncoderReranker"]:
+    """
+    Cross-encoder carregado, ou None
+    
+    Sem aquecimento (modo único do run_lg_api.py, scripts que chamam
+    rag_search direto), a primeira consulta carrega o modelo, uma única vez
+    por processo. Depois do aquecimento a consulta nunca espera: se a carga
+    falhou ou outra consulta ainda está carregando, fica a ordem da busca.
+    """
+    global _reranker_carga_iniciada
+    reranker = _reranker_cache.get((RERANK_MODEL, EMBED_DEVICE))
+    if reranker is not None:
+        return reranker
+    
+    with _reranker_flag_lock:
+        primeira = not _reranker_carga_iniciada
+        _reranker_carga_iniciada = True
+    if not primeira:
+        return None
+    
+    logger.info("[RAG] Cross-encoder não pré-carregado, carregando na primeira consulta: %s", RERANK_MODEL)
+    try:
+        return _get_reranker()
+    except Exception as e:
+        logger.warning("[RAG] Falha ao carregar o cross-encoder %s: %s", RERANK_MODEL, e)
+        return None
+
+
+def _reranquear(query: str, docs: List, k: int) -> Tuple[List, bool]:
+    """
+    Os k melhores candidatos segundo o cross-encoder
+    
+    Returns:
+        (docs, reranqueado); sem reranking (modelo indisponível, orçamento
+        insuficiente ou erro do modelo), os k primeiros na ordem da busca e
+        False
+    """
+    if len(docs) <= 1:
+        return docs[:k], False
+    
+    reranker = _reranker_pronto()
+    if reranker is None:
+        logger.info("[RAG] Cross-encoder indisponível, mantendo a ordem da busca")
+        return docs[:k], False
+    
+    try:
+        escores = reranker.pontuar(
+            query, [getattr(doc, "page_content", "") or "" for doc in docs], RAG_RERANK_BUDGET_MS / 1000
+        )
+    except Exception as e:
+        logger.warning("[RAG] Reranking indisponível, mantendo a ordem da busca: %s", e)
+        return docs[:k], False
+    
+    if escores is None:
+        return docs[:k], False
+    return reordenar(docs, escores)[:k], True
+
+
+def invalidate_vectordb(chroma_path: str = None):
+    """
+    Descarta o Chroma em cache após alteração da coleção
+    
+    Args:
+        chroma_path: Banco a invalidar (None = todos)
+    """
+    with _resources_lock:
+        if chroma_path is None:
+            _vectordb_cache.clear()
+            _mmap_cache.clear()
+            _bm25_cache.clear()
+        else:
+            for perfil in EMBED_PERFIS:
+                _vectordb_cache.pop(_resource_key(chroma_path, perfil), None)
+            _mmap_cache.pop(_resource_key(chroma_path)[0], None)
+            _bm25_cache.pop(_resource_key(chroma_path)[0], None)
+    
+    # Resultados antigos podem citar chunks que mudaram
+    _rag_cache.clear()
+
+
+def rag_cache_stats() -> Dict[str, Any]:
+    """Contadores do cache semântico de buscas deste processo"""
+    return _rag_cache.stats()
+
 
 # =====================================================================
 # FUNÇÃO DE BUSCA (já existente, corrigida)
 # =====================================================================
-def rag_search(chroma_path: str, query: str, k: int = 8, max_context_length_chars: int = 3000):
+def rag_search(
+    chroma_path: str,
+    query: str,
+    k: int = 8,
+    max_context_length_chars: int = 3000,
+    max_context_tokens: int = None,
+    particao: Optional[Tuple] = None
+):
     """
     Busca documentos relevantes no banco Chroma e retorna um contexto limitado.
     
+    O contexto é montado com sentenças inteiras dos docs mais relevantes,
+    sem os trechos repetidos pela sobreposição dos chunks (context_packer.py).
+    
     Args:
         chroma_path: Caminho para o banco Chroma
         query: Query de busca
         k: Número máximo de docs a recuperar
         max_context_length_chars: Limite de chars do contexto combinado
+            (usado quando max_context_tokens não é informado)
+        max_context_tokens: Limite em tokens do LLM
+        particao: Partição do cache semântico (ex.: estágio e subestágios
+            IRIS do paciente, agent_c.particao_cache_rag)
+    
+    Queries com embedding próximo (distância de cosseno até
+    RAG_CACHE_MAX_DISTANCE) de uma query anterior da mesma partição
+    reutilizam o resultado. Queries que diferem só nos valores de creatinina
+    e SDMA ficam a essa distância; sem a partição, um paciente em estágio 4
+    receberia o contexto buscado para um em estágio 2.
     
     Returns:
-        Dict com context, docs, context_length, docs_used
+        Dict com context, docs, context_length, context_tokens, docs_used,
+        reranked, cache_hit
     """
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBED_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True, 'batch_size': 32}
+    # Embedding calculado uma vez: serve para o cache e para a busca
+    query_embedding = _get_embeddings().embed_query(query)
+    return _rag_search_by_vector(
+        chroma_path, query_embedding, k, max_context_length_chars, query=query,
+        max_context_tokens=max_context_tokens, particao=particao
     )
 
-    vectordb = Chroma(persist_directory=chroma_path, embedding_function=embeddings)
 
-    # Recupera top-k documentos
-    docs = vectordb.similarity_search(query, k=k)
+def rag_search_batch(
+    chroma_path: str,
+    queries: List[str],
+    k: int = 8,
+    max_context_length_chars: int = 3000,
+    max_context_tokens: int = None,
+    particoes: Optional[List[Optional[Tuple]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Versão em lote de rag_search: todas as queries são codificadas em uma
+    única chamada embed_documents (o modelo processa em batches).
+    
+    Queries repetidas são codificadas uma vez só (e buscadas uma vez por
+    partição).
+    
+    Args:
+        chroma_path: Caminho para o banco Chroma
+        queries: Lista de queries de busca
+        k: Número máximo de docs a recuperar por query
+        max_context_length_chars: Limite de chars do contexto de cada query
+        max_context_tokens: Limite em tokens do LLM (tem precedência)
+        particoes: Partição do cache semântico de cada query (ver rag_search)
+    
+    Returns:
+        Lista de resultados (mesmo formato de rag_search), na ordem de queries
+    """
+    unicas = list(dict.fromkeys(queries))
+    if not unicas:
+        return []
+    
+    logger.info("[RAG] 📦 Codificando %s queries em lote (%s pedidas)", len(unicas), len(queries))
+    embeddings = dict(zip(unicas, _get_embeddings().embed_documents(unicas)))
+    
+    pedidos = list(zip(queries, particoes or [None] * len(queries)))
+    por_pedido = {
+        (query, particao): _rag_search_by_vector(
+            chroma_path, embeddings[query], k, max_context_length_chars, query=query,
+            max_context_tokens=max_context_tokens, particao=particao
+        )
+        for query, particao in dict.fromkeys(pedidos)
+    }
+    return [por_pedido[pedido] for pedido in pedidos]
 
-    # Ordena docs por tamanho ascendente
-    docs_sorted = sorted(docs, key=lambda d: len(getattr(d, "page_content", "") or ""))
 
-    context_parts = []
-    total_len = 0
-    docs_used = 0
+def _buscar_hibrido(store: VectorStore, bm25: Bm25Index, query: str, query_embedding, k: int) -> List:
+    """Top-k por reciprocal rank fusion dos rankings vetorial e BM25"""
+    candidatos = max(k, RAG_CANDIDATES)
+    vetoriais = store.similarity_search_by_vector(query_embedding, k=candidatos)
+    por_id = {doc.metadata.get("chunk_id"): doc for doc in vetoriais}
+    if None in por_id:
+        # Chunks sem id de conteúdo não podem ser fundidos
+        return vetoriais[:k]
+    
+    lexicais = [chunk_id for chunk_id, _ in bm25.buscar(query, candidatos)]
+    fundidos = fundir_rrf([doc.metadata["chunk_id"] for doc in vetoriais], lexicais)[:k]
+    
+    faltando = [chunk_id for chunk_id in fundidos if chunk_id not in por_id]
+    por_id.update((doc.metadata.get("chunk_id"), doc) for doc in store.get_by_ids(faltando))
+    
+    logger.info("[RAG] 🔀 Busca híbrida: %s vetoriais, %s BM25, %s só lexicais no top-%s",
+                len(vetoriais), len(lexicais), len(faltando), k)
+    return [por_id[chunk_id] for chunk_id in fundidos if chunk_id in por_id]
 
-    for doc in docs_sorted:
-        content = getattr(doc, "page_content", "") or ""
-        content_len = len(content)
 
-        if total_len + content_len > max_context_length_chars:
-            remaining = max_context_length_chars - total_len
-            if remaining > 50:
-                context_parts.append(content[:remaining].rsplit("\n", 1)[0] + "\n... [TRUNCADO]")
-                docs_used += 1
-            break
+def _rag_search_by_vector(
+    chroma_path: str,
+    query_embedding,
+    k: int,
+    max_context_length_chars: int,
+    query: str = None,
+    max_context_tokens: int = None,
+    particao: Optional[Tuple] = None
+):
+    """
+    Busca a partir do embedding da query (cache semântico + armazenamento + contexto)
+    
+    Com o texto da query e RAG_HYBRID ativo, funde a busca vetorial com o BM25;
+    com RAG_RERANK ativo, reordena os candidatos com o cross-encoder. O
+    contexto é montado na ordem de relevância final.
+    """
+    store = _get_store(chroma_path)
+    bm25 = _get_bm25(chroma_path) if (RAG_HYBRID and query) else None
+    rerank = RAG_RERANK and bool(query)
 
-        context_parts.append(content)
-        total_len += content_len
-        docs_used += 1
+    # A versão dos dados no disco invalida resultados de um índice alterado;
+    # a partição separa pacientes em estágios diferentes
+    namespace = (
+        _resource_key(chroma_path), VECTOR_STORE, store.versao(),
+        bm25.versao() if bm25 else 0, rerank, k, max_context_length_chars, max_context_tokens, particao
+    )
 
-    context = "\n\n".join(context_parts)
+    cached = _rag_cache.get(namespace, query_embedding)
+    if cached is not None:
+        logger.info("[RAG] ♻️ Resultado em cache (docs: %s, chars: %s)", cached['docs_used'], cached['context_length'])
+        cached["cache_hit"] = True
+        return cached
 
-    print(f"[RAG] 📊 Documentos recuperados (raw): {len(docs)}")
-    print(f"[RAG] 📄 Documentos incluídos no contexto: {docs_used}")
-    print(f"[RAG] 📏 Tamanho do contexto final (chars): {len(context)}")
+    # Recupera os candidatos (mais que k se houver reranking), em ordem de relevância
+    candidatos = max(k, RAG_RERANK_CANDIDATES) if rerank else k
+    if bm25 is not None:
+        docs = _buscar_hibrido(store, bm25, query, query_embedding, candidatos)
+    else:
+        docs = store.similarity_search_by_vector(query_embedding, k=candidatos)
 
-    return {
+    reranked = False
+    if rerank:
+        inicio = time.perf_counter()
+        docs, reranked = _reranquear(query, docs, k)
+        logger.info("[RAG] 🎯 Reranking de %s candidatos: %s (%.0f ms)", candidatos,
+                    "aplicado" if reranked else "ordem da busca mantida", (time.perf_counter() - inicio) * 1000)
+
+    # Sentenças inteiras, na ordem de relevância, até o limite de tokens (ou chars)
+    if max_context_tokens:
+        pacote = empacotar_contexto(docs, max_context_tokens, CHUNK_OVERLAP)
+    else:
+        pacote = empacotar_contexto(docs, max_context_length_chars, CHUNK_OVERLAP, medir=lambda textos: [len(t) for t in textos])
+    context = pacote["context"]
+    # Limite em chars: o contexto não foi tokenizado, a contagem é estimada
+    context_tokens = pacote["size"] if max_context_tokens else estimar_tokens(context)
+
+    logger.info("[RAG] 📊 Documentos recuperados (raw): %s", len(docs))
+    logger.info("[RAG] 📄 Documentos incluídos no contexto: %s (%s sentenças, %s repetidas descartadas)",
+                pacote["docs_used"], pacote["sentences"], pacote["duplicate_sentences"])
+    logger.info("[RAG] 📏 Tamanho do contexto final: %s chars, %s tokens", len(context), context_tokens)
+
+    result = {
         "context": context,
         "docs": docs,
         "context_length": len(context),
-        "docs_used": docs_used, 
+        "context_tokens": context_tokens,
+        "docs_used": pacote["docs_used"], 
+        "reranked": reranked,
     }
+    # Resultado sem o reranking pedido (orçamento estourado) não vai para o
+    # cache: a próxima query parecida tenta de novo
+    if reranked or not rerank:
+        _rag_cache.put(namespace, query_embedding, result)
+
+    return {**result, "cache_hit": False}
 
 
 # =====================================================================
-# FUNÇÕES DE INDEXAÇÃO (NOVAS)
+# FUNÇÕES DE INDEXAÇÃO (INCREMENTAIS)
 # =====================================================================
+# Cada chunk tem id derivado do conteúdo (fonte + página + texto), e o
+# manifest (index_manifest.json, dentro do diretório do Chroma) guarda
+# mtime/tamanho e ids de cada fonte indexada. Reindexar só carrega arquivos
+# alterados e só calcula embeddings de chunks que ainda não estão no banco;
+# chunks de páginas alteradas ou arquivos removidos são apagados. A
+# revisão do manifest muda a cada sincronização que altera a coleção e é a
+# versão do Chroma vista pelos caches de busca (ChromaVectorStore.versao).
+
+MANIFEST_NAME = "index_manifest.json"
+MANIFEST_VERSION = 1
 
-def _get_embeddings():
-    """Retorna a função de embeddings configurada"""
-    return HuggingFaceEmbeddings(
-        model_name=EMBED_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True, 'batch_size': 32}
+# Limite de documentos por chamada ao Chroma (add/delete)
+INDEX_BATCH_SIZE = 1000
+
+# Processos que extraem texto e dividem os PDFs (0 = no próprio processo)
+INDEX_WORKERS = int(os.environ.get("AGENTE_C_INDEX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# PDFs processados ou aguardando gravação por worker (back-pressure: a
+# leitura não se adianta mais que isso em relação aos embeddings)
+INDEX_MAX_PENDENTES_POR_WORKER = 2
+
+# Extrator de texto dos PDFs (entra na configuração do manifest)
+PDF_EXTRATOR = "pypdfium2"
+
+
+def _chunk_id(source: str, page: Any, text: str) -> str:
+    """Id estável do chunk: SHA-256 de fonte, página e texto"""
+    digest = hashlib.sha256()
+    for parte in (str(source), str(page), text):
+        digest.update(parte.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+
+def _atribuir_ids(chunks: List, source: str) -> Tuple[List, List[str]]:
+    """
+    Atribui ids de conteúdo aos chunks de uma fonte, descartando repetidos
+    
+    Returns:
+        (chunks únicos, ids na mesma ordem)
+    """
+    unicos, ids, vistos = [], [], set()
+    for chunk in chunks:
+        chunk_id = _chunk_id(source, chunk.metadata.get("page", 0), chunk.page_content)
+        if chunk_id in vistos:
+            continue
+        vistos.add(chunk_id)
+        chunk.metadata["chunk_id"] = chunk_id
+        unicos.append(chunk)
+        ids.append(chunk_id)
+    return unicos, ids
+
+
+def _configuracao_indice() -> Dict[str, Any]:
+    """Parâmetros que, se mudarem, invalidam todos os embeddings gravados"""
+    return {
+        "embed_model": EMBED_MODEL,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "pdf_extrator": PDF_EXTRATOR,
+    }
+
+
+def _manifest_path(chroma_path: str) -> Path:
+    return Path(chroma_path) / MANIFEST_NAME
+
+
+def _ler_manifest(chroma_path: str) -> Optional[Dict[str, Any]]:
+    """Manifest gravado, ou None se ausente ou ilegível"""
+    caminho = _manifest_path(chroma_path)
+    if not caminho.exists():
+        return None
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("[INDEXAÇÃO] Manifest ilegível: %s", e)
+        return None
+
+
+def _proxima_revisao(revisao: int) -> int:
+    """
+    Revisão seguinte do índice
+    
+    Nunca menor que o relógio: um banco apagado e reindexado (manifest novo)
+    não repete a revisão de um índice anterior ainda em algum cache.
+    """
+    return max(int(revisao or 0) + 1, time.time_ns())
+
+
+def _salvar_manifest(chroma_path: str, manifest: Dict[str, Any]):
+    """
+    Grava o manifest de forma atômica (arquivo temporário + replace)
+    
+    A revisão é incrementada quando o conteúdo mudou em relação ao manifest
+    gravado, e vai como primeira chave (ChromaVectorStore.versao lê só o
+    começo do arquivo).
+    """
+    gravado = _ler_manifest(chroma_path)
+    sem_revisao = {chave: valor for chave, valor in manifest.items() if chave != "revisao"}
+    if gravado is None or sem_revisao != {chave: valor for chave, valor in gravado.items() if chave != "revisao"}:
+        manifest["revisao"] = _proxima_revisao(max(manifest.get("revisao", 0), (gravado or {}).get("revisao", 0)))
+    
+    caminho = _manifest_path(chroma_path)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix(".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"revisao": manifest.get("revisao", 0), **sem_revisao}, f, ensure_ascii=False, indent=1)
+    os.replace(temporario, caminho)
+
+
+def _em_lotes(itens: List, tamanho: int = INDEX_BATCH_SIZE):
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def _abrir_indice(chroma_path: str):
+    """
+    Abre o banco e o manifest para indexação incremental
+    
+    Um banco sem manifest (indexado antes dos ids de conteúdo) ou gravado
+    com outro modelo/chunking é esvaziado: seus chunks não podem ser
+    reconciliados e seriam duplicados.
+    
+    Returns:
+        (vectordb, manifest)
+    """
+    vectordb = _get_vectordb(chroma_path, perfil="indexacao")
+    
+    manifest = _ler_manifest(chroma_path)
+    
+    valido = (
+        manifest is not None
+        and manifest.get("versao") == MANIFEST_VERSION
+        and manifest.get("configuracao") == _configuracao_indice()
     )
+    if not valido:
+        existentes = vectordb.get(include=[])["ids"]
+        if existentes:
+            logger.warning(
+                "[INDEXAÇÃO] ⚠️ Índice sem manifest ou com outra configuração: removendo %s chunks antigos",
+                len(existentes)
+            )
+            for lote in _em_lotes(existentes):
+                vectordb.delete(ids=lote)
+        revisao = (manifest or {}).get("revisao", 0)
+        manifest = {"versao": MANIFEST_VERSION, "configuracao": _configuracao_indice(), "fontes": {}, "revisao": revisao}
+    
+    return vectordb, manifest
 
 
-def _split_documents(documents: List) -> List:
+def _sincronizar_fonte(vectordb, manifest: Dict[str, Any], source: str, chunks: List, info: Dict[str, Any]) -> Dict[str, int]:
     """
-    Divide documentos em chunks menores
+    Deixa no banco exatamente os chunks atuais de uma fonte
     
-    Args:
-        documents: Lista de documentos do LangChain
+    Só os chunks cujo id ainda não está no banco são enviados ao modelo
+    de embeddings; ids antigos da fonte que não aparecem mais são apagados.
     
     Returns:
-        Lista de chunks
+        {"novos": n, "removidos": n, "total": n}
     """
-    text_splitter = RecursiveCharacterTextSplitter(
+    chunks, ids = _atribuir_ids(chunks, source)
+    
+    presentes = set()
+    for lote in _em_lotes(ids):
+        presentes.update(vectordb.get(ids=lote, include=[])["ids"])
+    
+    novos = [(chunk, chunk_id) for chunk, chunk_id in zip(chunks, ids) if chunk_id not in presentes]
+    for lote in _em_lotes(novos):
+        vectordb.add_documents([chunk for chunk, _ in lote], ids=[chunk_id for _, chunk_id in lote])
+    
+    anteriores = manifest["fontes"].get(source, {}).get("chunk_ids", [])
+    atuais = set(ids)
+    removidos = [chunk_id for chunk_id in anteriores if chunk_id not in atuais]
+    for lote in _em_lotes(removidos):
+        vectordb.delete(ids=lote)
+    
+    manifest["fontes"][source] = {**info, "chunk_ids": ids}
+    return {"novos": len(novos), "removidos": len(removidos), "total": len(ids)}
+
+
+def _remover_fonte(vectordb, manifest: Dict[str, Any], source: str) -> int:
+    """Apaga do banco os chunks de uma fonte que deixou de existir"""
+    ids = manifest["fontes"].pop(source, {}).get("chunk_ids", [])
+    for lote in _em_lotes(ids):
+        vectordb.delete(ids=lote)
+    return len(ids)
+
+
+def _novo_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE,
         chunk_overlap=CHUNK_OVERLAP,
         length_function=len,
         separators=["\n\n", "\n", ". ", " ", ""]
     )
+
+
+_splitter_processo = None
+
+
+def _extrair_pdf(caminho: str) -> Dict[str, Any]:
+    """
+    Extrai o texto de um PDF (pypdfium2) e o divide em chunks
+    
+    Roda nos processos do pool de indexação: devolve só tuplas de texto
+    (baratas de serializar), uma página por vez em memória.
+    
+    Returns:
+        {"paginas": n, "chunks": [(página, texto), ...]}
+    """
+    global _splitter_processo
+    import pypdfium2 as pdfium
+
+    if _splitter_processo is None:
+        _splitter_processo = _novo_splitter()
+
+    chunks = []
+    pdf = pdfium.PdfDocument(caminho)
+    try:
+        paginas = len(pdf)
+        for numero in range(paginas):
+            pagina = pdf[numero]
+            textpage = pagina.get_textpage()
+            try:
+                texto = textpage.get_text_range()
+            finally:
+                textpage.close()
+                pagina.close()
+            chunks.extend((numero, trecho) for trecho in _splitter_processo.split_text(texto))
+    finally:
+        pdf.close()
+
+    return {"paginas": paginas, "chunks": chunks}
+
+
+def _chunks_para_documentos(source: str, chunks: List[Tuple[int, str]]) -> List:
+    """Converte as tuplas de _extrair_pdf em Documents (metadados de PyPDFLoader)"""
+    from langchain_core.documents import Document
+
+    return [
+        Document(page_content=texto, metadata={"source": source, "page": pagina})
+        for pagina, texto in chunks
+    ]
+
+
+def _processar_pdfs(pendentes: List[Tuple[str, Dict[str, Any]]], workers: int):
+    """
+    Extrai os PDFs em paralelo e os entrega conforme ficam prontos
+    
+    No máximo workers * INDEX_MAX_PENDENTES_POR_WORKER PDFs ficam em
+    processamento ou aguardando o consumidor; um novo só é submetido quando
+    o consumidor recebe um resultado, de modo que a memória não cresce com
+    o tamanho do acervo.
+    
+    Yields:
+        (source, info, resultado de _extrair_pdf ou None, erro ou None)
+    """
+    if workers <= 1 or len(pendentes) <= 1:
+        for source, info in pendentes:
+            try:
+                yield source, info, _extrair_pdf(source), None
+            except Exception as e:
+                yield source, info, None, e
+        return
+
+    # spawn: o processo pai já pode ter torch/Chroma carregados (fork inseguro)
+    contexto = multiprocessing.get_context("spawn")
+    limite = workers * INDEX_MAX_PENDENTES_POR_WORKER
+    fila = iter(pendentes)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as pool:
+        em_voo = {}
+
+        def _submeter():
+            for source, info in fila:
+                em_voo[pool.submit(_extrair_pdf, source)] = (source, info)
+                if len(em_voo) >= limite:
+                    break
+
+        _submeter()
+        while em_voo:
+            prontos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                source, info = em_voo.pop(futuro)
+                erro = futuro.exception()
+                yield source, info, (None if erro else futuro.result()), erro
+            _submeter()
+
+
+def _reconstruir_bm25(vectordb, chroma_path: str) -> Dict[str, int]:
+    """Reconstrói bm25_index.npz a partir de todos os chunks da coleção"""
+    ids, textos = [], []
+    inicio = 0
+    while True:
+        dados = vectordb.get(include=["documents"], limit=INDEX_BATCH_SIZE, offset=inicio)
+        if not dados["ids"]:
+            break
+        ids.extend(dados["ids"])
+        textos.extend(dados["documents"])
+        inicio += len(dados["ids"])
+    
+    termos = construir_bm25(ids, textos, str(Path(chroma_path) / ARQUIVO_BM25))
+    logger.info("[INDEXAÇÃO] 🔤 Índice BM25: %s chunks, %s termos", len(ids), termos)
+    return {"bm25_chunks": len(ids), "bm25_terms": termos}
+
+
+def _finalizar_indexacao(vectordb, manifest: Dict[str, Any], chroma_path: str):
+    """Grava o manifest, reconstrói o BM25 e invalida os recursos em cache"""
+    try:
+        _salvar_manifest(chroma_path, manifest)
+        _reconstruir_bm25(vectordb, chroma_path)
+    except Exception as e:
+        logger.warning("[INDEXAÇÃO] ⚠️ Falha ao atualizar o índice BM25: %s", e)
+    finally:
+        invalidate_vectordb(chroma_path)
+
+
+def _split_documents(documents: List) -> List:
+    """
+    Divide documentos em chunks menores
+    
+    Args:
+        documents: Lista de documentos do LangChain
     
-    chunks = text_splitter.split_documents(documents)
-    print(f"[INDEXAÇÃO] 📄 {len(documents)} documentos → {len(chunks)} chunks")
+    Returns:
+        Lista de chunks
+    """
+    chunks = _novo_splitter().split_documents(documents)
+    logger.info("[INDEXAÇÃO] 📄 %s documentos → %s chunks", len(documents), len(chunks))
     
     return chunks
 
 
-def index_local_folder(folder_path: str, chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
+def index_local_folder(folder_path: str, chroma_path: str = CHROMA_PATH, workers: int = None) -> Dict[str, Any]:
     """
-    Indexa todos os PDFs de uma pasta local
+    Indexa (incrementalmente) todos os PDFs de uma pasta local
+    
+    PDFs com mtime e tamanho iguais aos do manifest não são abertos. Os
+    alterados são extraídos e divididos em paralelo (pool de processos,
+    pypdfium2) e gravados no Chroma à medida que ficam prontos, com no
+    máximo alguns PDFs em memória por vez; só os chunks novos recebem
+    embeddings. PDFs removidos da pasta têm seus chunks apagados.
     
     Args:
         folder_path: Caminho para a pasta com PDFs
         chroma_path: Caminho para salvar o banco Chroma
+        workers: Processos de extração (padrão: AGENTE_C_INDEX_WORKERS)
     
     Returns:
-        Dict com status da indexação
+        Dict com status da indexação (inclui tempo e vazão)
     """
-    print("\n" + "="*70)
-    print("[INDEXAÇÃO] 📂 Indexando PDFs locais...")
-    print("="*70)
+    log_banner(logger, "[INDEXAÇÃO] 📂 Indexando PDFs locais...")
     
     folder = Path(folder_path)
     
     if not folder.exists():
         return {"error": f"Pasta não encontrada: {folder_path}"}
     
-    # Carregar PDFs
-    try:
-        loader = DirectoryLoader(
-            str(folder),
-            glob="**/*.pdf",
-            loader_cls=PyPDFLoader,
-            show_progress=True
-        )
-        
-        print(f"[INDEXAÇÃO] 🔍 Carregando PDFs de: {folder}")
-        documents = loader.load()
-        
-        if not documents:
-            return {"error": "Nenhum PDF encontrado na pasta"}
-        
-        print(f"[INDEXAÇÃO] ✅ {len(documents)} páginas carregadas")
-        
-    except Exception as e:
-        return {"error": f"Erro ao carregar PDFs: {e}"}
+    pdfs = sorted(folder.glob("**/*.pdf"))
+    if not pdfs:
+        return {"error": "Nenhum PDF encontrado na pasta"}
     
-    # Dividir em chunks
     try:
-        chunks = _split_documents(documents)
+        vectordb, manifest = _abrir_indice(chroma_path)
     except Exception as e:
-        return {"error": f"Erro ao dividir documentos: {e}"}
+        return {"error": f"Erro ao abrir banco vetorial: {e}"}
     
-    # Criar banco vetorial
+    workers = INDEX_WORKERS if workers is None else workers
+    pasta = folder.as_posix()
+    totais = {"novos": 0, "removidos": 0}
+    paginas = 0
+    chunks_lidos = 0
+    falhas = []
+    
+    # Só PDFs novos ou alterados vão para a extração
+    pendentes = []
+    for pdf in pdfs:
+        stat = pdf.stat()
+        info = {"tipo": "arquivo", "pasta": pasta, "mtime": stat.st_mtime, "size": stat.st_size}
+        anterior = manifest["fontes"].get(pdf.as_posix())
+        if anterior and anterior.get("mtime") == info["mtime"] and anterior.get("size") == info["size"]:
+            continue
+        pendentes.append((pdf.as_posix(), info))
+    inalterados = len(pdfs) - len(pendentes)
+    
+    logger.info(
+        "[INDEXAÇÃO] 🔍 %s PDFs a processar, %s inalterados (%s workers)",
+        len(pendentes), inalterados, max(workers, 1)
+    )
+    
+    inicio = time.perf_counter()
     try:
-        print(f"[INDEXAÇÃO] 🧠 Criando embeddings...")
-        embeddings = _get_embeddings()
-        
-        vectordb = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            persist_directory=chroma_path
-        )
-        
-        print(f"[INDEXAÇÃO] 💾 Banco salvo em: {chroma_path}")
-        print(f"[INDEXAÇÃO] ✅ {len(chunks)} chunks indexados com sucesso!")
-        
-        return {
-            "indexed_chunks": len(chunks),
-            "source_documents": len(documents),
-            "chroma_path": chroma_path
-        }
+        for n, (source, info, extraido, erro) in enumerate(_processar_pdfs(pendentes, workers), 1):
+            if erro is not None:
+                # Fica fora do manifest: será tentado de novo na próxima indexação
+                falhas.append(source)
+                logger.warning("[INDEXAÇÃO] ⚠️ [%s/%s] Falha ao ler %s: %s", n, len(pendentes), source, erro)
+                continue
+            
+            documentos = _chunks_para_documentos(source, extraido["chunks"])
+            resultado = _sincronizar_fonte(vectordb, manifest, source, documentos, info)
+            totais["novos"] += resultado["novos"]
+            totais["removidos"] += resultado["removidos"]
+            paginas += extraido["paginas"]
+            chunks_lidos += len(documentos)
+            
+            decorrido = time.perf_counter() - inicio
+            logger.info(
+                "[INDEXAÇÃO] ✅ [%s/%s] %s: %s páginas, %s chunks novos, %s removidos (%.1f páginas/s, %.1f chunks/s)",
+                n, len(pendentes), Path(source).name, extraido["paginas"], resultado["novos"],
+                resultado["removidos"], paginas / decorrido, chunks_lidos / decorrido
+            )
         
+        # PDFs que saíram da pasta
+        atuais = {pdf.as_posix() for pdf in pdfs}
+        for source, info in list(manifest["fontes"].items()):
+            if info.get("tipo") == "arquivo" and info.get("pasta") == pasta and source not in atuais:
+                removidos = _remover_fonte(vectordb, manifest, source)
+                totais["removidos"] += removidos
+                logger.info("[INDEXAÇÃO] 🗑️ %s removido da pasta: %s chunks apagados", source, removidos)
     except Exception as e:
-        return {"error": f"Erro ao criar banco vetorial: {e}"}
+        return {"error": f"Erro ao indexar PDFs: {e}"}
+    finally:
+        # O manifest e o BM25 refletem o que já foi gravado, mesmo em caso de erro
+        _finalizar_indexacao(vectordb, manifest, chroma_path)
+    
+    decorrido = time.perf_counter() - inicio
+    logger.info("[INDEXAÇÃO] 💾 Banco salvo em: %s", chroma_path)
+    logger.info(
+        "[INDEXAÇÃO] ✅ %s chunks novos, %s removidos, %s PDFs inalterados, %s falhas em %.1fs",
+        totais["novos"], totais["removidos"], inalterados, len(falhas), decorrido
+    )
+    
+    return {
+        "indexed_chunks": totais["novos"],
+        "removed_chunks": totais["removidos"],
+        "unchanged_files": inalterados,
+        "failed_files": falhas,
+        "source_documents": paginas,
+        "elapsed_seconds": round(decorrido, 2),
+        "pages_per_second": round(paginas / decorrido, 1) if decorrido > 0 else 0.0,
+        "chunks_per_second": round(chunks_lidos / decorrido, 1) if decorrido > 0 else 0.0,
+        "chroma_path": chroma_path
+    }
 
 
 def index_online_pdf(url: str, chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
     """
     Baixa e indexa um PDF de uma URL
     
+    Reindexar a mesma URL só calcula embeddings de páginas alteradas.
+    
     Args:
         url: URL do PDF
         chroma_path: Caminho para salvar o banco Chroma
@@ -208,9 +1010,7 @@ def index_online_pdf(url: str, chroma_path: str = CHROMA_PATH) -> Dict[str, Any]
     Returns:
         Dict com status da indexação
     """
-    print("\n" + "="*70)
-    print("[INDEXAÇÃO] 🌐 Baixando PDF online...")
-    print("="*70)
+    log_banner(logger, "[INDEXAÇÃO] 🌐 Baixando PDF online...")
     
     # Criar pasta temporária
     temp_dir = Path("Agent_C/temp_pdfs")
@@ -225,79 +1025,42 @@ def index_online_pdf(url: str, chroma_path: str = CHROMA_PATH) -> Dict[str, Any]
     
     # Baixar PDF
     try:
-        print(f"[INDEXAÇÃO] ⬇️ Baixando: {url}")
+        import requests
+
+        logger.info("[INDEXAÇÃO] ⬇️ Baixando: %s", url)
         response = requests.get(url, timeout=30)
         response.raise_for_status()
         
         with open(temp_pdf, 'wb') as f:
             f.write(response.content)
         
-        print(f"[INDEXAÇÃO] ✅ PDF salvo em: {temp_pdf}")
+        logger.info("[INDEXAÇÃO] ✅ PDF salvo em: %s", temp_pdf)
         
     except Exception as e:
         return {"error": f"Erro ao baixar PDF: {e}"}
     
-    # Carregar PDF
+    # Extrair texto e dividir em chunks (mesmo extrator da pasta local)
     try:
-        loader = PyPDFLoader(str(temp_pdf))
-        documents = loader.load()
+        extraido = _extrair_pdf(str(temp_pdf))
+        chunks = _chunks_para_documentos(url, extraido["chunks"])
         
-        print(f"[INDEXAÇÃO] ✅ {len(documents)} páginas carregadas")
+        logger.info("[INDEXAÇÃO] ✅ %s páginas → %s chunks", extraido["paginas"], len(chunks))
         
     except Exception as e:
-        temp_pdf.unlink(missing_ok=True)  # Limpar arquivo temporário
         return {"error": f"Erro ao carregar PDF: {e}"}
-    
-    # Dividir em chunks
-    try:
-        chunks = _split_documents(documents)
-    except Exception as e:
-        temp_pdf.unlink(missing_ok=True)
-        return {"error": f"Erro ao dividir documento: {e}"}
+    finally:
+        temp_pdf.unlink(missing_ok=True)  # Limpar arquivo temporário
     
     # Criar/atualizar banco vetorial
-    try:
-        print(f"[INDEXAÇÃO] 🧠 Criando embeddings...")
-        embeddings = _get_embeddings()
-        
-        # Verificar se banco já existe
-        if Path(chroma_path).exists():
-            print(f"[INDEXAÇÃO] 📦 Adicionando ao banco existente...")
-            vectordb = Chroma(
-                persist_directory=chroma_path,
-                embedding_function=embeddings
-            )
-            vectordb.add_documents(chunks)
-        else:
-            print(f"[INDEXAÇÃO] 📦 Criando novo banco...")
-            vectordb = Chroma.from_documents(
-                documents=chunks,
-                embedding=embeddings,
-                persist_directory=chroma_path
-            )
-        
-        print(f"[INDEXAÇÃO] 💾 Banco salvo em: {chroma_path}")
-        print(f"[INDEXAÇÃO] ✅ {len(chunks)} chunks indexados com sucesso!")
-        
-        # Limpar arquivo temporário
-        temp_pdf.unlink(missing_ok=True)
-        
-        return {
-            "indexed_chunks": len(chunks),
-            "source_documents": len(documents),
-            "chroma_path": chroma_path,
-            "source_url": url
-        }
-        
-    except Exception as e:
-        temp_pdf.unlink(missing_ok=True)
-        return {"error": f"Erro ao criar banco vetorial: {e}"}
+    return _indexar_fonte_remota(chroma_path, url, chunks, "url", documentos=extraido["paginas"])
 
 
 def index_web_page(url: str, chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
     """
     Indexa uma página web HTML
     
+    Reindexar a mesma URL só calcula embeddings de trechos alterados.
+    
     Args:
         url: URL da página web
         chroma_path: Caminho para salvar o banco Chroma
@@ -305,19 +1068,19 @@ def index_web_page(url: str, chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
     Returns:
         Dict com status da indexação
     """
-    print("\n" + "="*70)
-    print("[INDEXAÇÃO] 🌐 Indexando página web...")
-    print("="*70)
+    log_banner(logger, "[INDEXAÇÃO] 🌐 Indexando página web...")
     
     try:
-        print(f"[INDEXAÇÃO] 🔍 Carregando: {url}")
+        from langchain_community.document_loaders import WebBaseLoader
+
+        logger.info("[INDEXAÇÃO] 🔍 Carregando: %s", url)
         loader = WebBaseLoader(url)
         documents = loader.load()
         
         if not documents:
             return {"error": "Nenhum conteúdo encontrado na página"}
         
-        print(f"[INDEXAÇÃO] ✅ Página carregada")
+        logger.info("[INDEXAÇÃO] ✅ Página carregada")
         
     except Exception as e:
         return {"error": f"Erro ao carregar página: {e}"}
@@ -329,39 +1092,82 @@ def index_web_page(url: str, chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
         return {"error": f"Erro ao dividir documento: {e}"}
     
     # Criar/atualizar banco vetorial
+    return _indexar_fonte_remota(chroma_path, url, chunks, "web", documentos=len(documents))
+
+
+def _indexar_fonte_remota(chroma_path: str, url: str, chunks: List, tipo: str, documentos: int) -> Dict[str, Any]:
+    """Sincroniza os chunks de uma URL (PDF online ou página web) com o banco"""
     try:
-        print(f"[INDEXAÇÃO] 🧠 Criando embeddings...")
-        embeddings = _get_embeddings()
-        
-        # Verificar se banco já existe
-        if Path(chroma_path).exists():
-            print(f"[INDEXAÇÃO] 📦 Adicionando ao banco existente...")
-            vectordb = Chroma(
-                persist_directory=chroma_path,
-                embedding_function=embeddings
-            )
-            vectordb.add_documents(chunks)
-        else:
-            print(f"[INDEXAÇÃO] 📦 Criando novo banco...")
-            vectordb = Chroma.from_documents(
-                documents=chunks,
-                embedding=embeddings,
-                persist_directory=chroma_path
-            )
+        logger.info("[INDEXAÇÃO] 🧠 Criando embeddings...")
+        vectordb, manifest = _abrir_indice(chroma_path)
+        try:
+            resultado = _sincronizar_fonte(vectordb, manifest, url, chunks, {"tipo": tipo})
+        finally:
+            _finalizar_indexacao(vectordb, manifest, chroma_path)
         
-        print(f"[INDEXAÇÃO] 💾 Banco salvo em: {chroma_path}")
-        print(f"[INDEXAÇÃO] ✅ {len(chunks)} chunks indexados com sucesso!")
+        logger.info("[INDEXAÇÃO] 💾 Banco salvo em: %s", chroma_path)
+        logger.info("[INDEXAÇÃO] ✅ %s chunks novos, %s removidos", resultado["novos"], resultado["removidos"])
         
         return {
-            "indexed_chunks": len(chunks),
-            "source_url": url,
-            "chroma_path": chroma_path
+            "indexed_chunks": resultado["novos"],
+            "removed_chunks": resultado["removidos"],
+            "source_documents": documentos,
+            "chroma_path": chroma_path,
+            "source_url": url
         }
         
     except Exception as e:
         return {"error": f"Erro ao criar banco vetorial: {e}"}
 
 
+def reconstruir_indice_bm25(chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
+    """
+    Reconstrói o índice BM25 da busca híbrida a partir do banco Chroma
+    (feito automaticamente a cada indexação)
+    
+    Args:
+        chroma_path: Caminho do banco Chroma
+    
+    Returns:
+        Dict com status
+    """
+    if not Path(chroma_path).exists():
+        return {"error": f"Banco não encontrado: {chroma_path}"}
+    
+    try:
+        resultado = _reconstruir_bm25(_get_vectordb(chroma_path, perfil="indexacao"), chroma_path)
+    except Exception as e:
+        return {"error": f"Erro ao construir índice BM25: {e}"}
+    
+    invalidate_vectordb(chroma_path)
+    return resultado
+
+
+def exportar_indice_mmap(chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
+    """
+    Gera (ou atualiza) a cópia mmap do banco Chroma usada com
+    AGENTE_C_VECTOR_STORE=mmap
+    
+    Args:
+        chroma_path: Caminho do banco Chroma
+    
+    Returns:
+        Dict com status da exportação
+    """
+    if not Path(chroma_path).exists():
+        return {"error": f"Banco não encontrado: {chroma_path}"}
+    
+    destino = Path(chroma_path) / MMAP_DIR
+    try:
+        total = exportar_mmap(_get_vectordb(chroma_path, perfil="indexacao"), str(destino))
+    except Exception as e:
+        return {"error": f"Erro ao exportar índice mmap: {e}"}
+    
+    invalidate_vectordb(chroma_path)
+    logger.info("[INDEXAÇÃO] 🗺️ Índice mmap: %s chunks em %s", total, destino)
+    return {"exported_chunks": total, "mmap_path": str(destino)}
+
+
 def clear_chroma_db(chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
     """
     Remove o banco Chroma existente (útil para reindexação)
@@ -376,10 +1182,13 @@ def clear_chroma_db(chroma_path: str = CHROMA_PATH) -> Dict[str, Any]:
     
     db_path = Path(chroma_path)
     
+    # Soltar o Chroma em cache antes de apagar os arquivos
+    invalidate_vectordb(chroma_path)
+    
     if db_path.exists():
         try:
             shutil.rmtree(db_path)
-            print(f"[LIMPEZA] ✅ Banco removido: {chroma_path}")
+            logger.info("[LIMPEZA] ✅ Banco removido: %s", chroma_path)
             return {"status": "success", "message": "Banco removido com sucesso"}
         except Exception as e:
             return {"error": f"Erro ao remover banco: {e}"}
@@ -428,6 +1237,9 @@ def test_rag_search():
 # =====================================================================
 if __name__ == "__main__":
     import sys
+    from log_config import configurar_logging
+    
+    configurar_logging()
     
     if len(sys.argv) > 1:
         if sys.argv[1] == "test":
@@ -436,5 +1248,5 @@ if __name__ == "__main__":
             clear_chroma_db()
     else:
         print("Uso:")
-        print("  python agent_c_db.py test   # Testar busca")
-        print("  python agent_c_db.py clear  # Limpar banco")
\ No newline at end of file
+        print("  python -m Agent_C.agent_c_db test   # Testar busca")
+        print("  python -m Agent_C.agent_c_db clear  # Limpar banco")
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+Benchmark de Embeddings - Multi-Agent IRIS System
+==================================================
+Mede, para o modelo de embeddings do RAG (EMBED_MODEL), a vazão de
+indexação (chunks/s) e a latência de uma query isolada, variando:
+
+- backend: torch, onnx e onnx quantizado (int8), se disponíveis
+- threads intra-op (torch.set_num_threads / SessionOptions do onnxruntime)
+- batch size (só afeta a vazão)
+
+Os textos vêm do banco Chroma (se existir) ou são gerados sinteticamente
+com o tamanho de CHUNK_SIZE. O resultado orienta as variáveis de ambiente:
+
+    AGENTE_C_INDEX_EMBED_BATCH_SIZE / AGENTE_C_INDEX_EMBED_THREADS   (indexação)
+    AGENTE_C_EMBED_BATCH_SIZE / AGENTE_C_EMBED_THREADS               (consulta)
+
+Uso:
+    python Agent_C/benchmark_embeddings.py
+    python Agent_C/benchmark_embeddings.py --backends torch onnx --threads 1 2 4 --batches 16 32 64 128
+    python Agent_C/benchmark_embeddings.py --chunks 2000 --json resultados_embeddings.json
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from typing import List, Dict, Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agent_C.agent_c_db import EMBED_MODEL, EMBED_DEVICE, CHROMA_PATH, CHUNK_SIZE
+
+# Arquivo quantizado publicado no repositório do modelo no Hugging Face
+ARQUIVO_ONNX_QUANTIZADO = "onnx/model_qint8_avx512.onnx"
+
+QUERIES = [
+    "Qual o manejo recomendado para gato IRIS 3 com proteinúria?",
+    "Quando iniciar tratamento anti-hipertensivo em felinos com DRC?",
+    "Como interpretar discordância entre creatinina e SDMA?",
+    "Dieta renal é indicada a partir de qual estágio IRIS?",
+]
+
+_TERMOS = (
+    "creatinina sérica SDMA proteinúria UPC pressão arterial sistólica doença renal "
+    "crônica felina estadiamento IRIS subestágio hidratação dieta renal fósforo "
+    "benazepril telmisartana amlodipina hipocalemia anemia monitoramento"
+).split()
+
+
+def carregar_textos(quantidade: int, chroma_path: str) -> List[str]:
+    """Chunks do banco Chroma; se indisponível, textos sintéticos do mesmo tamanho"""
+    try:
+        import chromadb
+
+        cliente = chromadb.PersistentClient(path=chroma_path)
+        colecao = cliente.get_collection("langchain")
+        textos = colecao.get(limit=quantidade, include=["documents"])["documents"]
+        if textos:
+            print(f"📚 {len(textos)} chunks carregados de {chroma_path}")
+            return (textos * (quantidade // len(textos) + 1))[:quantidade]
+    except Exception as e:
+        print(f"⚠️ Banco Chroma indisponível ({e}); usando textos sintéticos")
+
+    rng = random.Random(42)
+    textos = []
+    for _ in range(quantidade):
+        palavras = []
+        while sum(len(p) + 1 for p in palavras) < CHUNK_SIZE:
+            palavras.append(rng.choice(_TERMOS))
+        textos.append(" ".join(palavras))
+    return textos
+
+
+def carregar_modelo(backend: str, threads: int, arquivo_quantizado: str):
+    """
+    SentenceTransformer no backend pedido com o número de threads pedido
+
+    Returns:
+        Modelo, ou None se o backend não estiver disponível
+    """
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        if backend == "torch":
+            import torch
+            torch.set_num_threads(threads)
+            return SentenceTransformer(EMBED_MODEL, device=EMBED_DEVICE)
+
+        import onnxruntime as ort
+        opcoes = ort.SessionOptions()
+        opcoes.intra_op_num_threads = threads
+        model_kwargs = {"session_options": opcoes}
+        if backend == "onnx-int8":
+            model_kwargs["file_name"] = arquivo_quantizado
+        return SentenceTransformer(EMBED_MODEL, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+    except Exception as e:
+        print(f"   ⚠️ Backend {backend} indisponível: {e}")
+        return None
+
+
+def medir_vazao(modelo, textos: List[str], batch_size: int, repeticoes: int) -> float:
+    """Melhor vazão (chunks/s) entre as repetições"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        modelo.encode(textos, batch_size=batch_size, normalize_embeddings=True)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return len(textos) / melhor
+
+
+def medir_latencia(modelo, execucoes: int) -> Dict[str, float]:
+    """Latência (ms) de uma query isolada: p50, p95 e média"""
+    for query in QUERIES:
+        modelo.encode(query, normalize_embeddings=True)  # aquecimento
+
+    tempos = []
+    for i in range(execucoes):
+        inicio = time.perf_counter()
+        modelo.encode(QUERIES[i % len(QUERIES)], normalize_embeddings=True)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    tempos.sort()
+    return {
+        "p50_ms": statistics.median(tempos),
+        "p95_ms": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        "media_ms": statistics.fmean(tempos),
+    }
+
+
+def melhor_por(resultados: List[Dict[str, Any]], chave: str, maior: bool) -> Optional[Dict[str, Any]]:
+    validos = [r for r in resultados if r.get(chave) is not None]
+    if not validos:
+        return None
+    return (max if maior else min)(validos, key=lambda r: r[chave])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de embeddings (vazão e latência)")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"],
+                        choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--batches", nargs="+", type=int, default=[8, 16, 32, 64, 128])
+    parser.add_argument("--chunks", type=int, default=512, help="Chunks usados na medida de vazão")
+    parser.add_argument("--repeticoes", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=50, help="Execuções na medida de latência")
+    parser.add_argument("--chroma-path", default=CHROMA_PATH)
+    parser.add_argument("--arquivo-quantizado", default=ARQUIVO_ONNX_QUANTIZADO)
+    parser.add_argument("--json", help="Salvar resultados neste arquivo")
+    args = parser.parse_args()
+
+    threads = sorted(set(args.threads))
+
+    print("=" * 70)
+    print(f"BENCHMARK DE EMBEDDINGS ({EMBED_MODEL})")
+    print("=" * 70)
+
+    textos = carregar_textos(args.chunks, args.chroma_path)
+    resultados = []
+
+    for backend in args.backends:
+        for n_threads in threads:
+            print(f"\n🧪 {backend}, {n_threads} thread(s)")
+            modelo = carregar_modelo(backend, n_threads, args.arquivo_quantizado)
+            if modelo is None:
+                break
+
+            latencia = medir_latencia(modelo, args.queries)
+            print(f"   query isolada: p50 {latencia['p50_ms']:.1f} ms, p95 {latencia['p95_ms']:.1f} ms")
+
+            for batch_size in args.batches:
+                vazao = medir_vazao(modelo, textos, batch_size, args.repeticoes)
+                print(f"   batch {batch_size:>4}: {vazao:>8.1f} chunks/s")
+                resultados.append({
+                    "backend": backend,
+                    "threads": n_threads,
+                    "batch_size": batch_size,
+                    "chunks_por_s": vazao,
+                    **latencia,
+                })
+            del modelo
+
+    print("\n" + "=" * 70)
+    print(f"{'Backend':<10} {'Threads':>7} {'Batch':>6} {'chunks/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    print("-" * 70)
+    for r in resultados:
+        print(f"{r['backend']:<10} {r['threads']:>7} {r['batch_size']:>6} "
+              f"{r['chunks_por_s']:>10.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+    print("=" * 70)
+
+    indexacao = melhor_por(resultados, "chunks_por_s", maior=True)
+    consulta = melhor_por(resultados, "p50_ms", maior=False)
+    if indexacao and consulta:
+        print("\n💡 Sugestão:")
+        print(f"   Indexação ({indexacao['backend']}): "
+              f"AGENTE_C_INDEX_EMBED_BATCH_SIZE={indexacao['batch_size']} "
+              f"AGENTE_C_INDEX_EMBED_THREADS={indexacao['threads']}")
+        print(f"   Consulta ({consulta['backend']}): AGENTE_C_EMBED_THREADS={consulta['threads']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"modelo": EMBED_MODEL, "chunks": len(textos), "resultados": resultados}, f, indent=2)
+        print(f"\n💾 Resultados salvos em: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
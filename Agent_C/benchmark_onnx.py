@@ -0,0 +1,151 @@
+"""
+Benchmark de Backends de Embeddings - Multi-Agent IRIS System
+==============================================================
+Compara memória (RSS) e latência de query dos backends de embeddings de
+agent_c_db (AGENTE_C_EMBED_BACKEND = torch, onnx, onnx-int8).
+
+Cada backend roda em um processo limpo, pelo mesmo caminho da API
+(_get_embeddings("consulta").embed_query), e reporta:
+- RSS após os imports, após carregar o modelo e o pico
+- tempo de carga do modelo
+- latência de query isolada (p50/p95) e vazão de embed_documents
+
+Uso:
+    python Agent_C/benchmark_onnx.py
+    python Agent_C/benchmark_onnx.py --backends torch onnx-int8 --queries 200
+
+Os backends ONNX requerem o modelo exportado:
+    python -m Agent_C.onnx_embeddings --exportar
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def rss_mb() -> float:
+    """RSS atual do processo em MB"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    return 0.0
+
+
+def pico_rss_mb() -> float:
+    """Pico de RSS do processo em MB"""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == "darwin" else pico / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2**20
+
+
+def medir_backend(queries: int, chunks: int) -> dict:
+    """Executado no processo filho (backend já definido no ambiente)"""
+    from log_config import configurar_logging
+    from Agent_C import agent_c_db
+    from Agent_C.benchmark_embeddings import carregar_textos, QUERIES
+
+    configurar_logging(nivel="WARNING")
+    textos = carregar_textos(chunks, agent_c_db.CHROMA_PATH)
+
+    rss_imports = rss_mb()
+    inicio = time.perf_counter()
+    embeddings = agent_c_db._get_embeddings("consulta")
+    embeddings.embed_query(QUERIES[0])
+    carga_s = time.perf_counter() - inicio
+    rss_modelo = rss_mb()
+
+    tempos = []
+    for i in range(queries):
+        t0 = time.perf_counter()
+        embeddings.embed_query(QUERIES[i % len(QUERIES)])
+        tempos.append((time.perf_counter() - t0) * 1000)
+    tempos.sort()
+
+    t0 = time.perf_counter()
+    embeddings.embed_documents(textos)
+    vazao = len(textos) / (time.perf_counter() - t0)
+
+    return {
+        "backend": agent_c_db.EMBED_BACKEND,
+        "rss_imports_mb": rss_imports,
+        "rss_modelo_mb": rss_modelo,
+        "rss_pico_mb": pico_rss_mb(),
+        "carga_s": carga_s,
+        "p50_ms": statistics.median(tempos),
+        "p95_ms": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        "chunks_por_s": vazao,
+    }
+
+
+def executar_processo(backend: str, queries: int, chunks: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--filho", "--queries", str(queries), "--chunks", str(chunks)],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "AGENTE_C_EMBED_BACKEND": backend},
+    )
+    if proc.returncode != 0:
+        erro = proc.stderr.strip().splitlines()
+        return {"backend": backend, "erro": erro[-1] if erro else f"código {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS e latência dos backends de embeddings")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"],
+                        choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        print(json.dumps(medir_backend(args.queries, args.chunks)))
+        return
+
+    print("=" * 78)
+    print("BENCHMARK DE BACKENDS DE EMBEDDINGS (RSS e latência)")
+    print("=" * 78)
+
+    resultados = []
+    for backend in args.backends:
+        print(f"\n🧪 {backend}...")
+        resultado = executar_processo(backend, args.queries, args.chunks)
+        if "erro" in resultado:
+            print(f"   ⚠️ Falhou: {resultado['erro']}")
+        resultados.append(resultado)
+
+    print("\n" + "=" * 78)
+    print(f"{'Backend':<10} {'RSS modelo':>11} {'RSS pico':>9} {'carga s':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'chunks/s':>9}")
+    print("-" * 78)
+    for r in resultados:
+        if "erro" in r:
+            print(f"{r['backend']:<10} (indisponível)")
+            continue
+        print(f"{r['backend']:<10} {r['rss_modelo_mb']:>9.0f}MB {r['rss_pico_mb']:>7.0f}MB {r['carga_s']:>8.1f} "
+              f"{r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} {r['chunks_por_s']:>9.1f}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
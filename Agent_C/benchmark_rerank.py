@@ -0,0 +1,139 @@
+"""
+Benchmark de Reranking - Multi-Agent IRIS System
+=================================================
+Mede o ganho do reranking com cross-encoder (AGENTE_C_RAG_RERANK) sobre a
+ordem da busca (vetorial ou híbrida), com as métricas de
+Agent_C/rag_metrics_retrieval.RetrievalMetrics.
+
+Para cada query de avaliação:
+1. Busca os candidatos como rag_search (RAG_RERANK_CANDIDATES por query)
+2. Marca como relevantes os candidatos que contêm todos os termos
+   esperados da query (rótulo automático, sem anotação manual)
+3. Compara o top-k na ordem da busca e na ordem do cross-encoder
+   (MRR, Recall@k, Precision@k, NDCG@k)
+4. Reporta a latência do reranking (p50/p95) e quantas queries cairiam na
+   ordem da busca com o orçamento AGENTE_C_RAG_RERANK_BUDGET_MS
+
+Os dois rankings saem do mesmo conjunto de candidatos: a diferença é só a
+ordem, que é o que decide quais chunks entram no contexto.
+
+Uso:
+    python Agent_C/benchmark_rerank.py
+    python Agent_C/benchmark_rerank.py --candidatos 40 --k 5
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_config import configurar_logging
+from Agent_C import agent_c_db
+from Agent_C.reranker import reordenar
+from Agent_C.rag_metrics_retrieval import RetrievalMetrics
+
+# (query, termos que um chunk relevante precisa conter)
+CONSULTAS = [
+    ("IRIS staging of CKD in cats based on creatinine", ["stage", "creatinine"]),
+    ("SDMA thresholds for feline CKD staging", ["sdma"]),
+    ("proteinuria substaging with urine protein to creatinine ratio", ["upc"]),
+    ("blood pressure substaging and risk of target organ damage", ["target organ"]),
+    ("treatment of systemic hypertension in cats with amlodipine", ["amlodipine"]),
+    ("renal diet and phosphate restriction in CKD cats", ["phosph", "diet"]),
+    ("phosphate binders when serum phosphorus is above target", ["binder"]),
+    ("management of proteinuria with ACE inhibitors or telmisartan", ["telmisartan"]),
+    ("hydration and subcutaneous fluid therapy in dehydrated cats", ["fluid"]),
+    ("anaemia associated with chronic kidney disease", ["anaemia"]),
+    ("3-hydroxykynurenine as an early biomarker of feline CKD", ["hydroxykynurenine"]),
+    ("hypokalaemia and potassium supplementation", ["potassium"]),
+]
+
+
+def relevantes(docs, termos) -> set:
+    """Ids dos candidatos que contêm todos os termos (sem diferenciar maiúsculas)"""
+    return {
+        doc.metadata.get("chunk_id") for doc in docs
+        if all(termo in doc.page_content.lower() for termo in termos)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ganho do reranking com cross-encoder")
+    parser.add_argument("--chroma-path", default=agent_c_db.CHROMA_PATH)
+    parser.add_argument("--candidatos", type=int, default=agent_c_db.RAG_RERANK_CANDIDATES)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--orcamento-ms", type=float, default=agent_c_db.RAG_RERANK_BUDGET_MS)
+    args = parser.parse_args()
+
+    configurar_logging(nivel="WARNING")
+
+    print("=" * 70)
+    print("BENCHMARK DE RERANKING (cross-encoder vs ordem da busca)")
+    print("=" * 70)
+
+    store = agent_c_db._get_store(args.chroma_path)
+    bm25 = agent_c_db._get_bm25(args.chroma_path) if agent_c_db.RAG_HYBRID else None
+    embeddings = agent_c_db._get_embeddings()
+    reranker = agent_c_db._get_reranker()
+
+    busca, reranking, tempos, avaliadas = [], [], [], 0
+    estouros = 0
+    for query, termos in CONSULTAS:
+        embedding = embeddings.embed_query(query)
+        if bm25 is not None:
+            docs = agent_c_db._buscar_hibrido(store, bm25, query, embedding, args.candidatos)
+        else:
+            docs = store.similarity_search_by_vector(embedding, k=args.candidatos)
+
+        esperados = relevantes(docs, termos)
+        if not esperados:
+            print(f"   ⚠️ Sem candidato relevante, ignorada: {query}")
+            continue
+        avaliadas += 1
+
+        inicio = time.perf_counter()
+        escores = reranker.pontuar(query, [doc.page_content for doc in docs])
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        if tempos[-1] > args.orcamento_ms:
+            estouros += 1
+
+        ids_busca = [doc.metadata.get("chunk_id") for doc in docs]
+        ids_rerank = [doc.metadata.get("chunk_id") for doc in reordenar(docs, escores)]
+        busca.append({"query": query, "relevant_docs": esperados, "retrieved_docs": ids_busca[:args.k]})
+        reranking.append({"query": query, "relevant_docs": esperados, "retrieved_docs": ids_rerank[:args.k]})
+
+    if not avaliadas:
+        print("❌ Nenhuma query avaliável (banco vazio? rode setup_rag.py)")
+        sys.exit(1)
+
+    metrics = RetrievalMetrics()
+    k_values = sorted({1, 3, args.k})
+    resultado_busca = metrics.evaluate_dataset(busca, k_values)
+    resultado_rerank = metrics.evaluate_dataset(reranking, k_values)
+    metrics.print_results(resultado_busca, f"Ordem da busca (top-{args.k} de {args.candidatos})")
+    metrics.print_results(resultado_rerank, f"Cross-encoder (top-{args.k} de {args.candidatos})")
+
+    print(f"\n{'Métrica':<14} {'busca':>8} {'rerank':>8} {'ganho':>8}")
+    print("-" * 42)
+    linhas = [("MRR", resultado_busca["mrr"], resultado_rerank["mrr"])]
+    for nome in ("recall", "precision", "ndcg"):
+        for k in k_values:
+            linhas.append((f"{nome}@{k}", resultado_busca[nome][f"@{k}"], resultado_rerank[nome][f"@{k}"]))
+    for nome, antes, depois in linhas:
+        print(f"{nome:<14} {antes:>8.3f} {depois:>8.3f} {depois - antes:>+8.3f}")
+
+    tempos.sort()
+    print(f"\n⏱️ Reranking de {args.candidatos} candidatos: p50 {statistics.median(tempos):.0f} ms, "
+          f"p95 {tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]:.0f} ms")
+    print(f"   Acima do orçamento de {args.orcamento_ms:.0f} ms: {estouros}/{avaliadas} queries "
+          f"(essas ficariam na ordem da busca)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Agent_C/bm25_index.py
+Índice invertido BM25 sobre os chunks do banco vetorial
+
+O MiniLM costuma perder termos exatos de biomarcadores ("SDMA", "UPC",
+"AP2", "HT3"); o BM25 os recupera pelo texto. O índice é construído na
+indexação (setup_rag.py) a partir de todos os chunks do Chroma e gravado em
+<chroma_path>/bm25_index.npz, com as listas de postings em formato CSR e o
+peso BM25 de cada posting já calculado: uma busca é um np.bincount sobre as
+postings dos termos da query.
+
+Fusão com a busca vetorial: reciprocal rank fusion (fundir_rrf).
+"""
+
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+ARQUIVO_BM25 = "bm25_index.npz"
+
+# Parâmetros usuais do Okapi BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Constante da reciprocal rank fusion (Cormack et al., 2009)
+RRF_K = 60
+
+# Palavras e números decimais ("2.8", "0,4"); "AP2", "HT3" ficam inteiros
+_TOKEN = re.compile(r"\w+(?:[.,]\d+)?")
+
+# Palavras funcionais (PT/EN, já sem acento) ignoradas no índice e na query
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela para
+com sem e ou que se ao aos qual quais quando como mais menos ser sao esta
+estao ha the of and or to in on for with is are be by an at as from that this
+""".split())
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Minúsculas, sem acentos (proteinúria = proteinuria), decimais com ponto"""
+    sem_acento = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode("ascii")
+    return [
+        token.replace(",", ".") for token in _TOKEN.findall(sem_acento)
+        if token not in STOPWORDS
+    ]
+
+
+def construir_bm25(chunk_ids: Sequence[str], textos: Sequence[str], caminho: str) -> int:
+    """
+    Constrói o índice BM25 e o grava de forma atômica
+
+    Args:
+        chunk_ids: Id de cada chunk (mesma ordem de textos)
+        textos: Conteúdo dos chunks
+        caminho: Arquivo .npz de destino
+
+    Returns:
+        Número de termos no vocabulário
+    """
+    vocabulario: Dict[str, int] = {}
+    postings: List[Dict[int, int]] = []
+    tamanhos = np.zeros(len(textos), dtype=np.float32)
+
+    for doc, texto in enumerate(textos):
+        tokens = tokenizar(texto or "")
+        tamanhos[doc] = len(tokens)
+        for token in tokens:
+            termo = vocabulario.setdefault(token, len(vocabulario))
+            if termo == len(postings):
+                postings.append({})
+            postings[termo][doc] = postings[termo].get(doc, 0) + 1
+
+    n = len(textos)
+    media = float(tamanhos.mean()) if n else 0.0
+    indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+    docs, pesos = [], []
+    for termo, por_doc in enumerate(postings):
+        df = len(por_doc)
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        ids = np.fromiter(por_doc.keys(), dtype=np.int32, count=df)
+        tf = np.fromiter(por_doc.values(), dtype=np.float32, count=df)
+        norma = BM25_K1 * (1 - BM25_B + BM25_B * tamanhos[ids] / max(media, 1e-9))
+        docs.append(ids)
+        pesos.append((idf * tf * (BM25_K1 + 1) / (tf + norma)).astype(np.float32))
+        indptr[termo + 1] = indptr[termo] + df
+
+    destino = Path(caminho)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(destino.stem + ".tmp.npz")
+    np.savez(
+        temporario,
+        termos=np.array(list(vocabulario), dtype=str),
+        indptr=indptr,
+        docs=np.concatenate(docs) if docs else np.zeros(0, dtype=np.int32),
+        pesos=np.concatenate(pesos) if pesos else np.zeros(0, dtype=np.float32),
+        chunk_ids=np.array(list(chunk_ids), dtype=str),
+    )
+    os.replace(temporario, destino)
+    return len(vocabulario)
+
+
+class Bm25Index:
+    """Índice BM25 carregado de construir_bm25 (somente leitura)"""
+
+    def __init__(self, caminho: str):
+        self._caminho = Path(caminho)
+        self._versao_aberta = self.versao()
+        with np.load(self._caminho) as dados:
+            self._termos = {termo: i for i, termo in enumerate(dados["termos"].tolist())}
+            self._indptr = dados["indptr"]
+            self._docs = dados["docs"]
+            self._pesos = dados["pesos"]
+            self._chunk_ids = dados["chunk_ids"]
+
+    def __len__(self) -> int:
+        return len(self._chunk_ids)
+
+    def versao(self) -> int:
+        try:
+            return self._caminho.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def desatualizado(self) -> bool:
+        return self.versao() != self._versao_aberta
+
+    def buscar(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Os k chunks de maior escore BM25 para a query
+
+        Returns:
+            [(chunk_id, escore)] em ordem decrescente (só escores > 0)
+        """
+        termos = [self._termos[t] for t in set(tokenizar(query)) if t in self._termos]
+        if not termos or k <= 0:
+            return []
+
+        faixas = [slice(self._indptr[t], self._indptr[t + 1]) for t in termos]
+        escores = np.bincount(
+            np.concatenate([self._docs[f] for f in faixas]),
+            weights=np.concatenate([self._pesos[f] for f in faixas]),
+            minlength=len(self._chunk_ids),
+        )
+        candidatos = np.flatnonzero(escores)
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(-escores[candidatos], k - 1)[:k]]
+        candidatos = candidatos[np.argsort(-escores[candidatos])]
+        return [(str(self._chunk_ids[i]), float(escores[i])) for i in candidatos]
+
+
+def fundir_rrf(*rankings: Sequence[str], k: int = RRF_K) -> List[str]:
+    """
+    Reciprocal rank fusion: escore = soma de 1 / (k + posição) em cada ranking
+
+    Args:
+        rankings: Listas de ids em ordem de relevância
+
+    Returns:
+        Ids em ordem decrescente de escore fundido
+    """
+    escores: Dict[str, float] = {}
+    for ranking in rankings:
+        for posicao, chunk_id in enumerate(ranking, 1):
+            escores[chunk_id] = escores.get(chunk_id, 0.0) + 1.0 / (k + posicao)
+    return sorted(escores, key=escores.get, reverse=True)
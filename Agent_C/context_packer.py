@@ -0,0 +1,218 @@
+"""
+Agent_C/context_packer.py
+Montagem do contexto do RAG por tokens do LLM, em sentenças inteiras
+
+- Os chunks chegam em ordem de relevância (busca/reranking) e são
+  quebrados em sentenças; cada sentença entra inteira ou não entra, e as
+  pontas de sentença cortadas pelo splitter são descartadas.
+- Chunks vizinhos da mesma página repetem até CHUNK_OVERLAP caracteres
+  (o splitter sobrepõe os pedaços); o trecho repetido é removido do chunk
+  que vem depois, e sentenças iguais só entram uma vez.
+- O limite é em tokens do tokenizer do LLM que recebe o contexto
+  (llama-3.1-8b-instant no Groq, responder_pergunta_usuario), lido de um
+  tokenizer.json local: nenhuma consulta faz acesso à rede. Sem o arquivo
+  (ou sem o pacote tokenizers), a contagem é estimada em 1 token a cada 4
+  caracteres.
+
+O tokenizer.json do Llama 3.1 exige aceitar a licença no Hugging Face; com
+HF_TOKEN definido, baixe-o uma vez para o caminho padrão:
+
+    huggingface-cli download meta-llama/Llama-3.1-8B-Instruct tokenizer.json --local-dir Agent_C/llm_tokenizer
+"""
+
+import os
+import re
+import math
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# tokenizer.json do LLM (formato Hugging Face tokenizers)
+LLM_TOKENIZER = os.environ.get(
+    "AGENTE_C_LLM_TOKENIZER",
+    str(Path(__file__).resolve().parent / "llm_tokenizer" / "tokenizer.json")
+)
+
+# Estimativa sem tokenizer (texto técnico em inglês/português)
+CHARS_POR_TOKEN = 4
+
+# Separador entre trechos de chunks diferentes
+SEPARADOR = "\n\n"
+
+# Sobreposição mínima entre chunks vizinhos para ser tratada como repetição
+SOBREPOSICAO_MINIMA = 20
+
+# Fim de sentença: . ! ? seguidos de espaço, ou quebra de linha em branco
+# ("2.8 mg/dL" e "v1.2" não quebram: não há espaço depois do ponto)
+_FIM_SENTENCA = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+_tokenizer = None
+_tokenizer_carregado = False
+_tokenizer_lock = threading.Lock()
+
+
+def carregar_tokenizer():
+    """
+    Tokenizer do LLM, lido de LLM_TOKENIZER uma vez por processo
+    
+    Chamado no aquecimento do worker (run_lg_api.py); sem o arquivo, avisa
+    uma única vez e retorna None (contagem estimada por caracteres).
+    """
+    global _tokenizer, _tokenizer_carregado
+    if not _tokenizer_carregado:
+        with _tokenizer_lock:
+            if not _tokenizer_carregado:
+                try:
+                    from tokenizers import Tokenizer
+                    _tokenizer = Tokenizer.from_file(LLM_TOKENIZER)
+                    logger.info("[RAG] 🔢 Tokenizer do LLM carregado: %s", LLM_TOKENIZER)
+                except Exception as e:
+                    logger.warning("[RAG] Tokenizer do LLM indisponível em %s (%s): tokens estimados por caracteres",
+                                   LLM_TOKENIZER, str(e)[:80])
+                _tokenizer_carregado = True
+    return _tokenizer
+
+
+def estimar_tokens(texto: str) -> int:
+    """Tokens estimados pelo tamanho do texto (sem tokenizer)"""
+    return math.ceil(len(texto) / CHARS_POR_TOKEN)
+
+
+def contar_tokens(textos: List[str]) -> List[int]:
+    """Tokens de cada texto no tokenizer do LLM (sem tokens especiais)"""
+    tokenizer = carregar_tokenizer()
+    if tokenizer is None:
+        return [estimar_tokens(texto) for texto in textos]
+    return [len(encoding.ids) for encoding in tokenizer.encode_batch(textos, add_special_tokens=False)]
+
+
+def dividir_sentencas(texto: str) -> List[str]:
+    """Sentenças do texto, sem espaços nas pontas (vazias descartadas)"""
+    return [s.strip() for s in _FIM_SENTENCA.split(texto) if s.strip()]
+
+
+def sentencas_completas(texto: str) -> List[str]:
+    """
+    Sentenças do chunk sem as pontas cortadas pelo splitter
+
+    Descarta a primeira sentença se começa em minúscula (continuação do
+    chunk anterior) e a última se não termina em pontuação, desde que
+    sobre alguma sentença.
+    """
+    sentencas = dividir_sentencas(texto)
+    if len(sentencas) > 1 and sentencas[0][0].islower():
+        sentencas = sentencas[1:]
+    if len(sentencas) > 1 and sentencas[-1][-1] not in ".!?:;)":
+        sentencas = sentencas[:-1]
+    return sentencas
+
+
+def _sobreposicao(anterior: str, seguinte: str, limite: int) -> int:
+    """Tamanho do maior sufixo de anterior que é prefixo de seguinte (até limite)"""
+    if len(seguinte) < SOBREPOSICAO_MINIMA:
+        return 0
+    # Candidatos: onde o início de seguinte aparece no fim de anterior
+    cauda = anterior[-limite:]
+    inicio = seguinte[:SOBREPOSICAO_MINIMA]
+    pos = cauda.find(inicio)
+    while pos != -1:
+        if seguinte.startswith(cauda[pos:]):
+            return len(cauda) - pos
+        pos = cauda.find(inicio, pos + 1)
+    return 0
+
+
+def remover_sobreposicoes(docs: List, limite: int) -> List[str]:
+    """
+    Textos dos docs sem o trecho repetido com um chunk vizinho da mesma página
+
+    O trecho sai do doc menos relevante do par (o que vem depois na lista):
+    do início, se repete o fim do mais relevante, ou do fim, se repete o
+    início dele.
+
+    Args:
+        docs: Documents (metadata com source/page)
+        limite: Maior sobreposição procurada (o dobro de CHUNK_OVERLAP cobre
+            o splitter, que sobrepõe pedaços inteiros)
+
+    Returns:
+        Um texto por doc, na mesma ordem
+    """
+    textos = [(getattr(doc, "page_content", "") or "").strip() for doc in docs]
+    paginas = [(doc.metadata.get("source"), doc.metadata.get("page")) for doc in docs]
+
+    resultado = list(textos)
+    for i in range(len(textos)):
+        for j in range(i):
+            if paginas[i] != paginas[j]:
+                continue
+            inicio = _sobreposicao(textos[j], resultado[i], limite)
+            fim = _sobreposicao(resultado[i], textos[j], limite)
+            if inicio or fim:
+                resultado[i] = resultado[i][inicio:len(resultado[i]) - fim].strip()
+    return resultado
+
+
+def empacotar_contexto(
+    docs: List,
+    limite: int,
+    sobreposicao: int,
+    medir: Optional[Callable[[List[str]], List[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Contexto com as sentenças dos docs mais relevantes que cabem no limite
+
+    Sentenças são tomadas na ordem dos docs e, dentro de cada doc, na ordem
+    do texto; uma sentença que não cabe é pulada (as seguintes, menores,
+    ainda podem caber). As sentenças de cada doc ficam juntas no contexto.
+
+    Args:
+        docs: Documents em ordem de relevância
+        limite: Máximo de tokens (ou da medida de medir)
+        sobreposicao: CHUNK_OVERLAP da indexação
+        medir: Tamanho de cada texto (padrão: contar_tokens)
+
+    Returns:
+        Dict com context, docs_used, sentences, duplicate_sentences e
+        size (soma dos tamanhos medidos, separadores incluídos)
+    """
+    medir = medir or contar_tokens
+    textos = remover_sobreposicoes(docs, 2 * sobreposicao)
+    sentencas_por_doc = [sentencas_completas(texto) for texto in textos]
+
+    todas = [s for sentencas in sentencas_por_doc for s in sentencas]
+    tamanhos = iter(medir(todas)) if todas else iter(())
+    custo_espaco, custo_separador = medir([" ", SEPARADOR]) if todas else (0, 0)
+
+    vistas = set()
+    partes, total, usadas, duplicadas = [], 0, 0, 0
+    for sentencas in sentencas_por_doc:
+        escolhidas = []
+        for sentenca in sentencas:
+            tamanho = next(tamanhos)
+            chave = " ".join(sentenca.lower().split())
+            if chave in vistas:
+                duplicadas += 1
+                continue
+            # Primeira sentença de um doc paga o separador (exceto no início)
+            extra = tamanho + (custo_espaco if escolhidas else (custo_separador if partes else 0))
+            if total + extra > limite:
+                continue
+            vistas.add(chave)
+            escolhidas.append(sentenca)
+            total += extra
+            usadas += 1
+        if escolhidas:
+            partes.append(" ".join(escolhidas))
+
+    return {
+        "context": SEPARADOR.join(partes),
+        "docs_used": len(partes),
+        "sentences": usadas,
+        "duplicate_sentences": duplicadas,
+        "size": total,
+    }
@@ -0,0 +1,140 @@
+"""
+Agent_C/keyword_matcher.py
+Busca de várias palavras-chave com categorias, compilada uma vez
+
+- encontrar(texto): uma expressão regular com as palavras-chave em forma de
+  trie ("tr(?:atamento|eatment)"), dentro de um lookahead para achar também
+  ocorrências sobrepostas. Em cada posição a maior palavra-chave que começa
+  ali é encontrada; as contidas nela ("renal" em "doença renal", "cat" em
+  "medication") vêm de uma tabela pré-calculada. O resultado é o mesmo de
+  testar `keyword in texto` para cada palavra-chave, em uma passada.
+- localizar_sentencas(texto, palavras): divide o texto em sentenças e diz
+  em quais delas cada palavra-chave aparece, com a mesma expressão
+  compilada em uma passada sobre o texto inteiro e bisect para levar o
+  offset de cada ocorrência à sua sentença.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# Fim de sentença (com o espaço que o segue): pontuação seguida de espaço
+# ou do fim do texto (o ponto decimal de "1.6 mg/dL" não divide), ou linha
+# em branco entre chunks
+_FIM_SENTENCA = re.compile(r"[.!?]+(?:\s+|$)|\n\s*\n\s*")
+
+
+def _padrao_trie(palavras: Iterable[str]) -> str:
+    """Expressão regular equivalente a p1|p2|..., agrupada por prefixos comuns"""
+    trie: dict = {}
+    for palavra in palavras:
+        no = trie
+        for ch in palavra:
+            no = no.setdefault(ch, {})
+        no[""] = {}
+
+    def montar(no: dict) -> str:
+        filhos = [re.escape(ch) + montar(sub) for ch, sub in sorted(no.items()) if ch]
+        if not filhos:
+            return ""
+        corpo = filhos[0] if len(filhos) == 1 else "(?:" + "|".join(filhos) + ")"
+        # Fim de palavra no meio do caminho: o restante é opcional (guloso,
+        # então a palavra mais longa é preferida)
+        return "(?:" + corpo + ")?" if "" in no else corpo
+
+    return montar(trie)
+
+
+class KeywordMatcher:
+    """
+    Casador de palavras-chave com categorias
+
+    Args:
+        categorias: {categoria: palavras-chave}; uma palavra-chave pode estar
+            em várias categorias. A busca diferencia maiúsculas (use texto
+            e palavras-chave em minúsculas).
+    """
+
+    def __init__(self, categorias: Dict[str, Iterable[str]]):
+        por_palavra: Dict[str, Set[str]] = {}
+        for categoria, palavras in categorias.items():
+            for palavra in palavras:
+                por_palavra.setdefault(palavra, set()).add(categoria)
+
+        self.categorias: Dict[str, FrozenSet[str]] = {p: frozenset(c) for p, c in por_palavra.items()}
+
+        # Palavras-chave contidas em cada palavra-chave (inclusive ela mesma)
+        self._contidas = {
+            palavra: tuple(outra for outra in por_palavra if outra in palavra)
+            for palavra in por_palavra
+        }
+
+        self._regex = re.compile("(?=(" + _padrao_trie(por_palavra) + "))") if por_palavra else None
+
+    def encontrar(self, texto: str) -> Dict[str, FrozenSet[str]]:
+        """
+        Palavras-chave presentes no texto
+
+        Returns:
+            {palavra-chave: categorias}
+        """
+        if self._regex is None:
+            return {}
+
+        encontradas: Dict[str, FrozenSet[str]] = {}
+        for maior in {m.group(1) for m in self._regex.finditer(texto)}:
+            for palavra in self._contidas[maior]:
+                encontradas[palavra] = self.categorias[palavra]
+        return encontradas
+
+    @staticmethod
+    def por_categoria(encontradas: Dict[str, FrozenSet[str]]) -> Dict[str, Set[str]]:
+        """Agrupa o resultado de encontrar: {categoria: palavras-chave}"""
+        grupos: Dict[str, Set[str]] = {}
+        for palavra, categorias in encontradas.items():
+            for categoria in categorias:
+                grupos.setdefault(categoria, set()).add(palavra)
+        return grupos
+
+    def localizar_sentencas(self, texto: str, palavras: Iterable[str]) -> Tuple[List[str], Dict[str, List[int]]]:
+        """
+        Sentenças do texto e em quais delas cada palavra-chave aparece
+
+        Args:
+            texto: Texto original (ex.: contexto do RAG); a busca é feita
+                sobre ele em minúsculas
+            palavras: Palavras-chave procuradas (ex.: as encontradas na
+                pergunta); palavras que não são deste casador são ignoradas
+
+        Returns:
+            (sentenças sem a pontuação final, {palavra: [índices das
+            sentenças, em ordem]}) (só palavras presentes)
+        """
+        minusculo = texto.lower()
+        if len(minusculo) != len(texto):
+            # Caracteres que mudam de tamanho ao baixar a caixa: offsets só
+            # valem no texto em minúsculas
+            texto = minusculo
+
+        sentencas, inicios, inicio = [], [], 0
+        for fim in _FIM_SENTENCA.finditer(texto):
+            sentencas.append(texto[inicio:fim.start()])
+            inicios.append(inicio)
+            inicio = fim.end()
+        if inicio < len(texto):
+            sentencas.append(texto[inicio:])
+            inicios.append(inicio)
+
+        procuradas = set(palavras)
+        indice: Dict[str, List[int]] = {}
+        if self._regex is None or not procuradas or not sentencas:
+            return sentencas, indice
+
+        for m in self._regex.finditer(minusculo):
+            i = bisect_right(inicios, m.start()) - 1
+            for palavra in self._contidas[m.group(1)]:
+                if palavra in procuradas:
+                    encontrados = indice.setdefault(palavra, [])
+                    if not encontrados or encontrados[-1] != i:
+                        encontrados.append(i)
+        return sentencas, indice
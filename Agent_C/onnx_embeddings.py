@@ -0,0 +1,188 @@
+"""
+Agent_C/onnx_embeddings.py
+Embeddings via ONNX Runtime (sem torch) para servidores só com CPU
+
+O modelo de EMBED_MODEL é exportado uma vez para ONNX (e, opcionalmente,
+quantizado para int8); em produção só onnxruntime e tokenizers são
+carregados. A saída reproduz o sentence-transformers: mean pooling sobre os
+tokens e normalização L2 (dimensão 384, compatível com o índice existente).
+
+Uso:
+    python -m Agent_C.onnx_embeddings --exportar            # model.onnx + model_int8.onnx
+    AGENTE_C_EMBED_BACKEND=onnx-int8 python run_lg.py
+
+A exportação requer torch, transformers e onnxruntime (só na máquina que
+exporta); a pasta gerada pode ser copiada para os servidores.
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+
+# =====================================================================
+# CONFIGURAÇÃO
+# =====================================================================
+ONNX_MODEL_DIR = os.environ.get("AGENTE_C_ONNX_MODEL_DIR", "Agent_C/onnx_model")
+
+ARQUIVO_MODELO = "model.onnx"
+ARQUIVO_MODELO_INT8 = "model_int8.onnx"
+ARQUIVO_METADADOS = "onnx_config.json"
+
+# max_seq_length do all-MiniLM-L6-v2 (sentence_bert_config.json)
+MAX_SEQ_LENGTH = 256
+
+_ENTRADAS = ("input_ids", "attention_mask", "token_type_ids")
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Embeddings do modelo exportado, executados pelo onnxruntime
+
+    Args:
+        model_dir: Pasta gerada por exportar_onnx
+        quantizado: Usar o modelo int8
+        batch_size: Textos por chamada ao modelo
+        threads: Threads intra-op do onnxruntime (0 = padrão do onnxruntime)
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantizado: bool = False,
+                 batch_size: int = 32, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        pasta = Path(model_dir)
+        arquivo = pasta / (ARQUIVO_MODELO_INT8 if quantizado else ARQUIVO_MODELO)
+        if not arquivo.exists():
+            raise FileNotFoundError(
+                f"Modelo ONNX não encontrado: {arquivo} (gere com: python -m Agent_C.onnx_embeddings --exportar)"
+            )
+
+        metadados = json.loads((pasta / ARQUIVO_METADADOS).read_text(encoding="utf-8"))
+        self.modelo = metadados["modelo"]
+        self.batch_size = batch_size
+
+        self._tokenizer = Tokenizer.from_file(str(pasta / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=metadados.get("max_length", MAX_SEQ_LENGTH))
+        self._tokenizer.enable_padding(pad_id=metadados.get("pad_id", 0), pad_token=metadados.get("pad_token", "[PAD]"))
+
+        opcoes = ort.SessionOptions()
+        if threads > 0:
+            opcoes.intra_op_num_threads = threads
+        self._sessao = ort.InferenceSession(str(arquivo), sess_options=opcoes, providers=["CPUExecutionProvider"])
+        self._entradas = [e.name for e in self._sessao.get_inputs() if e.name in _ENTRADAS]
+
+        logger.info("[AGENTE C] Embeddings ONNX carregados: %s", arquivo)
+
+    def _codificar(self, textos: List[str]):
+        import numpy as np
+
+        codificados = self._tokenizer.encode_batch(textos)
+        tensores = {
+            "input_ids": np.array([c.ids for c in codificados], dtype=np.int64),
+            "attention_mask": np.array([c.attention_mask for c in codificados], dtype=np.int64),
+            "token_type_ids": np.array([c.type_ids for c in codificados], dtype=np.int64),
+        }
+        tokens = self._sessao.run(None, {nome: tensores[nome] for nome in self._entradas})[0]
+
+        # Mean pooling (só tokens reais) + normalização L2
+        mascara = tensores["attention_mask"][..., None].astype(tokens.dtype)
+        media = (tokens * mascara).sum(axis=1) / np.clip(mascara.sum(axis=1), 1e-9, None)
+        return media / np.clip(np.linalg.norm(media, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Textos de tamanho parecido no mesmo batch: menos padding
+        ordem = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vetores = [None] * len(texts)
+        for inicio in range(0, len(ordem), self.batch_size):
+            indices = ordem[inicio:inicio + self.batch_size]
+            for i, vetor in zip(indices, self._codificar([texts[i] for i in indices])):
+                vetores[i] = vetor.tolist()
+        return vetores
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._codificar([text])[0].tolist()
+
+
+# =====================================================================
+# EXPORTAÇÃO
+# =====================================================================
+def exportar_onnx(modelo: str, destino: str = ONNX_MODEL_DIR, quantizar: bool = True) -> Path:
+    """
+    Exporta o modelo do Hugging Face para ONNX (e int8, com quantizar)
+
+    Args:
+        modelo: Nome do modelo (EMBED_MODEL)
+        destino: Pasta de saída
+        quantizar: Gerar também model_int8.onnx (quantização dinâmica)
+
+    Returns:
+        Pasta de saída
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    pasta = Path(destino)
+    pasta.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(modelo)
+    rede = AutoModel.from_pretrained(modelo).eval()
+    tokenizer.save_pretrained(str(pasta))
+
+    exemplo = tokenizer(["exemplo de texto"], return_tensors="pt")
+    eixos = {0: "batch", 1: "tokens"}
+    with torch.no_grad():
+        torch.onnx.export(
+            rede,
+            tuple(exemplo[nome] for nome in _ENTRADAS),
+            str(pasta / ARQUIVO_MODELO),
+            input_names=list(_ENTRADAS),
+            output_names=["last_hidden_state"],
+            dynamic_axes={nome: eixos for nome in (*_ENTRADAS, "last_hidden_state")},
+            opset_version=14,
+        )
+    logger.info("[AGENTE C] Modelo exportado: %s", pasta / ARQUIVO_MODELO)
+
+    if quantizar:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantize_dynamic(str(pasta / ARQUIVO_MODELO), str(pasta / ARQUIVO_MODELO_INT8), weight_type=QuantType.QInt8)
+        logger.info("[AGENTE C] Modelo quantizado: %s", pasta / ARQUIVO_MODELO_INT8)
+
+    metadados = {
+        "modelo": modelo,
+        "max_length": MAX_SEQ_LENGTH,
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+    }
+    (pasta / ARQUIVO_METADADOS).write_text(json.dumps(metadados, indent=2), encoding="utf-8")
+    return pasta
+
+
+if __name__ == "__main__":
+    import sys
+
+    from log_config import configurar_logging
+    from Agent_C.agent_c_db import EMBED_MODEL
+
+    parser = argparse.ArgumentParser(description="Exporta EMBED_MODEL para ONNX")
+    parser.add_argument("--exportar", action="store_true", help="Exportar o modelo")
+    parser.add_argument("--destino", default=ONNX_MODEL_DIR)
+    parser.add_argument("--sem-quantizar", action="store_true", help="Não gerar model_int8.onnx")
+    args = parser.parse_args()
+
+    configurar_logging()
+    if not args.exportar:
+        parser.print_help()
+        sys.exit(1)
+
+    saida = exportar_onnx(EMBED_MODEL, args.destino, quantizar=not args.sem_quantizar)
+    print(f"✅ Modelo ONNX salvo em: {saida}")
@@ -9,20 +9,19 @@ Autor: Sistema Multi-Agente IRIS
 Data: Dezembro 2025
 """
 
-import os
 import re
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-try:
-    from langchain_groq import ChatGroq
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    LANGCHAIN_AVAILABLE = True
-except ImportError:
-    LANGCHAIN_AVAILABLE = False
-    print("Aviso: LangChain não disponível. Instale: pip install langchain-groq langchain-google-genai")
+from llm_client import get_llm, llm_disponivel, API_KEYS
+
+# Modelo de cada provedor aceito em model_name
+MODELOS_AVALIADOR = {
+    "groq": "llama-3.1-8b-instant",
+    "gemini": "gemini-pro",
+}
 
 
 class GenerationMetrics:
@@ -56,34 +55,27 @@ class GenerationMetrics:
         self.temperature = temperature
         self.llm = None
         
-        if LANGCHAIN_AVAILABLE:
-            self._initialize_llm()
+        self._initialize_llm()
     
     def _initialize_llm(self):
-        """Inicializa o modelo LLM para avaliação."""
-        if self.model_name == "groq":
-            api_key = os.getenv("GROQ_API_KEY")
-            if not api_key:
-                print("Aviso: GROQ_API_KEY não encontrada")
-                return
-            
-            self.llm = ChatGroq(
-                api_key=api_key,
-                model_name="llama-3.1-8b-instant",
-                temperature=self.temperature
-            )
+        """
+        Obtém o cliente LLM compartilhado (llm_client.get_llm) para avaliação.
         
-        elif self.model_name == "gemini":
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                print("Aviso: GOOGLE_API_KEY não encontrada")
-                return
-            
-            self.llm = ChatGoogleGenerativeAI(
-                model="gemini-pro",
-                google_api_key=api_key,
-                temperature=self.temperature
-            )
+        Avaliações repetidas do mesmo par pergunta/resposta vêm do cache de
+        respostas do cliente.
+        """
+        if self.model_name not in MODELOS_AVALIADOR:
+            print(f"Aviso: modelo desconhecido: {self.model_name}")
+            return
+        
+        if not llm_disponivel(self.model_name):
+            print(f"Aviso: {API_KEYS[self.model_name]} não encontrada")
+            return
+        
+        try:
+            self.llm = get_llm(self.model_name, MODELOS_AVALIADOR[self.model_name], self.temperature)
+        except ImportError as e:
+            print(f"Aviso: LangChain não disponível ({e}). Instale: pip install langchain-groq langchain-google-genai")
     
     def answer_accuracy(
         self,
@@ -133,8 +125,7 @@ Justificativa: [explicação]
 """
         
         try:
-            response = self.llm.invoke(prompt)
-            response_text = response.content if hasattr(response, 'content') else str(response)
+            response_text = self.llm.gerar(prompt)
             
             score_match = re.search(r'Score:\s*(\d+)', response_text)
             score = int(score_match.group(1)) if score_match else 0
@@ -196,8 +187,7 @@ Faithfulness Score: [0.0 a 1.0]
 """
         
         try:
-            response = self.llm.invoke(prompt)
-            response_text = response.content if hasattr(response, 'content') else str(response)
+            response_text = self.llm.gerar(prompt)
             
             score_match = re.search(r'Faithfulness Score:\s*([\d.]+)', response_text)
             faithfulness_score = float(score_match.group(1)) if score_match else 0.0
@@ -254,8 +244,7 @@ Groundedness Score: [proporção fundamentada]
 """
         
         try:
-            response = self.llm.invoke(prompt)
-            response_text = response.content if hasattr(response, 'content') else str(response)
+            response_text = self.llm.gerar(prompt)
             
             score_match = re.search(r'Groundedness Score:\s*([\d.]+)', response_text)
             groundedness_score = float(score_match.group(1)) if score_match else 0.0
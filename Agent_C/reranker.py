@@ -0,0 +1,112 @@
+"""
+Agent_C/reranker.py
+Reordenação dos candidatos da busca com um cross-encoder
+
+A busca vetorial compara embeddings calculados separadamente para a query
+e para o chunk; o cross-encoder lê o par (query, chunk) junto e dá um
+escore de relevância mais fiel, a um custo por par. Por isso só os
+candidatos da busca (algumas dezenas) são pontuados, em lotes pequenos, e
+dentro de um orçamento de tempo por requisição: antes de cada lote, o custo
+medido por lote dá a previsão do que falta; se o restante não cabe no
+prazo, a pontuação é abandonada na hora (escores parciais não servem para
+reordenar) e quem chamou mantém a ordem da busca vetorial.
+
+O orçamento é brando na granularidade de um lote: um lote em andamento não
+é interrompido, então o tempo total passa do orçamento só quando um lote
+demora mais que a média medida.
+"""
+
+import math
+import time
+import threading
+from typing import List, Optional, Sequence
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Cross-encoder pequeno (MiniLM de 6 camadas), treinado no MS MARCO
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Pares por chamada ao modelo (granularidade da checagem do orçamento)
+RERANK_LOTE = 8
+
+# Tokens por par (query + chunk); chunks de 500 chars cabem com folga
+RERANK_MAX_LENGTH = 256
+
+
+class CrossEncoderReranker:
+    """
+    Cross-encoder do sentence-transformers com orçamento de latência
+
+    Args:
+        modelo: Nome ou caminho do cross-encoder
+        device: Dispositivo do torch ("cpu", "cuda")
+        lote: Pares por chamada ao modelo
+        max_length: Tokens por par (truncados)
+    """
+
+    def __init__(self, modelo: str = RERANK_MODEL, device: str = "cpu",
+                 lote: int = RERANK_LOTE, max_length: int = RERANK_MAX_LENGTH):
+        from sentence_transformers import CrossEncoder
+
+        inicio = time.perf_counter()
+        self.modelo = modelo
+        self.lote = lote
+        self._encoder = CrossEncoder(modelo, device=device, max_length=max_length)
+        # Tempo de um lote, atualizado a cada chamada (média móvel)
+        self._segundos_por_lote: Optional[float] = None
+        self._lock = threading.Lock()
+
+        # Aquecimento: o primeiro lote paga a inicialização do torch e é
+        # descartado; o segundo dá a estimativa usada pela primeira requisição
+        for _ in range(2):
+            self._segundos_por_lote = None
+            self.pontuar("aquecimento", ["x" * 400] * lote)
+        logger.info("[RAG] 🎯 Cross-encoder carregado: %s (%.1fs)", modelo, time.perf_counter() - inicio)
+
+    def pontuar(self, query: str, textos: Sequence[str], orcamento_s: float = None) -> Optional[List[float]]:
+        """
+        Escores de relevância de cada texto para a query
+
+        Args:
+            query: Texto da query
+            textos: Textos dos candidatos
+            orcamento_s: Tempo máximo em segundos (None = sem limite),
+                brando na granularidade de um lote
+
+        Returns:
+            Um escore por texto (maior = mais relevante), ou None se o
+            restante previsto não cabe no prazo
+        """
+        inicio = time.perf_counter()
+        prazo = None if orcamento_s is None else inicio + orcamento_s
+        escores: List[float] = []
+
+        for i in range(0, len(textos), self.lote):
+            if prazo is not None:
+                # Lotes que faltam (incluindo este) pelo custo medido por lote
+                agora = time.perf_counter()
+                previsto = (self._segundos_por_lote or 0.0) * math.ceil((len(textos) - i) / self.lote)
+                if agora + previsto > prazo:
+                    logger.info("[RAG] ⏱️ Reranking abandonado: %.0f ms + %.0f ms previstos > orçamento %.0f ms (%s/%s pares)",
+                                (agora - inicio) * 1000, previsto * 1000, orcamento_s * 1000, len(escores), len(textos))
+                    return None
+
+            t0 = time.perf_counter()
+            pares = [(query, texto) for texto in textos[i:i + self.lote]]
+            escores.extend(float(e) for e in self._encoder.predict(pares, batch_size=self.lote, show_progress_bar=False))
+            self._registrar_lote(time.perf_counter() - t0)
+
+        return escores
+
+    def _registrar_lote(self, segundos: float):
+        with self._lock:
+            anterior = self._segundos_por_lote
+            self._segundos_por_lote = segundos if anterior is None else 0.8 * anterior + 0.2 * segundos
+
+
+def reordenar(docs: List, escores: Sequence[float]) -> List:
+    """Documents em ordem decrescente de escore (empates mantêm a ordem original)"""
+    ordem = sorted(range(len(docs)), key=lambda i: -escores[i])
+    return [docs[i] for i in ordem]
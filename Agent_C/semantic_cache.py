@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Cache semântico de buscas RAG do Agente C
+
+As queries do Agente C variam no texto (valores de creatinina/SDMA, pergunta
+do usuário) mesmo quando os documentos recuperados seriam os mesmos. Este
+cache compara o embedding da query com os das queries anteriores e reutiliza
+o resultado quando a distância de cosseno fica abaixo do limiar.
+
+Os embeddings são normalizados (normalize_embeddings=True), então a
+similaridade de cosseno é o produto interno.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Sequence, Hashable
+
+import numpy as np
+
+
+class SemanticCache:
+    """Cache LRU com TTL indexado por embedding, seguro entre threads"""
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600, max_distance: float = 0.05):
+        """
+        Args:
+            max_entries: Número máximo de resultados guardados (0 desativa)
+            ttl_seconds: Tempo de vida de cada resultado
+            max_distance: Distância de cosseno máxima para considerar acerto
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._entries = OrderedDict()  # id -> (namespace, vetor, resultado, criado_em)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    def _remover_expirados(self, agora: float):
+        expirados = [
+            entry_id for entry_id, (_, _, _, criado_em) in self._entries.items()
+            if agora - criado_em > self.ttl_seconds
+        ]
+        for entry_id in expirados:
+            del self._entries[entry_id]
+    
+    def get(self, namespace: Hashable, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o resultado da query mais próxima no mesmo namespace
+        
+        Args:
+            namespace: Identifica banco/parâmetros da busca (só entradas iguais são comparadas)
+            embedding: Embedding normalizado da query
+        
+        Returns:
+            Cópia rasa do resultado em cache ou None
+        """
+        if not self.enabled:
+            return None
+        
+        vetor = np.asarray(embedding, dtype=np.float32)
+        
+        with self._lock:
+            self._remover_expirados(time.monotonic())
+            
+            candidatos = [
+                (entry_id, entry[1]) for entry_id, entry in self._entries.items()
+                if entry[0] == namespace
+            ]
+            if not candidatos:
+                self.misses += 1
+                return None
+            
+            matriz = np.stack([v for _, v in candidatos])
+            similaridades = matriz @ vetor
+            melhor = int(np.argmax(similaridades))
+            
+            if 1.0 - float(similaridades[melhor]) > self.max_distance:
+                self.misses += 1
+                return None
+            
+            entry_id = candidatos[melhor][0]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            resultado = self._entries[entry_id][2]
+        
+        return {**resultado, "docs": list(resultado.get("docs", []))}
+    
+    def put(self, namespace: Hashable, embedding: Sequence[float], resultado: Dict[str, Any]):
+        """Armazena o resultado de uma busca"""
+        if not self.enabled:
+            return
+        
+        vetor = np.asarray(embedding, dtype=np.float32)
+        
+        with self._lock:
+            self._next_id += 1
+            self._entries[self._next_id] = (namespace, vetor, dict(resultado), time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
@@ -0,0 +1,229 @@
+"""
+Agent_C/vector_store.py
+Armazenamentos vetoriais usados por rag_search
+
+- ChromaVectorStore: a coleção Chroma/SQLite (padrão; usada na indexação)
+- MmapVectorStore: cópia somente leitura do índice em arquivos mapeados em
+  memória, para acervos pequenos e estáticos. Os embeddings normalizados
+  ficam em embeddings.npy (float32, N x D) e os textos/metadados em
+  chunks.jsonl, com offsets.npy apontando o início de cada registro. Os
+  workers mapeiam os mesmos arquivos, então as páginas são compartilhadas
+  pelo cache do sistema operacional em vez de carregadas por processo.
+  Cada exportação grava uma subpasta nova e troca o arquivo ATUAL, que
+  aponta a versão em uso (os três arquivos mudam juntos).
+
+Escolha com AGENTE_C_VECTOR_STORE=chroma|mmap; o índice mmap é gerado a
+partir do Chroma por exportar_mmap (setup_rag.py faz isso após indexar).
+"""
+
+import os
+import re
+import json
+import mmap
+import time
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+ARQUIVO_EMBEDDINGS = "embeddings.npy"
+ARQUIVO_OFFSETS = "offsets.npy"
+ARQUIVO_CHUNKS = "chunks.jsonl"
+ARQUIVO_ATUAL = "ATUAL"
+
+# Revisão do índice Chroma: primeira chave do manifest da indexação
+# (agent_c_db._salvar_manifest), lida sem carregar os ids de todos os chunks
+_REVISAO_MANIFEST = re.compile(rb'^\{\s*"revisao"\s*:\s*(\d+)')
+_BYTES_REVISAO = 64
+
+
+def _versao_atual(pasta: Path) -> int:
+    """Versão apontada por ATUAL (0 se não houver índice exportado)"""
+    try:
+        return int((pasta / ARQUIVO_ATUAL).read_text().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+class VectorStore(ABC):
+    """Interface mínima de busca usada por _rag_search_by_vector"""
+
+    @abstractmethod
+    def similarity_search_by_vector(self, embedding, k: int) -> List:
+        """Os k chunks mais próximos do embedding (Documents do LangChain)"""
+
+    @abstractmethod
+    def get_by_ids(self, chunk_ids: List[str]) -> List:
+        """Documents dos chunk_ids pedidos, na mesma ordem (ids ausentes omitidos)"""
+
+    @abstractmethod
+    def versao(self) -> int:
+        """Versão dos dados no disco (muda quando o índice é regravado)"""
+
+    def desatualizado(self) -> bool:
+        """True se os arquivos abertos foram substituídos no disco"""
+        return False
+
+
+class ChromaVectorStore(VectorStore):
+    """
+    Adaptador para a coleção Chroma (langchain_chroma.Chroma)
+
+    Args:
+        vectordb: Coleção Chroma
+        manifest_path: Manifest da indexação (index_manifest.json), cuja
+            revisão é a versão dos dados
+    """
+
+    def __init__(self, vectordb, manifest_path: str):
+        self._vectordb = vectordb
+        self._manifest = Path(manifest_path)
+
+    def similarity_search_by_vector(self, embedding, k: int) -> List:
+        return self._vectordb.similarity_search_by_vector(embedding, k=k)
+
+    def get_by_ids(self, chunk_ids: List[str]) -> List:
+        from langchain_core.documents import Document
+
+        if not chunk_ids:
+            return []
+        dados = self._vectordb.get(ids=list(chunk_ids), include=["documents", "metadatas"])
+        por_id = {
+            chunk_id: Document(page_content=texto, metadata=metadata or {})
+            for chunk_id, texto, metadata in zip(dados["ids"], dados["documents"], dados["metadatas"])
+        }
+        return [por_id[chunk_id] for chunk_id in chunk_ids if chunk_id in por_id]
+
+    def versao(self) -> int:
+        # Revisão incrementada pela indexação a cada sincronização que muda
+        # a coleção. Cobre alterações feitas por outro processo (ex.:
+        # setup_rag.py rodando com a API no ar), que não passam por
+        # invalidate_vectordb, sem depender do mtime do chroma.sqlite3
+        # (escritas só no WAL, resolução do relógio do sistema de arquivos)
+        try:
+            with open(self._manifest, "rb") as f:
+                inicio = f.read(_BYTES_REVISAO)
+        except OSError:
+            return 0
+        encontrado = _REVISAO_MANIFEST.match(inicio)
+        return int(encontrado.group(1)) if encontrado else 0
+
+
+class MmapVectorStore(VectorStore):
+    """
+    Índice somente leitura em arquivos mapeados em memória
+
+    Busca = um produto matriz-vetor + np.argpartition (top-k sem ordenar N).
+    """
+
+    def __init__(self, pasta: str):
+        self._pasta = Path(pasta)
+        self._versao_aberta = _versao_atual(self._pasta)
+        if not self._versao_aberta:
+            raise FileNotFoundError(f"Índice mmap não encontrado em {pasta} (gere com: python setup_rag.py --mmap)")
+
+        dados = self._pasta / str(self._versao_aberta)
+        self._embeddings = np.load(dados / ARQUIVO_EMBEDDINGS, mmap_mode="r")
+        self._offsets = np.load(dados / ARQUIVO_OFFSETS)
+        with open(dados / ARQUIVO_CHUNKS, "rb") as f:
+            self._chunks = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._offsets[-1] else b""
+        self._linha_por_id = None
+
+    def __len__(self) -> int:
+        return len(self._embeddings)
+
+    def _registro(self, indice: int) -> dict:
+        inicio, fim = int(self._offsets[indice]), int(self._offsets[indice + 1])
+        return json.loads(self._chunks[inicio:fim])
+
+    def _documento(self, indice: int):
+        from langchain_core.documents import Document
+
+        registro = self._registro(indice)
+        return Document(page_content=registro["texto"], metadata=registro["metadata"])
+
+    def similarity_search_by_vector(self, embedding, k: int) -> List:
+        n = len(self._embeddings)
+        if n == 0 or k <= 0:
+            return []
+
+        scores = self._embeddings @ np.asarray(embedding, dtype=self._embeddings.dtype)
+        k = min(k, n)
+        melhores = np.argpartition(-scores, k - 1)[:k]
+        melhores = melhores[np.argsort(-scores[melhores])]
+        return [self._documento(int(i)) for i in melhores]
+
+    def get_by_ids(self, chunk_ids: List[str]) -> List:
+        if self._linha_por_id is None:
+            # Montado na primeira consulta por id (metadata["chunk_id"])
+            self._linha_por_id = {
+                self._registro(i)["metadata"].get("chunk_id"): i for i in range(len(self._embeddings))
+            }
+        return [self._documento(self._linha_por_id[c]) for c in chunk_ids if c in self._linha_por_id]
+
+    def versao(self) -> int:
+        return self._versao_aberta
+
+    def desatualizado(self) -> bool:
+        return _versao_atual(self._pasta) != self._versao_aberta
+
+
+def exportar_mmap(vectordb, pasta: str, lote: int = 1000) -> int:
+    """
+    Grava o conteúdo de uma coleção Chroma no formato de MmapVectorStore
+
+    Os arquivos vão para uma subpasta nova; só depois ATUAL é trocado
+    (os.replace) para apontá-la. Processos com a versão anterior mapeada
+    continuam a lê-la até reabrir; versões mais antigas são apagadas.
+
+    Args:
+        vectordb: Coleção Chroma (langchain_chroma.Chroma)
+        pasta: Pasta de destino
+        lote: Registros lidos do Chroma por chamada
+
+    Returns:
+        Número de chunks exportados (0 para uma coleção vazia, que gera um
+        índice vazio)
+    """
+    raiz = Path(pasta)
+    anterior = _versao_atual(raiz)
+    versao = max(time.time_ns(), anterior + 1)
+    destino = raiz / str(versao)
+    destino.mkdir(parents=True)
+
+    vetores, offsets = [], [0]
+    with open(destino / ARQUIVO_CHUNKS, "wb") as f:
+        inicio = 0
+        while True:
+            dados = vectordb.get(include=["embeddings", "documents", "metadatas"], limit=lote, offset=inicio)
+            if not dados["ids"]:
+                break
+            for embedding, texto, metadata in zip(dados["embeddings"], dados["documents"], dados["metadatas"]):
+                registro = json.dumps({"texto": texto, "metadata": metadata or {}}, ensure_ascii=False).encode("utf-8")
+                f.write(registro + b"\n")
+                offsets.append(offsets[-1] + len(registro) + 1)
+                vetores.append(embedding)
+            inicio += len(dados["ids"])
+
+    if vetores:
+        matriz = np.asarray(vetores, dtype=np.float32).reshape(len(vetores), -1)
+        matriz /= np.clip(np.linalg.norm(matriz, axis=1, keepdims=True), 1e-12, None)
+    else:
+        # Coleção vazia: índice vazio (0 x 0), para ATUAL não continuar
+        # apontando uma exportação anterior com chunks que já não existem
+        matriz = np.zeros((0, 0), dtype=np.float32)
+    np.save(destino / ARQUIVO_OFFSETS, np.asarray(offsets, dtype=np.int64))
+    np.save(destino / ARQUIVO_EMBEDDINGS, matriz)
+
+    temporario = raiz / (ARQUIVO_ATUAL + ".tmp")
+    temporario.write_text(str(versao))
+    os.replace(temporario, raiz / ARQUIVO_ATUAL)
+
+    # Mantém a versão anterior (pode estar aberta por algum worker)
+    for subpasta in raiz.iterdir():
+        if subpasta.is_dir() and subpasta.name.isdigit() and int(subpasta.name) not in (versao, anterior):
+            shutil.rmtree(subpasta, ignore_errors=True)
+
+    return len(vetores)
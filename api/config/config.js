@@ -14,8 +14,15 @@ module.exports = {
   PYTHON_SCRIPT: process.env.PYTHON_SCRIPT || 'run_lg_api.py',
   PYTHON_TIMEOUT: parseInt(process.env.PYTHON_TIMEOUT || '60000'), // 60 segundos
   
+  // Pool de workers Python persistentes (0 = um processo por requisição)
+  PYTHON_WORKERS: parseInt(process.env.PYTHON_WORKERS || '2'),
+  // Requisições atendidas em paralelo por worker (threads no processo Python)
+  PYTHON_WORKER_THREADS: parseInt(process.env.PYTHON_WORKER_THREADS || '1'),
+  PYTHON_WORKER_RESTART_DELAY: parseInt(process.env.PYTHON_WORKER_RESTART_DELAY || '1000'),
+  
   // API
   MAX_PAYLOAD_SIZE: process.env.MAX_PAYLOAD_SIZE || '1mb',
+  BATCH_MAX_ITEMS: parseInt(process.env.BATCH_MAX_ITEMS || '500'),
   CORS_ORIGIN: process.env.CORS_ORIGIN || '*',
   
   // Logging
@@ -2,7 +2,13 @@
  * Controller para diagnóstico IRIS
  */
 
-const { executePythonDiagnosis, PythonBridgeError } = require('../services/pythonBridge');
+const {
+  executePythonDiagnosis,
+  executePythonBatch,
+  executePythonStream,
+  getInferenceCacheStats,
+  PythonBridgeError
+} = require('../services/pythonBridge');
 
 /**
  * POST /api/diagnosis
@@ -76,6 +82,150 @@ async function processDiagnosis(req, res, next) {
   }
 }
 
+/**
+ * POST /api/diagnosis/stream
+ * Processa diagnóstico emitindo Server-Sent Events:
+ * - "node": resultado de cada agente assim que o LangGraph o produz
+ * - "result": resposta completa (mesmo formato de POST /api/diagnosis)
+ * - "error": falha no processamento
+ */
+async function processDiagnosisStream(req, res) {
+  const startTime = Date.now();
+  const { formulario, texto_livre } = req.body;
+  const development = process.env.NODE_ENV === 'development';
+
+  console.log('[DIAGNOSIS STREAM] Nova requisição:', {
+    timestamp: new Date().toISOString(),
+    sdma: formulario?.sdma,
+    creatinina: formulario?.creatinina
+  });
+
+  res.status(200);
+  res.setHeader('Content-Type', 'text/event-stream; charset=utf-8');
+  res.setHeader('Cache-Control', 'no-cache');
+  res.setHeader('Connection', 'keep-alive');
+  res.flushHeaders();
+
+  const sendEvent = (event, data) => {
+    if (!res.writableEnded) {
+      res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+    }
+  };
+
+  try {
+    const result = await executePythonStream(
+      { formulario, texto_livre: texto_livre || '' },
+      ({ event, ...data }) => sendEvent(event, data)
+    );
+
+    sendEvent('result', {
+      success: true,
+      resultado: result.resultado,
+      resposta_completa: result.resposta_completa,
+      metadata: {
+        ...result.metadata,
+        total_time_ms: Date.now() - startTime,
+        timestamp: new Date().toISOString()
+      },
+      ...(development && { dados_completos: result.dados_completos })
+    });
+
+    console.log('[DIAGNOSIS STREAM] Sucesso:', {
+      totalTime: `${Date.now() - startTime}ms`,
+      timestamp: new Date().toISOString()
+    });
+
+  } catch (error) {
+    console.error('[DIAGNOSIS STREAM] Erro:', {
+      message: error.message,
+      code: error.code,
+      timestamp: new Date().toISOString()
+    });
+
+    sendEvent('error', {
+      success: false,
+      error: error.message,
+      code: error.code,
+      ...(development && { details: error.details })
+    });
+  }
+
+  res.end();
+}
+
+/**
+ * POST /api/diagnosis/batch
+ * Processa vários pacientes e devolve um resultado por linha (NDJSON)
+ * conforme cada um fica pronto, seguido de uma linha de resumo
+ */
+async function processBatch(req, res) {
+  const startTime = Date.now();
+  const { itens } = req.body;
+  const development = process.env.NODE_ENV === 'development';
+
+  console.log('[BATCH] Nova requisição:', {
+    timestamp: new Date().toISOString(),
+    itens: itens.length
+  });
+
+  res.status(200);
+  res.setHeader('Content-Type', 'application/x-ndjson; charset=utf-8');
+  res.setHeader('Cache-Control', 'no-cache');
+  res.flushHeaders();
+
+  const writeLine = (data) => {
+    if (!res.writableEnded) {
+      res.write(JSON.stringify(data) + '\n');
+    }
+  };
+
+  try {
+    const summary = await executePythonBatch(itens, (item) => {
+      const { event, dados_completos, ...rest } = item;
+      writeLine({
+        ...rest,
+        ...(development && dados_completos && { dados_completos })
+      });
+    });
+
+    writeLine({
+      event: 'done',
+      success: true,
+      total: summary.total,
+      sucessos: summary.sucessos,
+      falhas: summary.falhas,
+      metadata: {
+        ...summary.metadata,
+        total_time_ms: Date.now() - startTime
+      }
+    });
+
+    console.log('[BATCH] Concluído:', {
+      itens: summary.total,
+      falhas: summary.falhas,
+      totalTime: `${Date.now() - startTime}ms`
+    });
+
+  } catch (error) {
+    console.error('[BATCH] Erro:', {
+      message: error.message,
+      code: error.code,
+      timestamp: new Date().toISOString()
+    });
+
+    // Cabeçalhos já enviados: o erro vai como última linha do stream
+    writeLine({
+      event: 'done',
+      success: false,
+      error: error.message,
+      code: error.code,
+      ...(development && { details: error.details })
+    });
+  }
+
+  res.end();
+}
+
 /**
  * GET /api/health
  * Health check da API
@@ -90,7 +240,28 @@ function healthCheck(req, res) {
   });
 }
 
+/**
+ * GET /api/cache/stats
+ * Contadores dos caches de cada worker (inferências do Agente B, RAG e
+ * respostas do LLM), com totais de inferências e do LLM
+ */
+async function cacheStats(req, res, next) {
+  try {
+    const stats = await getInferenceCacheStats();
+    res.json({
+      success: true,
+      ...stats,
+      timestamp: new Date().toISOString()
+    });
+  } catch (error) {
+    next(error);
+  }
+}
+
 module.exports = {
   processDiagnosis,
-  healthCheck
+  processDiagnosisStream,
+  processBatch,
+  healthCheck,
+  cacheStats
 };
@@ -3,6 +3,7 @@
  */
 
 const Joi = require('joi');
+const config = require('../config/config');
 
 // Schema de validação do formulário
 const formularioSchema = Joi.object({
@@ -25,6 +26,19 @@ const requestSchema = Joi.object({
   texto_livre: Joi.string().trim().max(1000).optional().allow('')
 });
 
+// Schema da requisição em lote
+const batchRequestSchema = Joi.object({
+  itens: Joi.array().items(requestSchema).min(1).max(config.BATCH_MAX_ITEMS).required()
+});
+
+/**
+ * Formata os erros do Joi para a resposta
+ */
+const formatValidationErrors = (error) => error.details.map(detail => ({
+  field: detail.path.join('.'),
+  message: detail.message
+}));
+
 /**
  * Middleware de validação
  */
@@ -35,15 +49,10 @@ const validateDiagnosisRequest = (req, res, next) => {
   });
 
   if (error) {
-    const errors = error.details.map(detail => ({
-      field: detail.path.join('.'),
-      message: detail.message
-    }));
-
     return res.status(400).json({
       success: false,
       error: 'Dados inválidos',
-      details: errors
+      details: formatValidationErrors(error)
     });
   }
 
@@ -57,6 +66,34 @@ const validateDiagnosisRequest = (req, res, next) => {
   next();
 };
 
+/**
+ * Middleware de validação do lote
+ */
+const validateBatchRequest = (req, res, next) => {
+  const { error, value } = batchRequestSchema.validate(req.body, {
+    abortEarly: false,
+    stripUnknown: true
+  });
+
+  if (error) {
+    return res.status(400).json({
+      success: false,
+      error: 'Dados inválidos',
+      details: formatValidationErrors(error)
+    });
+  }
+
+  // Normalizar sexo para maiúsculo
+  for (const item of value.itens) {
+    if (item.formulario.sexo) {
+      item.formulario.sexo = item.formulario.sexo.toUpperCase();
+    }
+  }
+
+  req.body = value;
+  next();
+};
+
 /**
  * Middleware de tratamento de erros
  */
@@ -97,6 +134,7 @@ const notFoundHandler = (req, res) => {
 
 module.exports = {
   validateDiagnosisRequest,
+  validateBatchRequest,
   errorHandler,
   notFoundHandler
 };
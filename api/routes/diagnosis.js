@@ -4,8 +4,14 @@
 
 const express = require('express');
 const router = express.Router();
-const { processDiagnosis, healthCheck } = require('../controllers/diagnosisController');
-const { validateDiagnosisRequest } = require('../middleware/validation');
+const {
+  processDiagnosis,
+  processDiagnosisStream,
+  processBatch,
+  healthCheck,
+  cacheStats
+} = require('../controllers/diagnosisController');
+const { validateDiagnosisRequest, validateBatchRequest } = require('../middleware/validation');
 
 /**
  * POST /api/diagnosis
@@ -13,10 +19,28 @@ const { validateDiagnosisRequest } = require('../middleware/validation');
  */
 router.post('/diagnosis', validateDiagnosisRequest, processDiagnosis);
 
+/**
+ * POST /api/diagnosis/stream
+ * Processa diagnóstico com progresso por agente (Server-Sent Events)
+ */
+router.post('/diagnosis/stream', validateDiagnosisRequest, processDiagnosisStream);
+
+/**
+ * POST /api/diagnosis/batch
+ * Processa vários pacientes; resposta em NDJSON (uma linha por paciente)
+ */
+router.post('/diagnosis/batch', validateBatchRequest, processBatch);
+
 /**
  * GET /api/health
  * Health check da API
  */
 router.get('/health', healthCheck);
 
+/**
+ * GET /api/cache/stats
+ * Estatísticas do cache de inferências (hits/misses)
+ */
+router.get('/cache/stats', cacheStats);
+
 module.exports = router;
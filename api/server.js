@@ -10,6 +10,7 @@ const express = require('express');
 const cors = require('cors');
 const config = require('./config/config');
 const diagnosisRoutes = require('./routes/diagnosis');
+const { startWorkerPool, stopWorkerPool } = require('./services/pythonBridge');
 const { errorHandler, notFoundHandler } = require('./middleware/validation');
 
 // Criar aplicação Express
@@ -47,7 +48,10 @@ app.get('/', (req, res) => {
     description: 'API para diagnóstico de Doença Renal Crônica em Gatos (DRC)',
     endpoints: {
       diagnosis: 'POST /api/diagnosis',
-      health: 'GET /api/health'
+      stream: 'POST /api/diagnosis/stream',
+      batch: 'POST /api/diagnosis/batch',
+      health: 'GET /api/health',
+      cacheStats: 'GET /api/cache/stats'
     },
     documentation: {
       diagnosis: {
@@ -102,12 +106,17 @@ function startServer() {
     console.log(`Python: ${config.PYTHON_EXECUTABLE}`);
     console.log(`Script: ${config.PYTHON_SCRIPT}`);
     console.log(`Timeout: ${config.PYTHON_TIMEOUT}ms`);
+    console.log(`Workers Python: ${config.PYTHON_WORKERS || 'desativado (um processo por requisição)'}`);
     console.log('='.repeat(70));
+
+    // Aquecer workers Python antes da primeira requisição
+    startWorkerPool();
   });
 
   // Graceful shutdown
   process.on('SIGTERM', () => {
     console.log('\n[SERVER] SIGTERM recebido, encerrando...');
+    stopWorkerPool();
     server.close(() => {
       console.log('[SERVER] Servidor encerrado');
       process.exit(0);
@@ -116,6 +125,7 @@ function startServer() {
 
   process.on('SIGINT', () => {
     console.log('\n[SERVER] SIGINT recebido, encerrando...');
+    stopWorkerPool();
     server.close(() => {
       console.log('[SERVER] Servidor encerrado');
       process.exit(0);
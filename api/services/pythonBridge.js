@@ -1,11 +1,17 @@
 /**
  * Serviço de ponte para o sistema Python
  * Executa o script Python e gerencia a comunicação via stdin/stdout
+ *
+ * Com PYTHON_WORKERS > 0 as requisições são roteadas para um pool de
+ * processos persistentes (run_lg_api.py --worker); com 0, cada requisição
+ * inicia um processo novo.
  */
 
 const { spawn } = require('child_process');
 const path = require('path');
+const readline = require('readline');
 const config = require('../config/config');
+const { PythonWorkerPool } = require('./pythonWorkerPool');
 
 // Configurar encoding UTF-8 para Windows
 const isWindows = process.platform === 'win32';
@@ -19,12 +25,241 @@ class PythonBridgeError extends Error {
   }
 }
 
+let workerPool = null;
+
+/**
+ * Inicia o pool de workers Python (chamado na inicialização do servidor)
+ */
+function startWorkerPool() {
+  if (!workerPool && config.PYTHON_WORKERS > 0) {
+    workerPool = new PythonWorkerPool(config.PYTHON_WORKERS, PythonBridgeError);
+    workerPool.start();
+  }
+  return workerPool;
+}
+
+/**
+ * Encerra o pool de workers Python
+ */
+function stopWorkerPool() {
+  if (workerPool) {
+    workerPool.shutdown();
+    workerPool = null;
+  }
+}
+
 /**
  * Executa o sistema Python multi-agente
  * @param {Object} data - Dados para enviar ao Python (formulario + texto_livre)
  * @returns {Promise<Object>} - Resultado do processamento
  */
 async function executePythonDiagnosis(data) {
+  if (config.PYTHON_WORKERS > 0) {
+    return startWorkerPool().submit(data);
+  }
+  return executePythonDiagnosisOneShot(data);
+}
+
+/**
+ * Executa o pipeline para vários pacientes, repassando cada resultado assim
+ * que fica pronto
+ * @param {Array<Object>} itens - Lista de { formulario, texto_livre }
+ * @param {Function} onItem - Callback chamado com cada evento { index, success, ... }
+ * @returns {Promise<Object>} - Resumo final { total, sucessos, falhas, metadata }
+ */
+async function executePythonBatch(itens, onItem) {
+  if (config.PYTHON_WORKERS > 0) {
+    return startWorkerPool().submitStream({ op: 'batch', itens }, onItem);
+  }
+  return executePythonEventsOneShot('--batch', { itens }, onItem);
+}
+
+/**
+ * Executa o diagnóstico emitindo o resultado de cada agente assim que o
+ * LangGraph o produz
+ * @param {Object} data - { formulario, texto_livre }
+ * @param {Function} onNode - Callback chamado com cada evento { node, elapsed_ms, data }
+ * @returns {Promise<Object>} - Resposta completa (mesmo formato de executePythonDiagnosis)
+ */
+async function executePythonStream(data, onNode) {
+  if (config.PYTHON_WORKERS > 0) {
+    return startWorkerPool().submitStream({ op: 'stream', ...data }, onNode);
+  }
+  return executePythonEventsOneShot('--stream', data, onNode);
+}
+
+/**
+ * Executa um modo com eventos (--batch/--stream) em um processo dedicado
+ * O timeout é reiniciado a cada evento recebido (tempo máximo sem progresso).
+ * @param {string} mode - Flag do run_lg_api.py ('--batch' ou '--stream')
+ * @param {Object} payload - JSON enviado pelo stdin
+ * @param {Function} onEvent - Callback para cada evento antes do "done"
+ */
+function executePythonEventsOneShot(mode, payload, onEvent) {
+  return new Promise((resolve, reject) => {
+    const startTime = Date.now();
+    const projectRoot = path.resolve(__dirname, '../..');
+    const scriptPath = path.join(projectRoot, config.PYTHON_SCRIPT);
+
+    console.log('[PYTHON] Iniciando processo:', {
+      script: scriptPath,
+      mode,
+      timestamp: new Date().toISOString()
+    });
+
+    const pythonProcess = spawn(config.PYTHON_EXECUTABLE, [scriptPath, mode], {
+      cwd: projectRoot,
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: 'utf-8',
+        PYTHONUTF8: '1'
+      }
+    });
+
+    let stderr = '';
+    let finished = false;
+    let timeout = null;
+
+    const finish = (error, result) => {
+      if (finished) return;
+      finished = true;
+      clearTimeout(timeout);
+      if (error) {
+        pythonProcess.kill('SIGTERM');
+        reject(error);
+      } else {
+        resolve(result);
+      }
+    };
+
+    const armTimeout = () => {
+      clearTimeout(timeout);
+      timeout = setTimeout(() => finish(new PythonBridgeError(
+        'Timeout: O processamento excedeu o tempo limite',
+        'TIMEOUT',
+        { timeout: config.PYTHON_TIMEOUT, elapsedTime: Date.now() - startTime }
+      )), config.PYTHON_TIMEOUT);
+    };
+    armTimeout();
+
+    const lines = readline.createInterface({ input: pythonProcess.stdout });
+    lines.on('line', (line) => {
+      if (!line.trim() || finished) return;
+
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch (error) {
+        console.error('[PYTHON] Linha inválida no stdout:', line.substring(0, 200));
+        return;
+      }
+
+      if (message.event === 'done') {
+        if (!message.success) {
+          finish(new PythonBridgeError(
+            message.error || 'Erro desconhecido no processamento',
+            'PROCESSING_ERROR',
+            { result: message, stderr }
+          ));
+        } else {
+          message.metadata = {
+            processing_time_ms: Date.now() - startTime,
+            timestamp: new Date().toISOString()
+          };
+          finish(null, message);
+        }
+      } else if (message.event) {
+        armTimeout();
+        onEvent(message);
+      }
+    });
+
+    pythonProcess.stderr.on('data', (data) => {
+      stderr = (stderr + data.toString()).slice(-4000);
+      if (config.LOG_LEVEL === 'debug') {
+        console.log('[PYTHON STDERR]', data.toString());
+      }
+    });
+
+    pythonProcess.on('error', (error) => finish(new PythonBridgeError(
+      'Falha ao executar o script Python',
+      'EXECUTION_ERROR',
+      { originalError: error.message, pythonExecutable: config.PYTHON_EXECUTABLE, scriptPath }
+    )));
+
+    pythonProcess.on('close', (code) => finish(new PythonBridgeError(
+      'Processo Python finalizado antes do fim do processamento',
+      'PYTHON_ERROR',
+      { exitCode: code, stderr }
+    )));
+
+    pythonProcess.stdin.write(JSON.stringify(payload));
+    pythonProcess.stdin.end();
+  });
+}
+
+/**
+ * Soma os contadores de um cache de vários workers
+ * @param {Object[]} caches - Estatísticas de cada worker ({entries, hits, misses})
+ * @returns {Object}
+ */
+function somarContadores(caches) {
+  const total = { entries: 0, hits: 0, misses: 0, hit_rate: 0 };
+  for (const cache of caches) {
+    total.entries += cache.entries;
+    total.hits += cache.hits;
+    total.misses += cache.misses;
+  }
+  const lookups = total.hits + total.misses;
+  total.hit_rate = lookups ? Number((total.hits / lookups).toFixed(4)) : 0;
+  return total;
+}
+
+/**
+ * Coleta as estatísticas dos caches de cada worker: inferências (Agente B),
+ * buscas RAG (Agente C) e respostas do LLM (llm_client). Cada worker tem
+ * seus próprios caches; os contadores do cache de inferências são somados
+ * em total e os do cache do LLM em llm_total.
+ * @returns {Promise<Object>}
+ */
+async function getInferenceCacheStats() {
+  if (!(config.PYTHON_WORKERS > 0)) {
+    // Processos de uma requisição só não mantêm cache entre chamadas
+    return { mode: 'one-shot', workers: [], total: null, llm_total: null };
+  }
+
+  const results = await Promise.allSettled(startWorkerPool().broadcast({ op: 'stats' }));
+  const workers = [];
+
+  for (const result of results) {
+    if (result.status !== 'fulfilled') {
+      workers.push({ error: result.reason.message, code: result.reason.code });
+      continue;
+    }
+    workers.push({
+      worker: result.value.metadata.worker,
+      pid: result.value.pid,
+      inference_cache: result.value.inference_cache,
+      rag_cache: result.value.rag_cache,
+      llm_cache: result.value.llm_cache
+    });
+  }
+
+  const respondidos = workers.filter((worker) => !worker.error);
+  return {
+    mode: 'workers',
+    workers,
+    total: somarContadores(respondidos.map((worker) => worker.inference_cache)),
+    llm_total: somarContadores(respondidos.map((worker) => worker.llm_cache).filter(Boolean))
+  };
+}
+
+/**
+ * Executa o sistema Python em um processo dedicado (um por requisição)
+ * @param {Object} data - Dados para enviar ao Python (formulario + texto_livre)
+ * @returns {Promise<Object>} - Resultado do processamento
+ */
+async function executePythonDiagnosisOneShot(data) {
   return new Promise((resolve, reject) => {
     const startTime = Date.now();
     
@@ -199,5 +434,10 @@ async function executePythonDiagnosis(data) {
 
 module.exports = {
   executePythonDiagnosis,
+  executePythonBatch,
+  executePythonStream,
+  getInferenceCacheStats,
+  startWorkerPool,
+  stopWorkerPool,
   PythonBridgeError
 };
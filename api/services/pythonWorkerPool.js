@@ -0,0 +1,391 @@
+/**
+ * Pool de processos Python persistentes (run_lg_api.py --worker)
+ * Cada worker mantém o grafo LangGraph e os recursos dos agentes carregados
+ * e atende requisições via JSON delimitado por linha (stdin/stdout)
+ *
+ * Com PYTHON_WORKER_THREADS > 1 cada worker atende até N requisições em
+ * paralelo (--threads N); as respostas são casadas pelo id do job.
+ *
+ * Requisições de lote (op: 'batch') e streaming (op: 'stream') recebem vários
+ * eventos ("item", "node") com o mesmo id antes do evento "done" final.
+ */
+
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+const config = require('../config/config');
+
+class PythonWorker {
+  constructor(workerId, pool) {
+    this.workerId = workerId;
+    this.pool = pool;
+    this.process = null;
+    this.ready = false;
+    this.alive = false;
+    this.jobs = new Map();
+    this.capacity = 1;
+    this.stderrTail = '';
+  }
+
+  start() {
+    const projectRoot = path.resolve(__dirname, '../..');
+    const scriptPath = path.join(projectRoot, config.PYTHON_SCRIPT);
+
+    console.log('[PYTHON POOL] Iniciando worker:', {
+      worker: this.workerId,
+      script: scriptPath,
+      python: config.PYTHON_EXECUTABLE
+    });
+
+    // Nota: NÃO usar shell: true, pois quebra caminhos com espaços
+    const args = [scriptPath, '--worker', '--threads', String(config.PYTHON_WORKER_THREADS)];
+    this.process = spawn(config.PYTHON_EXECUTABLE, args, {
+      cwd: projectRoot,
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: 'utf-8',
+        PYTHONUTF8: '1'
+      }
+    });
+    this.alive = true;
+
+    const lines = readline.createInterface({ input: this.process.stdout });
+    lines.on('line', (line) => this._handleLine(line));
+
+    this.process.stderr.on('data', (data) => {
+      const text = data.toString();
+      // Guardar apenas o final do stderr para diagnóstico de falhas
+      this.stderrTail = (this.stderrTail + text).slice(-4000);
+      if (config.LOG_LEVEL === 'debug') {
+        console.log(`[PYTHON WORKER ${this.workerId} STDERR]`, text);
+      }
+    });
+
+    this.process.on('error', (error) => {
+      console.error(`[PYTHON POOL] Erro no worker ${this.workerId}:`, error.message);
+      this._handleExit(null, error);
+    });
+
+    this.process.on('exit', (code, signal) => this._handleExit(code, null, signal));
+  }
+
+  get available() {
+    return this.alive && this.ready && this.jobs.size < this.capacity;
+  }
+
+  run(job) {
+    this.jobs.set(job.id, job);
+    job.worker = this;
+    job.dispatchTime = Date.now();
+
+    const line = JSON.stringify({ id: job.id, ...job.data }) + '\n';
+    this.process.stdin.write(line, 'utf8', (error) => {
+      if (error && this.jobs.get(job.id) === job) {
+        clearTimeout(job.timer);
+        this.jobs.delete(job.id);
+        job.reject(new this.pool.ErrorClass(
+          'Erro ao enviar dados para o processo Python',
+          'STDIN_ERROR',
+          { originalError: error.message, worker: this.workerId }
+        ));
+        this.kill();
+      }
+    });
+
+    if (config.LOG_LEVEL === 'debug') {
+      console.log(`[PYTHON WORKER ${this.workerId}] Dados enviados:`, line.trim());
+    }
+  }
+
+  kill() {
+    if (this.alive && this.process) {
+      this.process.kill('SIGTERM');
+    }
+  }
+
+  _handleLine(line) {
+    if (!line.trim()) return;
+
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (error) {
+      console.error(`[PYTHON WORKER ${this.workerId}] Linha inválida no stdout:`, line.substring(0, 200));
+      return;
+    }
+
+    if (message.event === 'ready') {
+      this.ready = true;
+      // O worker informa quantas requisições atende em paralelo
+      this.capacity = Math.max(1, message.threads || 1);
+      console.log(`[PYTHON POOL] Worker ${this.workerId} pronto (pid ${message.pid}, ${this.capacity} thread(s))`);
+      this.pool._dispatch();
+      return;
+    }
+
+    const job = this.jobs.get(message.id);
+    if (!job) {
+      // Resposta de um job que já expirou
+      return;
+    }
+
+    // Evento intermediário (lote/streaming): repassar e reiniciar o timeout
+    if (message.event && message.event !== 'done') {
+      delete message.id;
+      this.pool._armTimer(job);
+      if (job.onEvent) job.onEvent(message);
+      return;
+    }
+
+    clearTimeout(job.timer);
+    this.jobs.delete(job.id);
+    delete message.id;
+
+    const processingTime = Date.now() - job.dispatchTime;
+
+    if (!message.success) {
+      job.reject(new this.pool.ErrorClass(
+        message.error || 'Erro desconhecido no processamento',
+        'PROCESSING_ERROR',
+        { result: message, worker: this.workerId }
+      ));
+    } else {
+      message.metadata = {
+        processing_time_ms: processingTime,
+        queue_time_ms: job.dispatchTime - job.startTime,
+        worker: this.workerId,
+        timestamp: new Date().toISOString()
+      };
+      job.resolve(message);
+    }
+
+    this.pool._dispatch();
+  }
+
+  _handleExit(code, error, signal) {
+    if (!this.alive) return;
+    this.alive = false;
+    this.ready = false;
+
+    console.log('[PYTHON POOL] Worker finalizado:', {
+      worker: this.workerId,
+      exitCode: code,
+      signal
+    });
+
+    const jobs = [...this.jobs.values()];
+    this.jobs.clear();
+    for (const job of jobs) {
+      clearTimeout(job.timer);
+      job.reject(new this.pool.ErrorClass(
+        'Processo Python finalizado durante o processamento',
+        error ? 'EXECUTION_ERROR' : 'PYTHON_ERROR',
+        {
+          exitCode: code,
+          signal,
+          originalError: error && error.message,
+          stderr: this.stderrTail,
+          worker: this.workerId
+        }
+      ));
+    }
+
+    this.pool._onWorkerExit(this);
+  }
+}
+
+class PythonWorkerPool {
+  /**
+   * @param {number} size - Número de processos Python persistentes
+   * @param {Function} ErrorClass - Classe de erro (PythonBridgeError)
+   */
+  constructor(size, ErrorClass) {
+    this.size = size;
+    this.ErrorClass = ErrorClass;
+    this.workers = [];
+    this.queue = [];
+    this.nextJobId = 1;
+    this.nextWorkerId = 1;
+    this.closed = false;
+  }
+
+  start() {
+    for (let i = 0; i < this.size; i++) {
+      this._spawnWorker();
+    }
+  }
+
+  /**
+   * Enfileira uma requisição e resolve com a resposta do worker
+   * @param {Object} data - { formulario, texto_livre }
+   * @returns {Promise<Object>}
+   */
+  submit(data) {
+    return this._enqueue(data, null);
+  }
+
+  /**
+   * Enfileira uma requisição com eventos intermediários (lote ou streaming);
+   * cada evento antes do "done" é repassado a onEvent
+   * O timeout é reiniciado a cada evento (tempo máximo sem progresso).
+   * @param {Object} data - { op: 'batch', itens: [...] } ou { op: 'stream', formulario, texto_livre }
+   * @param {Function} onEvent - Callback chamado para cada evento intermediário
+   * @returns {Promise<Object>} - Evento "done" final
+   */
+  submitStream(data, onEvent) {
+    return this._enqueue(data, null, onEvent);
+  }
+
+  /**
+   * Envia a mesma requisição a cada worker ativo (ex.: coleta de estatísticas)
+   * @param {Object} data - Requisição do protocolo worker (ex.: { op: 'stats' })
+   * @returns {Array<Promise<Object>>} - Uma promise por worker
+   */
+  broadcast(data) {
+    return this.workers
+      .filter((w) => w.alive)
+      .map((worker) => this._enqueue(data, worker));
+  }
+
+  _enqueue(data, target, onEvent = null) {
+    if (this.closed) {
+      return Promise.reject(new this.ErrorClass(
+        'Pool de workers Python encerrado',
+        'EXECUTION_ERROR',
+        {}
+      ));
+    }
+
+    return new Promise((resolve, reject) => {
+      const job = {
+        id: String(this.nextJobId++),
+        data,
+        resolve,
+        reject,
+        startTime: Date.now(),
+        worker: null,
+        target,
+        onEvent
+      };
+
+      // Timeout cobre fila + processamento
+      this._armTimer(job);
+
+      this.queue.push(job);
+      this._dispatch();
+    });
+  }
+
+  shutdown() {
+    this.closed = true;
+    for (const job of this.queue.splice(0)) {
+      clearTimeout(job.timer);
+      job.reject(new this.ErrorClass('Pool de workers Python encerrado', 'EXECUTION_ERROR', {}));
+    }
+    for (const worker of this.workers) {
+      worker.kill();
+    }
+  }
+
+  stats() {
+    return {
+      size: this.size,
+      ready: this.workers.filter((w) => w.ready).length,
+      busy: this.workers.filter((w) => w.jobs.size > 0).length,
+      running: this.workers.reduce((total, w) => total + w.jobs.size, 0),
+      capacity: this.workers.reduce((total, w) => total + (w.ready ? w.capacity : 0), 0),
+      queued: this.queue.length
+    };
+  }
+
+  _armTimer(job) {
+    clearTimeout(job.timer);
+    job.timer = setTimeout(() => this._onTimeout(job), config.PYTHON_TIMEOUT);
+  }
+
+  _spawnWorker() {
+    const worker = new PythonWorker(this.nextWorkerId++, this);
+    this.workers.push(worker);
+    worker.start();
+  }
+
+  _dispatch() {
+    let i = 0;
+    while (i < this.queue.length) {
+      const job = this.queue[i];
+      // Jobs com target só podem rodar no worker indicado
+      const worker = job.target
+        ? (job.target.available ? job.target : null)
+        : this._leastLoaded();
+
+      if (!worker) {
+        if (!job.target) return;
+        i++;
+        continue;
+      }
+
+      this.queue.splice(i, 1);
+      worker.run(job);
+    }
+  }
+
+  _leastLoaded() {
+    let best = null;
+    for (const worker of this.workers) {
+      if (worker.available && (!best || worker.jobs.size < best.jobs.size)) {
+        best = worker;
+      }
+    }
+    return best;
+  }
+
+  _onTimeout(job) {
+    const queued = this.queue.indexOf(job);
+    if (queued !== -1) {
+      this.queue.splice(queued, 1);
+    }
+
+    job.reject(new this.ErrorClass(
+      'Timeout: O processamento excedeu o tempo limite',
+      'TIMEOUT',
+      {
+        timeout: config.PYTHON_TIMEOUT,
+        elapsedTime: Date.now() - job.startTime,
+        worker: job.worker && job.worker.workerId
+      }
+    ));
+
+    // Worker travado: encerrar, o pool recria outro (outros jobs em
+    // andamento nele são rejeitados na saída do processo)
+    if (job.worker && job.worker.jobs.get(job.id) === job) {
+      job.worker.jobs.delete(job.id);
+      job.worker.kill();
+    }
+  }
+
+  _onWorkerExit(worker) {
+    this.workers = this.workers.filter((w) => w !== worker);
+
+    // Jobs destinados a este worker não têm mais onde rodar
+    for (const job of this.queue.filter((j) => j.target === worker)) {
+      this.queue.splice(this.queue.indexOf(job), 1);
+      clearTimeout(job.timer);
+      job.reject(new this.ErrorClass(
+        'Processo Python finalizado antes do processamento',
+        'PYTHON_ERROR',
+        { worker: worker.workerId }
+      ));
+    }
+
+    if (!this.closed) {
+      // Pequeno atraso para não entrar em loop se o Python falhar ao iniciar
+      setTimeout(() => {
+        if (!this.closed) this._spawnWorker();
+      }, config.PYTHON_WORKER_RESTART_DELAY);
+    }
+  }
+}
+
+module.exports = {
+  PythonWorkerPool
+};
@@ -0,0 +1,149 @@
+"""
+Benchmark de Tempo de Importação - Multi-Agent IRIS System
+===========================================================
+Mede o custo de importação dos módulos do caminho de consulta com
+`python -X importtime`, cada um em um processo limpo, e lista os
+pacotes mais caros. Serve para detectar regressões (ex.: um import de
+torch/transformers voltando para o topo de um módulo).
+
+Uso:
+    python benchmark_import_time.py
+    python benchmark_import_time.py --top 15 --limite-ms 1000
+    python benchmark_import_time.py --modulos Agent_C.agent_c Agent_C.agent_c_db
+
+Com --limite-ms o script termina com código 1 se algum módulo exceder o
+limite (útil em CI).
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos carregados ao atender uma requisição (run_lg_api.py)
+MODULOS_PADRAO = [
+    "log_config",
+    "lg_states",
+    "lg_nodes",
+    "Agent_A.agente_A",
+    "Agent_B.agente_b",
+    "Agent_C.agent_c",
+    "Agent_C.agent_c_db",
+    "run_lg_api",
+]
+
+# Pacotes que não devem aparecer no caminho de consulta
+PACOTES_SUSPEITOS = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_community",
+    "langchain_text_splitters",
+    "requests",
+)
+
+# Linha do -X importtime: "import time:   self [us] | cumulative | imported package"
+_LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+
+def medir_importacao(modulo: str) -> Tuple[float, List[Tuple[str, int, int]], str]:
+    """
+    Importa o módulo em um processo novo com -X importtime
+
+    Args:
+        modulo: Nome do módulo (ex.: "Agent_C.agent_c")
+
+    Returns:
+        (tempo total em ms, [(pacote, self_us, cumulativo_us)], erro ou "")
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+
+    entradas = []
+    total_us = 0
+    for linha in proc.stderr.splitlines():
+        m = _LINHA.match(linha)
+        if not m:
+            continue
+        self_us, cumulativo_us, recuo, pacote = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4).strip()
+        entradas.append((pacote, self_us, cumulativo_us))
+        # Entradas de nível superior (recuo de um espaço) somam o total
+        if len(recuo) == 1:
+            total_us += cumulativo_us
+
+    erro = ""
+    if proc.returncode != 0:
+        ultimas = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        erro = ultimas[-1] if ultimas else f"código de saída {proc.returncode}"
+
+    return total_us / 1000, entradas, erro
+
+
+def pacotes_suspeitos(entradas: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Pacotes pesados importados (nome de topo → tempo cumulativo em us)"""
+    encontrados = {}
+    for pacote, _, cumulativo_us in entradas:
+        raiz = pacote.split(".")[0]
+        if raiz in PACOTES_SUSPEITOS and pacote == raiz:
+            encontrados[raiz] = cumulativo_us
+    return encontrados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de importação (-X importtime)")
+    parser.add_argument("--modulos", nargs="+", default=MODULOS_PADRAO, help="Módulos a medir")
+    parser.add_argument("--top", type=int, default=10, help="Pacotes mais caros listados por módulo")
+    parser.add_argument("--limite-ms", type=float, default=None, help="Falha se algum módulo exceder o limite")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK DE IMPORTAÇÃO (python -X importtime)")
+    print("=" * 70)
+
+    resumo = []
+    for modulo in args.modulos:
+        total_ms, entradas, erro = medir_importacao(modulo)
+        resumo.append((modulo, total_ms, erro))
+
+        print(f"\n📦 {modulo}: {total_ms:.1f} ms")
+        if erro:
+            print(f"   ⚠️ Importação falhou: {erro}")
+
+        mais_caros = sorted(entradas, key=lambda e: e[2], reverse=True)[:args.top]
+        for pacote, self_us, cumulativo_us in mais_caros:
+            print(f"   {cumulativo_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {pacote}")
+
+        suspeitos = pacotes_suspeitos(entradas)
+        for pacote, cumulativo_us in suspeitos.items():
+            print(f"   ❗ {pacote} importado no caminho de consulta ({cumulativo_us / 1000:.1f} ms)")
+
+    print("\n" + "=" * 70)
+    print(f"{'Módulo':<30} {'Tempo (ms)':>12}")
+    print("-" * 70)
+    excedeu = False
+    for modulo, total_ms, erro in resumo:
+        marca = ""
+        if args.limite_ms is not None and total_ms > args.limite_ms:
+            marca = "  ← acima do limite"
+            excedeu = True
+        if erro:
+            marca += "  (erro)"
+        print(f"{modulo:<30} {total_ms:>12.1f}{marca}")
+    print("=" * 70)
+
+    sys.exit(1 if excedeu else 0)
+
+
+if __name__ == "__main__":
+    main()
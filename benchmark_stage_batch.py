@@ -0,0 +1,153 @@
+"""
+Benchmark de Estadiamento em Lote - Multi-Agent IRIS System
+============================================================
+Mede a vazão de Agent_B.agente_b.stage_batch (estadiamento vetorizado) e
+compara com a função escalar classificar_estagio_iris_com_validacao.
+
+1. Gera painéis sintéticos (com valores ausentes e valores exatamente nos
+   cortes IRIS)
+2. Confere, em uma amostra, que stage_batch reproduz a função escalar e os
+   subestágios AP/HT linha a linha
+3. Mede o tempo de stage_batch e da função escalar e reporta linhas/s e
+   tempo por milhão de linhas
+
+Uso:
+    python benchmark_stage_batch.py
+    python benchmark_stage_batch.py --linhas 5000000 --repeticoes 5
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_config import configurar_logging
+from Agent_B.agente_b import (
+    stage_batch,
+    classificar_estagio_iris_com_validacao,
+    _classificar_subestagio_proteinuria,
+    _classificar_subestagio_hipertensao,
+)
+
+# Valores exatamente sobre os cortes (onde < e <= fazem diferença)
+BORDAS_CREATININA = [1.6, 2.8, 2.85, 2.9, 5.0]
+BORDAS_SDMA = [18.0, 25.0, 25.5, 26.0, 38.0]
+BORDAS_UPC = [0.2, 0.4]
+BORDAS_PRESSAO = [140.0, 160.0, 180.0]
+
+
+def gerar_paineis(n: int, semente: int = 42):
+    """Painéis sintéticos: uniformes nas faixas clínicas, ~5% ausentes, ~5% nas bordas"""
+    rng = np.random.default_rng(semente)
+
+    def coluna(baixo, alto, bordas):
+        valores = rng.uniform(baixo, alto, n).round(2)
+        borda = rng.random(n) < 0.05
+        valores[borda] = rng.choice(bordas, borda.sum())
+        valores[rng.random(n) < 0.05] = np.nan
+        return valores
+
+    return (
+        coluna(0.5, 8.0, BORDAS_CREATININA),
+        coluna(8.0, 60.0, BORDAS_SDMA),
+        coluna(0.0, 1.5, BORDAS_UPC),
+        coluna(100.0, 220.0, BORDAS_PRESSAO),
+    )
+
+
+def _opcional(valor):
+    return None if np.isnan(valor) else float(valor)
+
+
+def verificar_equivalencia(creat, sdma, upc, pressao, amostra: int) -> int:
+    """Compara stage_batch com as funções escalares; retorna o número de divergências"""
+    lote = stage_batch(creat[:amostra], sdma[:amostra], upc[:amostra], pressao[:amostra])
+
+    divergencias = 0
+    for i in range(amostra):
+        c, s, u, p = (_opcional(v[i]) for v in (creat, sdma, upc, pressao))
+        estagio, valido, _ = classificar_estagio_iris_com_validacao(c, s)
+        esperado = (
+            int(estagio[-1]) if estagio else 0,
+            valido,
+            _classificar_subestagio_proteinuria(u),
+            _classificar_subestagio_hipertensao(p),
+        )
+        obtido = (
+            int(lote["estagio"][i]),
+            bool(lote["valido"][i]),
+            lote["subestagio_ap"][i],
+            lote["subestagio_ht"][i],
+        )
+        if esperado != obtido:
+            divergencias += 1
+            if divergencias <= 5:
+                print(f"   ❌ creat={c} sdma={s} upc={u} pa={p}: esperado {esperado}, obtido {obtido}")
+    return divergencias
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de stage_batch")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--amostra-escalar", type=int, default=50_000,
+                        help="Linhas usadas na conferência e no tempo da função escalar")
+    args = parser.parse_args()
+
+    # A função escalar registra cada painel; silenciar para medir só o cálculo
+    configurar_logging(nivel="ERROR")
+
+    print("=" * 70)
+    print("BENCHMARK DE ESTADIAMENTO EM LOTE (stage_batch)")
+    print("=" * 70)
+
+    creat, sdma, upc, pressao = gerar_paineis(args.linhas)
+    amostra = min(args.amostra_escalar, args.linhas)
+
+    print(f"\n🔍 Conferindo {amostra} linhas contra a função escalar...")
+    divergencias = verificar_equivalencia(creat, sdma, upc, pressao, amostra)
+    print(f"   {'✅' if divergencias == 0 else '❌'} {divergencias} divergência(s)")
+
+    t_lote = medir(lambda: stage_batch(creat, sdma, upc, pressao), args.repeticoes)
+
+    def escalar():
+        for i in range(amostra):
+            c, s, u, p = (_opcional(v[i]) for v in (creat, sdma, upc, pressao))
+            classificar_estagio_iris_com_validacao(c, s)
+            _classificar_subestagio_proteinuria(u)
+            _classificar_subestagio_hipertensao(p)
+
+    t_escalar = medir(escalar, 1)
+
+    vazao_lote = args.linhas / t_lote
+    vazao_escalar = amostra / t_escalar
+
+    print(f"\n{'Método':<32} {'linhas/s':>14} {'s / milhão':>12}")
+    print("-" * 70)
+    print(f"{'stage_batch (NumPy)':<32} {vazao_lote:>14,.0f} {1e6 / vazao_lote:>12.3f}")
+    print(f"{'classificar_... (escalar)':<32} {vazao_escalar:>14,.0f} {1e6 / vazao_escalar:>12.3f}")
+    print("-" * 70)
+    print(f"Aceleração: {vazao_lote / vazao_escalar:.0f}x  ({args.linhas:,} linhas, melhor de {args.repeticoes})")
+    print("=" * 70)
+
+    sys.exit(0 if divergencias == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
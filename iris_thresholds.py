@@ -0,0 +1,159 @@
+"""
+Tabela de Cortes IRIS - Fonte Única para Todos os Agentes
+---------------------------------------------------------
+Estadiamento da DRC felina (creatinina, SDMA) e subestadiamento
+(proteinúria AP, hipertensão HT) por busca binária em vetores ordenados de
+cortes: classe = número de cortes <= valor (bisect_right).
+
+Cortes cujo valor pertence à classe de baixo (ex.: creatinina 5.0 ainda é
+IRIS 3) são guardados como o próximo float acima (math.nextafter), para que
+todas as tabelas usem a mesma regra de busca. As faixas são contínuas:
+valores entre as faixas publicadas (ex.: creatinina 2.85, SDMA 25.5) ficam
+no estágio inferior. Valores não finitos (NaN, ±inf) não são medidas e não
+recebem classe, como os ausentes.
+
+    Creatinina (mg/dL): IRIS 1 < 1.6 | 2: 1.6–2.8 | 3: 2.9–5.0 | 4: > 5.0
+    SDMA (µg/dL):       IRIS 1 < 18  | 2: 18–25   | 3: 26–38   | 4: > 38
+    UPC:                AP0 < 0.2    | AP1: 0.2–0.4 | AP2: > 0.4
+    Pressão (mmHg):     HT0 < 140    | HT1: 140–159 | HT2: 160–179 | HT3: >= 180
+
+estagiar_lote() aplica as mesmas tabelas a vetores NumPy (np.searchsorted),
+para estadiar muitos painéis em uma única chamada.
+"""
+
+import math
+from bisect import bisect_right
+from typing import Optional, Tuple, Dict, Any, Sequence
+
+
+def _acima_de(valor: float) -> float:
+    """Corte em que o próprio valor ainda pertence à classe de baixo"""
+    return math.nextafter(valor, math.inf)
+
+
+# =====================================================================
+# TABELAS (ordenadas)
+# =====================================================================
+CORTES_CREATININA = (1.6, 2.9, _acima_de(5.0))
+CORTES_SDMA = (18.0, 26.0, _acima_de(38.0))
+CORTES_UPC = (0.2, _acima_de(0.4))
+CORTES_PRESSAO = (140.0, 160.0, 180.0)
+
+SUBESTAGIOS_AP = ("AP0", "AP1", "AP2")
+SUBESTAGIOS_HT = ("HT0", "HT1", "HT2", "HT3")
+
+# Discrepância máxima aceita entre creatinina e SDMA (usa-se o maior estágio)
+DISCREPANCIA_MAXIMA = 1
+
+
+# =====================================================================
+# CONSULTAS ESCALARES
+# =====================================================================
+def _classe(cortes: Sequence[float], valor: Optional[float]) -> Optional[int]:
+    # NaN não é menor que nenhum corte e cairia na última classe (IRIS 4)
+    if valor is None or not math.isfinite(valor):
+        return None
+    return bisect_right(cortes, valor)
+
+
+def estagio_creatinina(creat: Optional[float]) -> Optional[int]:
+    """Estágio IRIS (1-4) indicado pela creatinina, ou None"""
+    classe = _classe(CORTES_CREATININA, creat)
+    return None if classe is None else classe + 1
+
+
+def estagio_sdma(sdma: Optional[float]) -> Optional[int]:
+    """Estágio IRIS (1-4) indicado pelo SDMA, ou None"""
+    classe = _classe(CORTES_SDMA, sdma)
+    return None if classe is None else classe + 1
+
+
+def subestagio_ap(upc: Optional[float]) -> Optional[str]:
+    """Subestágio de proteinúria (AP0, AP1, AP2), ou None"""
+    classe = _classe(CORTES_UPC, upc)
+    return None if classe is None else SUBESTAGIOS_AP[classe]
+
+
+def subestagio_ht(pressao: Optional[float]) -> Optional[str]:
+    """Subestágio de hipertensão (HT0-HT3), ou None"""
+    classe = _classe(CORTES_PRESSAO, pressao)
+    return None if classe is None else SUBESTAGIOS_HT[classe]
+
+
+def combinar_estagios(
+    stage_creat: Optional[int],
+    stage_sdma: Optional[int]
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Aplica a regra IRIS de combinação dos dois biomarcadores
+
+    Returns:
+        (estagio, discrepancia)
+        - estagio: maior estágio se a discrepância for <= 1; o estágio
+          disponível se houver só um biomarcador; None se nenhum ou se a
+          discrepância for >= 2
+        - discrepancia: diferença entre os estágios (None sem os dois)
+    """
+    if stage_creat is None or stage_sdma is None:
+        return (stage_creat if stage_creat is not None else stage_sdma), None
+
+    discrepancia = abs(stage_creat - stage_sdma)
+    if discrepancia > DISCREPANCIA_MAXIMA:
+        return None, discrepancia
+    return max(stage_creat, stage_sdma), discrepancia
+
+
+# =====================================================================
+# VERSÃO VETORIZADA (NumPy)
+# =====================================================================
+def estagiar_lote(creatinina, sdma, upc=None, pressao=None) -> Dict[str, Any]:
+    """
+    Estadia vetores de painéis em uma única chamada
+
+    Args:
+        creatinina, sdma, upc, pressao: Sequências de mesmo tamanho; valores
+            ausentes como None ou NaN (upc/pressao opcionais); ±inf também
+            fica sem classe
+
+    Returns:
+        Dict de arrays NumPy (um elemento por painel):
+        - estagio_creatinina, estagio_sdma: 1-4, 0 se ausente ou não finito
+        - discrepancia: diferença entre os estágios, -1 sem os dois
+        - estagio: estágio combinado, 0 se não classificável
+        - valido: True se o painel pôde ser classificado
+        - subestagio_ap, subestagio_ht: índice em SUBESTAGIOS_AP/HT, -1 se
+          ausente ou não finito
+    """
+    import numpy as np
+
+    def _vetor(valores):
+        # dtype float converte None em NaN sem laço em Python
+        return np.asarray(valores, dtype=float)
+
+    def _classes(cortes, valores):
+        valores = _vetor(valores)
+        classes = np.searchsorted(np.asarray(cortes), valores, side="right")
+        return np.where(np.isfinite(valores), classes, -1)
+
+    creat_cls = _classes(CORTES_CREATININA, creatinina)
+    sdma_cls = _classes(CORTES_SDMA, sdma)
+
+    stage_creat = creat_cls + 1
+    stage_sdma = sdma_cls + 1
+    ambos = (stage_creat > 0) & (stage_sdma > 0)
+
+    discrepancia = np.where(ambos, np.abs(stage_creat - stage_sdma), -1)
+    estagio = np.maximum(stage_creat, stage_sdma)
+    estagio = np.where(ambos & (discrepancia > DISCREPANCIA_MAXIMA), 0, estagio)
+
+    n = len(stage_creat)
+    vazio = np.full(n, -1)
+    return {
+        "estagio_creatinina": stage_creat,
+        "estagio_sdma": stage_sdma,
+        "discrepancia": discrepancia,
+        "estagio": estagio,
+        "valido": estagio > 0,
+        "subestagio_ap": vazio if upc is None else _classes(CORTES_UPC, upc),
+        "subestagio_ht": vazio if pressao is None else _classes(CORTES_PRESSAO, pressao),
+    }
@@ -7,23 +7,30 @@ A (entrada) -> B (ontologia) -> C (RAG/IRIS) -> A (formatação final)
 CORREÇÕES:
 - Node C agora recebe inference_result completo de B
 - Node A_saida usa consolidar_resultados() corretamente
+
+Versões assíncronas (anode_*): B e a busca RAG rodam em paralelo
+(A -> [B || busca_rag] -> C -> A); o trabalho bloqueante vai para threads.
 """
 
+import asyncio
+from typing import Dict, Any, Optional
+
 from lg_states import MASState
+from log_config import get_logger, log_banner
+
+logger = get_logger(__name__)
 
 
 # =====================================================================
 # NODE 1 - AGENTE A (ENTRADA)
 # =====================================================================
 def node_agente_a_entrada(state: MASState) -> MASState:
-    print("\n" + "="*70)
-    print("🟦 AGENTE A - ENTRADA")
-    print("="*70)
+    log_banner(logger, "🟦 AGENTE A - ENTRADA")
 
     try:
         from Agent_A.agente_A import processar_input_usuario
     except ImportError as e:
-        print(f"[ERRO A] {e}")
+        logger.error("[ERRO A] %s", e)
         state.final_answer = "❌ Erro ao importar Agente A"
         return state
 
@@ -33,48 +40,42 @@ def node_agente_a_entrada(state: MASState) -> MASState:
             texto_livre=state.user_input
         )
     except Exception as e:
-        print(f"[ERRO A] Falha no processamento: {e}")
+        logger.error("[ERRO A] Falha no processamento: %s", e)
         state.final_answer = "❌ Erro ao processar dados"
         state.clinical_data = {}
         return state
 
     # Validação mínima
     if not clinical_data.get("creatinina") and not clinical_data.get("sdma"):
-        print("[AGENTE A] ⚠️ Sem creatinina ou SDMA - continuando...")
+        logger.warning("[AGENTE A] ⚠️ Sem creatinina ou SDMA - continuando...")
     
     state.clinical_data = clinical_data
-    print(f"[AGENTE A] ✅ Dados processados: creat={clinical_data.get('creatinina')}, sdma={clinical_data.get('sdma')}")
+    logger.info("[AGENTE A] ✅ Dados processados: creat=%s, sdma=%s", clinical_data.get('creatinina'), clinical_data.get('sdma'))
     return state
 
 
 # =====================================================================
 # NODE 2 - AGENTE B (INFERÊNCIA)
 # =====================================================================
-def node_agente_b(state: MASState) -> MASState:
-    print("\n" + "="*70)
-    print("🟨 AGENTE B - ONTOLOGIA")
-    print("="*70)
-
+def _executar_agente_b(clinical_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Inferência do Agente B (compartilhada pelos nodes síncrono e assíncrono)"""
     try:
         from Agent_B.agente_b import handle_inference
     except ImportError as e:
-        print(f"[ERRO B] {e}")
-        state.inference_result = {
+        logger.error("[ERRO B] %s", e)
+        return {
             "estagio": None,
             "reasoner_ok": False,
             "classificacao_valida": False,
             "motivo_invalido": "Erro ao importar Agente B"
         }
-        return state
 
     try:
-        result = handle_inference(state.clinical_data)
-        print(f"[AGENTE B] ✅ Inferência: {result.get('estagio')}")
-        print(f"[AGENTE B] Classificação válida: {result.get('classificacao_valida')}")
+        result = handle_inference(clinical_data)
+        logger.info("[AGENTE B] ✅ Inferência: %s", result.get('estagio'))
+        logger.info("[AGENTE B] Classificação válida: %s", result.get('classificacao_valida'))
     except Exception as e:
-        print(f"[ERRO B] Falha inferência: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[ERRO B] Falha inferência: %s", e)
         result = {
             "estagio": None,
             "reasoner_ok": False,
@@ -82,7 +83,12 @@ def node_agente_b(state: MASState) -> MASState:
             "motivo_invalido": str(e)
         }
 
-    state.inference_result = result
+    return result
+
+
+def node_agente_b(state: MASState) -> MASState:
+    log_banner(logger, "🟨 AGENTE B - ONTOLOGIA")
+    state.inference_result = _executar_agente_b(state.clinical_data)
     return state
 
 
@@ -90,14 +96,12 @@ def node_agente_b(state: MASState) -> MASState:
 # NODE 3 - AGENTE C (RAG / VALIDAÇÃO)
 # =====================================================================
 def node_agente_c(state: MASState) -> MASState:
-    print("\n" + "="*70)
-    print("🟩 AGENTE C - RAG / IRIS")
-    print("="*70)
+    log_banner(logger, "🟩 AGENTE C - RAG / IRIS")
 
     try:
         from Agent_C.agent_c import agent_c_answer
     except ImportError as e:
-        print(f"[ERRO C] {e}")
+        logger.error("[ERRO C] %s", e)
         state.validated_result = {
             "caso": 4,
             "estagio_final": None,
@@ -112,17 +116,16 @@ def node_agente_c(state: MASState) -> MASState:
         validated = agent_c_answer(
             resultado_b=state.inference_result,  # Inclui classificacao_valida e motivo_invalido
             clinical_data=state.clinical_data,
-            pergunta=state.user_input or ""
+            pergunta=state.user_input or "",
+            rag_result=state.rag_result
         )
         
         caso = validated.get("caso", "?")
         estagio = validated.get("estagio_final", "N/A")
-        print(f"[AGENTE C] ✅ Validação concluída - CASO {caso}, Estágio: {estagio}")
+        logger.info("[AGENTE C] ✅ Validação concluída - CASO %s, Estágio: %s", caso, estagio)
         
     except Exception as e:
-        print(f"[ERRO C] Falha no RAG: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[ERRO C] Falha no RAG: %s", e)
         validated = {
             "caso": 4,
             "estagio_final": None,
@@ -139,14 +142,12 @@ def node_agente_c(state: MASState) -> MASState:
 # NODE 4 - AGENTE A (SAÍDA) - CORRIGIDO
 # =====================================================================
 def node_agente_a_saida(state: MASState) -> MASState:
-    print("\n" + "="*70)
-    print("🟦 AGENTE A - SAÍDA")
-    print("="*70)
+    log_banner(logger, "🟦 AGENTE A - SAÍDA")
 
     try:
         from Agent_A.agente_A import consolidar_resultados, formatar_resposta_final
     except ImportError as e:
-        print(f"[ERRO A SAÍDA] {e}")
+        logger.error("[ERRO A SAÍDA] %s", e)
         state.final_answer = "❌ Erro ao importar formatadores do Agente A"
         return state
 
@@ -158,24 +159,88 @@ def node_agente_a_saida(state: MASState) -> MASState:
             dados_clinicos=state.clinical_data
         )
         
-        print(f"[AGENTE A] Resultado consolidado:")
-        print(f"  • Estágio final: {resultado_consolidado.get('estagio_final')}")
-        print(f"  • Confiança: {resultado_consolidado.get('confianca')}")
-        print(f"  • Caso: {resultado_consolidado.get('caso')}")
+        logger.info("[AGENTE A] Resultado consolidado:")
+        logger.info("  • Estágio final: %s", resultado_consolidado.get('estagio_final'))
+        logger.info("  • Confiança: %s", resultado_consolidado.get('confianca'))
+        logger.info("  • Caso: %s", resultado_consolidado.get('caso'))
         
         # Formatar para apresentação (incluindo dados clínicos)
         resposta_final = formatar_resposta_final(resultado_consolidado, state.clinical_data)
         
     except Exception as e:
-        print(f"[ERRO SAÍDA] {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[ERRO SAÍDA] %s", e)
         resposta_final = f"❌ Erro ao processar resposta final: {e}"
 
     state.final_answer = resposta_final
     return state
 
 
+# =====================================================================
+# BUSCA RAG ANTECIPADA (em paralelo com B)
+# =====================================================================
+def _buscar_literatura(clinical_data: Dict[str, Any], user_input: str) -> Optional[Dict[str, Any]]:
+    """
+    Busca na literatura com a mesma query que o Agente C montaria
+
+    A query depende só dos dados clínicos e da pergunta, não do resultado
+    de B. Retorna None se o RAG estiver indisponível ou a busca falhar
+    (o Agente C então busca por conta própria).
+    """
+    try:
+        from Agent_C.agent_c import (
+            RAG_AVAILABLE, CHROMA_PATH, RAG_K, RAG_MAX_CONTEXT_CHARS, RAG_MAX_CONTEXT_TOKENS,
+            montar_query_rag, particao_cache_rag
+        )
+        if not RAG_AVAILABLE or not CHROMA_PATH:
+            return None
+        from Agent_C.agent_c_db import rag_search
+    except ImportError as e:
+        logger.warning("[BUSCA RAG] %s", e)
+        return None
+
+    query = montar_query_rag(clinical_data, user_input)
+    logger.info("[BUSCA RAG] Buscando na literatura: %s", query)
+    try:
+        return rag_search(
+            CHROMA_PATH, query, k=RAG_K,
+            max_context_length_chars=RAG_MAX_CONTEXT_CHARS, max_context_tokens=RAG_MAX_CONTEXT_TOKENS,
+            particao=particao_cache_rag(clinical_data)
+        )
+    except Exception as e:
+        logger.warning("[BUSCA RAG] Falha na busca antecipada (%s), Agente C buscará novamente", e)
+        return None
+
+
+# =====================================================================
+# NODES ASSÍNCRONOS (grafo com B e busca RAG concorrentes)
+# =====================================================================
+# Os nodes paralelos devolvem apenas o campo que escrevem, para que o
+# LangGraph junte as duas atualizações do mesmo passo sem conflito.
+
+async def anode_agente_a_entrada(state: MASState) -> MASState:
+    return await asyncio.to_thread(node_agente_a_entrada, state)
+
+
+async def anode_agente_b(state: MASState) -> Dict[str, Any]:
+    log_banner(logger, "🟨 AGENTE B - ONTOLOGIA")
+    result = await asyncio.to_thread(_executar_agente_b, state.clinical_data)
+    return {"inference_result": result}
+
+
+async def anode_busca_rag(state: MASState) -> Dict[str, Any]:
+    log_banner(logger, "🟩 AGENTE C - BUSCA NA LITERATURA")
+    rag_result = await asyncio.to_thread(_buscar_literatura, state.clinical_data, state.user_input or "")
+    return {"rag_result": rag_result}
+
+
+async def anode_agente_c(state: MASState) -> MASState:
+    return await asyncio.to_thread(node_agente_c, state)
+
+
+async def anode_agente_a_saida(state: MASState) -> MASState:
+    return await asyncio.to_thread(node_agente_a_saida, state)
+
+
 # =====================================================================
 # EXPORTS
 # =====================================================================
@@ -183,5 +248,10 @@ __all__ = [
     "node_agente_a_entrada",
     "node_agente_b",
     "node_agente_c",
-    "node_agente_a_saida"
+    "node_agente_a_saida",
+    "anode_agente_a_entrada",
+    "anode_agente_b",
+    "anode_busca_rag",
+    "anode_agente_c",
+    "anode_agente_a_saida"
 ]
\ No newline at end of file
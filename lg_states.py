@@ -49,6 +49,12 @@ class MASState(BaseModel):
         description="Resultado da inferência ontológica (estágio, subetágios AP/HT, reasoner_ok, etc.)"
     )
     
+    # Busca RAG já calculada fora do Agente C (ex.: lote com embeddings em batch)
+    rag_result: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Resultado de rag_search pré-calculado (None = Agente C busca)"
+    )
+    
     # ===== VALIDAÇÃO (C → A) =====
     # Resultado validado pelo Agente C (com caso 1-7)
     validated_result: Dict[str, Any] = Field(
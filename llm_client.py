@@ -0,0 +1,333 @@
+"""
+Cliente LLM compartilhado - Multi-Agent IRIS System
+====================================================
+Uma fábrica de clientes LLM por processo, usada pelo Agente A
+(gerar_explicacao_clinica), pelo Agente C (responder_pergunta_usuario) e por
+GenerationMetrics (LLM-as-a-judge).
+
+- get_llm(provedor, modelo, temperatura): um cliente por combinação, criado
+  na primeira chamada e reutilizado (o SDK do provedor só é importado aí)
+- Pool de conexões HTTP: um httpx.Client por processo, compartilhado pelos
+  provedores que aceitam http_client (Groq, OpenAI), com keep-alive
+- Timeout por chamada (LLM_TIMEOUT) e até LLM_MAX_RETRIES novas tentativas
+  em erros transitórios (timeout, conexão, 429, 5xx), com backoff
+  exponencial e jitter completo; as tentativas do SDK ficam desligadas
+- Cache de respostas por sha256(provedor, modelo, temperatura, prompt):
+  o mesmo prompt repetido não chama o provedor (LLM_CACHE_SIZE=0 desativa)
+- LLM_PROVIDER=stub troca todos os provedores por StubLLM, local e
+  determinístico, para testes sem rede nem API key
+
+Uso:
+    from llm_client import get_llm, llm_disponivel
+
+    if llm_disponivel("groq"):
+        texto = get_llm("groq", "llama-3.1-8b-instant", 0.3).gerar(prompt)
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+
+# =====================================================================
+# CONFIGURAÇÃO
+# =====================================================================
+# "stub" substitui todos os provedores (testes)
+LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "")
+
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "8"))
+
+# Conexões HTTP abertas por processo (todas as threads do worker)
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "20"))
+
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", "86400"))
+
+# Variável de ambiente com a credencial de cada provedor
+API_KEYS = {
+    "groq": "GROQ_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "gemini": "GOOGLE_API_KEY",
+    "huggingface": "HUGGINGFACEHUB_API_TOKEN",
+}
+
+# Status HTTP que valem nova tentativa
+STATUS_TRANSITORIOS = {408, 409, 429, 500, 502, 503, 504}
+
+
+# =====================================================================
+# PROVEDOR STUB (testes)
+# =====================================================================
+class StubLLM:
+    """
+    Provedor local para testes: responde sem rede, de forma determinística
+
+    Args:
+        resposta: Texto devolvido (padrão: LLM_STUB_RESPOSTA ou um texto
+            fixo com o hash do prompt)
+        falhas: Quantas chamadas iniciais falham com TimeoutError
+        atraso: Segundos de espera por chamada
+    """
+
+    def __init__(self, resposta: str = None, falhas: int = 0, atraso: float = 0.0):
+        self.resposta = resposta if resposta is not None else os.environ.get("LLM_STUB_RESPOSTA")
+        self.falhas = falhas
+        self.atraso = atraso
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str, timeout: float = None) -> str:
+        with self._lock:
+            self.chamadas += 1
+            falhar = self.chamadas <= self.falhas
+        if self.atraso:
+            if timeout is not None and self.atraso > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"stub: {self.atraso}s > timeout de {timeout}s")
+            time.sleep(self.atraso)
+        if falhar:
+            raise TimeoutError("stub: falha simulada")
+        if self.resposta is not None:
+            return self.resposta
+        return f"Resposta stub para o prompt {hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}."
+
+
+# =====================================================================
+# CACHE DE RESPOSTAS
+# =====================================================================
+class _CacheRespostas:
+    """LRU com TTL, seguro entre threads"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chave: str) -> Optional[str]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entrada = self._entries.get(chave)
+            if entrada is not None and time.monotonic() - entrada[1] <= self.ttl_seconds:
+                self._entries.move_to_end(chave)
+                self.hits += 1
+                return entrada[0]
+            if entrada is not None:
+                del self._entries[chave]
+            self.misses += 1
+            return None
+
+    def put(self, chave: str, texto: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[chave] = (texto, time.monotonic())
+            self._entries.move_to_end(chave)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache = _CacheRespostas(LLM_CACHE_SIZE, LLM_CACHE_TTL)
+
+
+# =====================================================================
+# CLIENTE
+# =====================================================================
+def _transitorio(erro: Exception) -> bool:
+    """Erros em que uma nova tentativa pode dar certo"""
+    status = getattr(erro, "status_code", None) or getattr(getattr(erro, "response", None), "status_code", None)
+    if status is not None:
+        return status in STATUS_TRANSITORIOS
+    if isinstance(erro, (TimeoutError, ConnectionError)):
+        return True
+    # Exceções do httpx/SDKs sem dependência deles aqui
+    nome = type(erro).__name__
+    return any(parte in nome for parte in ("Timeout", "Connection", "RateLimit", "ServiceUnavailable", "InternalServer"))
+
+
+class LLMClient:
+    """
+    Cliente de um provedor/modelo com timeout, novas tentativas e cache
+
+    Args:
+        llm: Modelo LangChain (ou StubLLM) com invoke(prompt)
+        provedor: Nome do provedor (parte da chave do cache)
+        modelo: Nome do modelo (parte da chave do cache)
+        temperatura: Temperatura (parte da chave do cache)
+    """
+
+    def __init__(self, llm, provedor: str, modelo: str, temperatura: float):
+        self.llm = llm
+        self.provedor = provedor
+        self.modelo = modelo
+        self.temperatura = temperatura
+
+    def _chave(self, prompt: str) -> str:
+        conteudo = f"{self.provedor}\0{self.modelo}\0{self.temperatura}\0{prompt}"
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def _invocar(self, prompt: str) -> str:
+        if isinstance(self.llm, StubLLM):
+            return self.llm.invoke(prompt, timeout=LLM_TIMEOUT)
+        # O timeout de cada chamada vem da criação do modelo (LLM_TIMEOUT)
+        resposta = self.llm.invoke(prompt)
+        return resposta.content if hasattr(resposta, "content") else str(resposta)
+
+    def gerar(self, prompt: str, usar_cache: bool = True) -> str:
+        """
+        Texto gerado para o prompt
+
+        Args:
+            prompt: Prompt completo
+            usar_cache: Consultar e gravar o cache de respostas
+
+        Returns:
+            Texto da resposta
+
+        Raises:
+            A exceção do provedor, se não for transitória ou se as
+            LLM_MAX_RETRIES novas tentativas também falharem
+        """
+        chave = self._chave(prompt) if usar_cache else None
+        if chave is not None:
+            texto = _cache.get(chave)
+            if texto is not None:
+                logger.info("[LLM] ♻️ Resposta em cache (%s/%s)", self.provedor, self.modelo)
+                return texto
+
+        for tentativa in range(LLM_MAX_RETRIES + 1):
+            inicio = time.perf_counter()
+            try:
+                texto = self._invocar(prompt)
+                break
+            except Exception as e:
+                if tentativa == LLM_MAX_RETRIES or not _transitorio(e):
+                    raise
+                # Jitter completo: espera aleatória até o teto exponencial
+                espera = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** tentativa))
+                logger.warning("[LLM] %s/%s falhou (%s: %s), nova tentativa em %.2fs",
+                               self.provedor, self.modelo, type(e).__name__, str(e)[:80], espera)
+                time.sleep(espera)
+
+        logger.info("[LLM] %s/%s respondeu em %.2fs", self.provedor, self.modelo, time.perf_counter() - inicio)
+        if chave is not None:
+            _cache.put(chave, texto)
+        return texto
+
+
+# =====================================================================
+# FÁBRICA (um cliente por processo e configuração)
+# =====================================================================
+_clientes: Dict[tuple, LLMClient] = {}
+_http_client = None
+_lock = threading.Lock()
+
+
+def _get_http_client():
+    """httpx.Client com pool de conexões, compartilhado no processo"""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(
+            timeout=LLM_TIMEOUT,
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+        )
+    return _http_client
+
+
+def _criar_llm(provedor: str, modelo: str, temperatura: float):
+    """Modelo LangChain do provedor (SDK importado aqui)"""
+    if provedor == "stub":
+        return StubLLM()
+    if provedor == "groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(model=modelo, temperature=temperatura, timeout=LLM_TIMEOUT,
+                        max_retries=0, http_client=_get_http_client())
+    if provedor == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=modelo, temperature=temperatura, timeout=LLM_TIMEOUT,
+                          max_retries=0, http_client=_get_http_client())
+    if provedor == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=modelo, temperature=temperatura, timeout=LLM_TIMEOUT,
+                                      max_retries=0, google_api_key=os.environ.get(API_KEYS["gemini"]))
+    if provedor == "huggingface":
+        from langchain_huggingface import HuggingFaceEndpoint
+        return HuggingFaceEndpoint(repo_id=modelo, temperature=temperatura, max_new_tokens=512, timeout=LLM_TIMEOUT,
+                                   huggingfacehub_api_token=os.environ.get(API_KEYS["huggingface"]))
+    raise ValueError(f"Provedor LLM desconhecido: {provedor}")
+
+
+def llm_disponivel(provedor: str) -> bool:
+    """True se o provedor está configurado (API key definida ou LLM_PROVIDER=stub)"""
+    if LLM_PROVIDER == "stub":
+        return True
+    variavel = API_KEYS.get(provedor)
+    return bool(variavel and os.environ.get(variavel))
+
+
+def get_llm(provedor: str, modelo: str, temperatura: float = 0.3) -> LLMClient:
+    """
+    Cliente do provedor/modelo (criado uma vez por processo)
+
+    Com LLM_PROVIDER=stub, devolve um cliente StubLLM para qualquer provedor.
+
+    Args:
+        provedor: "groq", "openai", "gemini", "huggingface" ou "stub"
+        modelo: Nome do modelo no provedor
+        temperatura: Temperatura da geração
+    """
+    if LLM_PROVIDER == "stub":
+        provedor = "stub"
+
+    key = (provedor, modelo, temperatura)
+    cliente = _clientes.get(key)
+    if cliente is None:
+        with _lock:
+            cliente = _clientes.get(key)
+            if cliente is None:
+                cliente = LLMClient(_criar_llm(provedor, modelo, temperatura), provedor, modelo, temperatura)
+                _clientes[key] = cliente
+                logger.info("[LLM] Cliente criado: %s/%s", provedor, modelo)
+    return cliente
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Contadores do cache de respostas deste processo"""
+    return _cache.stats()
+
+
+def limpar_cache_llm():
+    """Descarta as respostas em cache"""
+    _cache.clear()
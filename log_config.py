@@ -0,0 +1,90 @@
+"""
+Configuração de Logging do Sistema Multi-Agente
+-----------------------------------------------
+Todos os agentes usam loggers do ramo "mas" (get_logger(__name__)), com
+formatação preguiçosa (logger.info("... %s", valor)): abaixo do nível
+configurado nenhuma mensagem é montada.
+
+Nível:
+    MAS_LOG_LEVEL (DEBUG, INFO, WARNING, ...) ou, se ausente, INFO no modo
+    interativo (run_lg.py, setup_rag.py) e WARNING no modo API.
+
+Contexto por requisição:
+    contexto_requisicao(request_id) associa um id às linhas de log emitidas
+    dentro do bloco (contextvars: seguro entre threads e tarefas asyncio).
+"""
+
+import os
+import sys
+import uuid
+import logging
+import contextvars
+from contextlib import contextmanager
+
+LOGGER_RAIZ = "mas"
+
+# Formato do modo API (stderr capturado pela API) e do modo interativo
+FORMATO_API = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+FORMATO_CLI = "%(message)s"
+
+SEPARADOR = "=" * 70
+
+_request_id = contextvars.ContextVar("mas_request_id", default="-")
+
+
+class RequestContextFilter(logging.Filter):
+    """Acrescenta o request_id do contexto atual a cada registro"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+def get_logger(nome: str) -> logging.Logger:
+    """Logger do sistema (ex.: get_logger(__name__) → "mas.Agent_B.agente_b")"""
+    return logging.getLogger(f"{LOGGER_RAIZ}.{nome}")
+
+
+def configurar_logging(modo: str = "cli", nivel: str = None, stream=None):
+    """
+    Configura o logger raiz do sistema
+
+    Args:
+        modo: "cli" (mensagens simples, INFO) ou "api" (com timestamp e
+            request_id, WARNING)
+        nivel: Nível explícito (padrão: MAS_LOG_LEVEL ou o padrão do modo)
+        stream: Destino (padrão: stdout no modo interativo, junto dos prints
+            e prompts; stderr no modo API, para não misturar com o JSON)
+    """
+    nivel = nivel or os.environ.get("MAS_LOG_LEVEL") or ("WARNING" if modo == "api" else "INFO")
+    if stream is None:
+        stream = sys.stderr if modo == "api" else sys.stdout
+
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(FORMATO_API if modo == "api" else FORMATO_CLI))
+    handler.addFilter(RequestContextFilter())
+
+    raiz = logging.getLogger(LOGGER_RAIZ)
+    raiz.handlers[:] = [handler]
+    raiz.setLevel(nivel.upper())
+    raiz.propagate = False
+
+
+def log_banner(logger: logging.Logger, titulo: str, *args):
+    """Título entre separadores (só montado se INFO estiver ativo)"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n%s\n" + titulo + "\n%s", SEPARADOR, *args, SEPARADOR)
+
+
+def request_id_atual() -> str:
+    return _request_id.get()
+
+
+@contextmanager
+def contexto_requisicao(request_id: str = None):
+    """Associa um request_id às mensagens de log emitidas dentro do bloco"""
+    token = _request_id.set(str(request_id) if request_id else uuid.uuid4().hex[:8])
+    try:
+        yield _request_id.get()
+    finally:
+        _request_id.reset(token)
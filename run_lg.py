@@ -259,6 +259,9 @@ def exemplo_pergunta_fora_escopo():
 
 if __name__ == "__main__":
     import sys
+    from log_config import configurar_logging
+    
+    configurar_logging()
     
     print("\n" + "="*70)
     print("🐱 SISTEMA DE DIAGNÓSTICO IRIS - DOENÇA RENAL CRÔNICA EM GATOS")
@@ -5,13 +5,53 @@ Versão otimizada para comunicação com API Express via stdin/stdout
 
 Entrada: JSON via stdin
 Saída: JSON estruturado via stdout (sem prints intermediários)
+
+Modo worker (--worker):
+    Processo de longa duração usado pelo pool da API Express. Lê uma
+    requisição JSON por linha do stdin e responde uma linha JSON no stdout
+    com o mesmo "id". O grafo compilado e os recursos dos agentes
+    (ontologia, embeddings, Chroma) ficam carregados entre requisições.
+
+    Requisição: {"id": "...", "formulario": {...}, "texto_livre": "..."}
+    Resposta:   {"id": "...", "success": true, "resultado": {...}, ...}
+    Controle:   {"id": "...", "op": "ping"} -> {"id": "...", "success": true, "pong": true}
+
+    Lote:       {"id": "...", "op": "batch", "itens": [{"formulario": {...}, "texto_livre": "..."}, ...]}
+                -> uma linha {"id": "...", "event": "item", "index": i, ...} por paciente
+                -> {"id": "...", "event": "done", "success": true, "total": n, ...}
+
+    Streaming:  {"id": "...", "op": "stream", "formulario": {...}, "texto_livre": "..."}
+                -> uma linha {"id": "...", "event": "node", "node": "agente_b", "data": {...}} por agente
+                -> {"id": "...", "event": "done", "success": true, "resultado": {...}, ...}
+
+    Concorrência (--threads N ou MAS_WORKER_THREADS): até N requisições
+    atendidas em paralelo por um ThreadPoolExecutor; as respostas podem sair
+    fora de ordem (casadas pelo "id"). O evento "ready" informa N ao pool.
+    Modelo de isolamento:
+      - grafo compilado uma vez por processo (get_graph), estado por requisição
+      - Agente B: pool de Worlds do owlready2 já carregados (um por
+        requisição em andamento, até N) e uma sub-ontologia temporária por
+        paciente
+      - Agente C: gravações no CSV de validações sob lock (threads e processos)
+      - caches (inferências, RAG) e registros de recursos protegidos por lock
+
+Modo lote (--batch):
+    Lê {"itens": [...]} (ou a lista diretamente) do stdin e escreve os
+    mesmos eventos "item"/"done" do modo worker, um JSON por linha.
+
+Modo streaming (--stream):
+    Lê uma requisição de diagnóstico do stdin e escreve os eventos
+    "node"/"done", um JSON por linha.
 """
 
 import sys
 import json
 import os
-from io import StringIO
-from contextlib import redirect_stdout, redirect_stderr
+import copy
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # =====================================================================
 # CONFIGURAÇÃO DE ENCODING UTF-8 (FIX WINDOWS)
@@ -24,33 +64,55 @@ if sys.platform == 'win32':
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.detach())
 
 
-def safe_json_output(data):
+def safe_json_output(data, stream=None):
     """
     Garante output JSON com UTF-8 correto no Windows
+
+    Args:
+        data: Objeto serializável em JSON
+        stream: Stream de saída (padrão: sys.stdout). No modo worker é o
+            stdout original do processo, reservado ao protocolo.
     """
+    stream = stream or sys.stdout
     try:
         json_str = json.dumps(data, ensure_ascii=False, indent=None)
-        if hasattr(sys.stdout, 'buffer'):
-            sys.stdout.buffer.write((json_str + '\n').encode('utf-8'))
-            sys.stdout.buffer.flush()
+        if hasattr(stream, 'buffer'):
+            stream.buffer.write((json_str + '\n').encode('utf-8'))
+            stream.buffer.flush()
         else:
-            print(json_str)
+            stream.write(json_str + '\n')
+            stream.flush()
     except Exception as e:
         # Fallback: usar ASCII se UTF-8 falhar
         json_str = json.dumps(data, ensure_ascii=True, indent=None)
-        print(json_str)
+        stream.write(json_str + '\n')
+        stream.flush()
 
 
 # Importar componentes do sistema
 from langgraph.graph import StateGraph, END
 from lg_states import MASState
+from log_config import get_logger, configurar_logging, contexto_requisicao
+
+logger = get_logger(__name__)
 from lg_nodes import (
     node_agente_a_entrada,
     node_agente_b,
     node_agente_c,
-    node_agente_a_saida
+    node_agente_a_saida,
+    anode_agente_a_entrada,
+    anode_agente_b,
+    anode_busca_rag,
+    anode_agente_c,
+    anode_agente_a_saida
 )
 
+# Pipeline assíncrono (B e busca RAG concorrentes) em run_pipeline_silent
+PIPELINE_ASYNC = os.environ.get("MAS_PIPELINE_ASYNC", "0") == "1"
+
+# Requisições atendidas em paralelo por worker (sobrescrito por --threads N)
+WORKER_THREADS = int(os.environ.get("MAS_WORKER_THREADS", "1"))
+
 
 def create_graph():
     """Cria o grafo do sistema multi-agente"""
@@ -70,6 +132,63 @@ def create_graph():
     return workflow.compile()
 
 
+def create_async_graph():
+    """
+    Cria o grafo assíncrono (ainvoke): inferência ontológica e busca RAG
+    concorrentes, unidas antes da validação do Agente C
+
+                 A_entrada
+                /         \
+        B (ontologia)   busca_rag (Chroma)
+                \         /
+                     C        ← usa rag_result pré-calculado
+                     │
+                  A_saida
+    """
+    workflow = StateGraph(MASState)
+    
+    workflow.add_node("agente_a_entrada", anode_agente_a_entrada)
+    workflow.add_node("agente_b", anode_agente_b)
+    workflow.add_node("busca_rag", anode_busca_rag)
+    workflow.add_node("agente_c", anode_agente_c)
+    workflow.add_node("agente_a_saida", anode_agente_a_saida)
+    
+    workflow.set_entry_point("agente_a_entrada")
+    workflow.add_edge("agente_a_entrada", "agente_b")
+    workflow.add_edge("agente_a_entrada", "busca_rag")
+    # C só executa depois que os dois ramos terminam
+    workflow.add_edge(["agente_b", "busca_rag"], "agente_c")
+    workflow.add_edge("agente_c", "agente_a_saida")
+    workflow.add_edge("agente_a_saida", END)
+    
+    return workflow.compile()
+
+
+# Grafos compilados uma única vez por processo (reutilizados pelo modo worker)
+_graphs = {}
+_graph_lock = threading.Lock()
+
+
+def _grafo_compilado(nome: str, criar):
+    grafo = _graphs.get(nome)
+    if grafo is None:
+        with _graph_lock:
+            grafo = _graphs.get(nome)
+            if grafo is None:
+                grafo = _graphs[nome] = criar()
+    return grafo
+
+
+def get_graph():
+    """Retorna o grafo compilado, criando-o na primeira chamada"""
+    return _grafo_compilado("sync", create_graph)
+
+
+def get_async_graph():
+    """Retorna o grafo assíncrono compilado, criando-o na primeira chamada"""
+    return _grafo_compilado("async", create_async_graph)
+
+
 def format_response_for_client(result: dict) -> dict:
     """
     Formata a resposta de forma estruturada e amigável para o cliente
@@ -149,14 +268,9 @@ def format_response_for_client(result: dict) -> dict:
     }
 
 
-def run_pipeline_silent(formulario: dict = None, texto_livre: str = ""):
-    """
-    Executa pipeline sem prints intermediários
-    Retorna apenas o resultado final formatado
-    """
-    app = create_graph()
-    
-    initial_state = {
+def _estado_inicial(formulario: dict = None, texto_livre: str = "") -> dict:
+    """Estado inicial do grafo para uma requisição"""
+    return {
         "formulario": formulario or {},
         "user_input": texto_livre or "",
         "clinical_data": {},
@@ -165,45 +279,412 @@ def run_pipeline_silent(formulario: dict = None, texto_livre: str = ""):
         "final_answer": "",
         "messages": []
     }
+
+
+def _montar_resposta(result: dict) -> dict:
+    """Resposta de sucesso a partir do estado final do grafo"""
+    return {
+        "success": True,
+        # Formatar resposta de forma estruturada
+        "resultado": format_response_for_client(result),
+        "resposta_completa": result.get("final_answer", "") or "",
+        # Dados brutos disponíveis para debug (opcional)
+        "dados_completos": {
+            "clinical_data": result.get("clinical_data", {}),
+            "inference_result": result.get("inference_result", {}),
+            "validated_result": result.get("validated_result", {})
+        }
+    }
+
+
+def run_pipeline_silent(formulario: dict = None, texto_livre: str = ""):
+    """
+    Executa pipeline sem saída intermediária
+    Retorna apenas o resultado final formatado
+    
+    Os agentes registram o progresso via logging; no modo API o nível
+    padrão é WARNING (MAS_LOG_LEVEL), então nenhuma mensagem de progresso é
+    montada. Não há redirecionamento de sys.stdout: seguro entre threads.
     
-    # Redirecionar stdout/stderr para capturar prints
-    stdout_capture = StringIO()
-    stderr_capture = StringIO()
+    Com MAS_PIPELINE_ASYNC=1 executa o grafo assíncrono (arun_pipeline_silent).
+    """
+    if PIPELINE_ASYNC:
+        return asyncio.run(arun_pipeline_silent(formulario, texto_livre))
+
+    app = get_graph()
+    initial_state = _estado_inicial(formulario, texto_livre)
     
     try:
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            result = app.invoke(initial_state)
-        
-        # Formatar resposta de forma estruturada
-        formatted_response = format_response_for_client(result)
-        
+        result = app.invoke(initial_state)
+        return _montar_resposta(result)
+    except Exception as e:
+        logger.exception("Falha no pipeline: %s", e)
         return {
-            "success": True,
-            "resultado": formatted_response,
-            "resposta_completa": result.get("final_answer", ""),
-            # Dados brutos disponíveis para debug (opcional)
-            "dados_completos": {
-                "clinical_data": result.get("clinical_data", {}),
-                "inference_result": result.get("inference_result", {}),
-                "validated_result": result.get("validated_result", {})
-            }
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
         }
+
+
+async def arun_pipeline_silent(formulario: dict = None, texto_livre: str = ""):
+    """
+    Versão assíncrona de run_pipeline_silent (grafo com B e busca RAG em paralelo)
+    Retorna o mesmo formato de resposta
+    """
+    app = get_async_graph()
+    initial_state = _estado_inicial(formulario, texto_livre)
+    
+    try:
+        result = await app.ainvoke(initial_state)
+        return _montar_resposta(result)
     except Exception as e:
+        logger.exception("Falha no pipeline: %s", e)
         return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+
+
+# =====================================================================
+# STREAMING (PROGRESSO POR AGENTE)
+# =====================================================================
+
+# Campos resumidos no evento de cada node; o estado completo vai no evento final
+_CAMPOS_EVENTO_NODE = {
+    "agente_b": ("inference_result", (
+        "estagio", "subestagio_ap", "subestagio_ht", "classificacao_valida",
+        "motivo_invalido", "reasoner_executado", "cache_hit"
+    )),
+    "agente_c": ("validated_result", (
+        "estagio_final", "caso", "confianca", "valida_b", "inconsistencia", "num_docs"
+    ))
+}
+
+
+
+def _como_dict(update) -> dict:
+    """Atualização de um node (dict parcial ou MASState completo) como dict"""
+    if update is None:
+        return {}
+    if isinstance(update, dict):
+        return update
+    if hasattr(update, "model_dump"):
+        return update.model_dump()
+    return update.dict()
+
+
+def _resumo_node(node: str, update: dict) -> dict:
+    """Dados enviados ao cliente quando um node termina"""
+    if node == "agente_a_entrada":
+        return {"clinical_data": update.get("clinical_data") or {}}
+    if node == "agente_a_saida":
+        return {"final_answer": update.get("final_answer") or ""}
+    if node in _CAMPOS_EVENTO_NODE:
+        campo, chaves = _CAMPOS_EVENTO_NODE[node]
+        dados = update.get(campo) or {}
+        return {chave: dados.get(chave) for chave in chaves}
+    return {}
+
+
+def stream_pipeline(formulario: dict = None, texto_livre: str = ""):
+    """
+    Executa o pipeline emitindo um evento ao fim de cada node
+    
+    Usa app.stream(stream_mode="updates") em vez de app.invoke: o estágio
+    numérico do Agente B chega ao cliente antes do RAG e da formatação.
+    
+    Yields:
+        {"event": "node", "node": str, "elapsed_ms": int, "data": {...}} por node
+        {"event": "done", "success": bool, ...} com a resposta completa
+        (mesmo formato de run_pipeline_silent)
+    """
+    app = get_graph()
+    estado = _estado_inicial(formulario, texto_livre)
+    inicio = time.perf_counter()
+
+    try:
+        for chunk in app.stream(estado, stream_mode="updates"):
+            for node, update in chunk.items():
+                dados = _como_dict(update)
+                estado.update(dados)
+                yield {
+                    "event": "node",
+                    "node": node,
+                    "elapsed_ms": int((time.perf_counter() - inicio) * 1000),
+                    "data": _resumo_node(node, dados)
+                }
+    except Exception as e:
+        yield {
+            "event": "done",
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+        return
+
+    yield {"event": "done", **_montar_resposta(estado)}
+
+
+def eventos_stream(data):
+    """Eventos do protocolo de streaming para uma requisição de diagnóstico"""
+    erro = validar_entrada(data)
+    if erro:
+        yield {"event": "done", **erro}
+        return
+
+    yield from stream_pipeline(
+        formulario=data.get("formulario", {}),
+        texto_livre=data.get("texto_livre", "")
+    )
+
+
+# =====================================================================
+# PROCESSAMENTO EM LOTE
+# =====================================================================
+
+# Itens por rodada: Agente A, Agente B e embeddings das queries RAG são
+# feitos para a rodada inteira; os resultados saem ao fim de cada item
+BATCH_CHUNK_SIZE = int(os.environ.get("MAS_BATCH_CHUNK_SIZE", "32"))
+
+
+def _resultado_do_estado(state: MASState) -> dict:
+    """Monta a resposta de um item (mesmo formato de run_pipeline_silent)"""
+    return _montar_resposta({
+        "clinical_data": state.clinical_data,
+        "inference_result": state.inference_result,
+        "validated_result": state.validated_result,
+        "final_answer": state.final_answer
+    })
+
+
+def _chave_biomarcadores(clinical_data: dict) -> tuple:
+    """Campos clínicos que determinam o resultado do Agente B"""
+    from Agent_B.inference_cache import CAMPOS_CHAVE
+    return tuple((campo, clinical_data.get(campo)) for campo in CAMPOS_CHAVE)
+
+
+def _erro_do_item(index: int, erro: Exception) -> dict:
+    """Resposta de um item que falhou (os demais itens da rodada seguem)"""
+    return {
+        "index": index,
+        "success": False,
+        "error": str(erro),
+        "error_type": type(erro).__name__
+    }
+
+
+def _inferir_em_grupos(itens: list) -> dict:
+    """
+    Executa o Agente B uma vez por grupo de biomarcadores idênticos
+    
+    Args:
+        itens: Lista de (index, state)
+    
+    Returns:
+        {index: exceção} dos itens cuja inferência falhou (o grupo inteiro,
+        que tem a mesma entrada do Agente B)
+    """
+    grupos = {}
+    for index, state in itens:
+        grupos.setdefault(_chave_biomarcadores(state.clinical_data), []).append((index, state))
+
+    logger.info("[LOTE] %s pacientes → %s inferências distintas", len(itens), len(grupos))
+
+    falhas = {}
+    for membros in grupos.values():
+        try:
+            representante = node_agente_b(membros[0][1])
+        except Exception as e:
+            logger.warning("[LOTE] Inferência falhou para %s item(ns): %s", len(membros), e)
+            falhas.update((index, e) for index, _ in membros)
+            continue
+        for _, state in membros[1:]:
+            inference = copy.deepcopy(representante.inference_result)
+            inference["question"] = state.clinical_data.get("question", "")
+            state.inference_result = inference
+    return falhas
+
+
+def _buscar_rag_em_lote(states: list):
+    """
+    Calcula a busca RAG de todos os itens com uma única codificação de queries
+    
+    Em caso de falha os itens ficam sem rag_result e o Agente C busca
+    individualmente, como no pipeline normal.
+    """
+    try:
+        from Agent_C.agent_c import (
+            RAG_AVAILABLE, CHROMA_PATH, RAG_K, RAG_MAX_CONTEXT_CHARS, RAG_MAX_CONTEXT_TOKENS,
+            montar_query_rag, particao_cache_rag
+        )
+        from Agent_C.agent_c_db import rag_search_batch
+    except ImportError:
+        return
+
+    if not RAG_AVAILABLE:
+        return
+
+    # Só itens que chegam à busca no Agente C (classificação válida e dados suficientes)
+    pendentes = []
+    for state in states:
+        inference = state.inference_result
+        clinical = state.clinical_data
+        if not inference.get("classificacao_valida", True):
+            continue
+        if not inference.get("estagio") and (clinical.get("creatinina") is None or clinical.get("sdma") is None):
+            continue
+        pendentes.append(state)
+
+    if not pendentes:
+        return
+
+    queries = [montar_query_rag(state.clinical_data, state.user_input or "") for state in pendentes]
+    try:
+        resultados = rag_search_batch(
+            CHROMA_PATH, queries, k=RAG_K,
+            max_context_length_chars=RAG_MAX_CONTEXT_CHARS, max_context_tokens=RAG_MAX_CONTEXT_TOKENS,
+            particoes=[particao_cache_rag(state.clinical_data) for state in pendentes]
+        )
+    except Exception as e:
+        logger.warning("[LOTE] Aviso: Busca RAG em lote falhou (%s), itens buscarão individualmente", e)
+        return
+
+    for state, rag_result in zip(pendentes, resultados):
+        state.rag_result = rag_result
+
+
+def _processar_rodada(rodada: list):
+    """Processa uma rodada de (index, item) e emite o resultado de cada item"""
+    states = []
+    for index, item in rodada:
+        erro = validar_entrada(item)
+        if erro:
+            yield {"index": index, **erro}
+            continue
+
+        try:
+            state = MASState(
+                formulario=item.get("formulario") or {},
+                user_input=item.get("texto_livre") or ""
+            )
+            states.append((index, node_agente_a_entrada(state)))
+        except Exception as e:
+            yield _erro_do_item(index, e)
+
+    falhas = _inferir_em_grupos(states)
+    states = [(index, state) for index, state in states if index not in falhas]
+    _buscar_rag_em_lote([state for _, state in states])
+
+    for index in sorted(falhas):
+        yield _erro_do_item(index, falhas[index])
+
+    for index, state in states:
+        try:
+            state = node_agente_c(state)
+            state = node_agente_a_saida(state)
+            yield {"index": index, **_resultado_do_estado(state)}
+        except Exception as e:
+            yield _erro_do_item(index, e)
+
+
+def run_pipeline_batch(itens: list):
+    """
+    Executa o pipeline para vários pacientes
+    
+    Cada rodada de BATCH_CHUNK_SIZE itens normaliza as entradas (Agente A),
+    infere uma vez por tupla de biomarcadores idêntica (Agente B) e codifica
+    todas as queries RAG em uma única chamada embed_documents; depois valida
+    e formata item a item (Agentes C e A).
+    
+    A falha de um item (em qualquer fase) gera a resposta de erro só desse
+    item; os demais seguem. Itens com os mesmos biomarcadores compartilham
+    a inferência do Agente B e, portanto, a falha dela.
+    
+    Args:
+        itens: Lista de {"formulario": {...}, "texto_livre": "..."}
+    
+    Yields:
+        {"index": i, "success": bool, ...} no formato de run_pipeline_silent
+    """
+    for inicio in range(0, len(itens), BATCH_CHUNK_SIZE):
+        rodada = list(enumerate(itens[inicio:inicio + BATCH_CHUNK_SIZE], start=inicio))
+        yield from _processar_rodada(rodada)
+
+
+def eventos_lote(data):
+    """
+    Eventos do protocolo de lote: um "item" por paciente e um "done" final
+    
+    Args:
+        data: {"itens": [...]} ou a lista de itens
+    """
+    itens = data.get("itens") if isinstance(data, dict) else data
+    if not isinstance(itens, list) or not itens:
+        yield {
+            "event": "done",
+            "success": False,
+            "error": "Lote vazio: 'itens' deve ser uma lista não vazia"
+        }
+        return
+
+    total = 0
+    sucessos = 0
+    try:
+        for item in run_pipeline_batch(itens):
+            total += 1
+            sucessos += 1 if item.get("success") else 0
+            yield {"event": "item", **item}
+    except Exception as e:
+        yield {
+            "event": "done",
             "success": False,
             "error": str(e),
             "error_type": type(e).__name__,
-            "logs": {
-                "stdout": stdout_capture.getvalue(),
-                "stderr": stderr_capture.getvalue()
-            }
+            "total": total
         }
+        return
+
+    yield {
+        "event": "done",
+        "success": True,
+        "total": total,
+        "sucessos": sucessos,
+        "falhas": total - sucessos
+    }
+
+
+def validar_entrada(data: dict):
+    """
+    Valida os dados mínimos de uma requisição
+
+    Returns:
+        Dict de erro (formato da resposta) ou None se a entrada é válida
+    """
+    if not isinstance(data, dict):
+        return {
+            "success": False,
+            "error": "Requisição deve ser um objeto JSON"
+        }
+
+    formulario = data.get("formulario") or {}
+    if not formulario.get("sdma") and not formulario.get("creatinina"):
+        return {
+            "success": False,
+            "error": "Dados insuficientes: SDMA ou Creatinina são obrigatórios"
+        }
+    return None
 
 
 def main():
     """
     Modo API: lê JSON do stdin, executa pipeline, retorna JSON no stdout
     """
+    # stdout fica reservado ao JSON de resposta; logs vão para stderr
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    configurar_logging(modo="api")
+
     try:
         # Ler entrada JSON do stdin (com encoding UTF-8)
         if hasattr(sys.stdin, 'buffer'):
@@ -216,7 +697,7 @@ def main():
                 "success": False,
                 "error": "Nenhum dado fornecido via stdin"
             }
-            safe_json_output(result)
+            safe_json_output(result, protocol_out)
             sys.exit(1)
         
         # Parse JSON
@@ -227,27 +708,24 @@ def main():
                 "success": False,
                 "error": f"JSON inválido: {str(e)}"
             }
-            safe_json_output(result)
+            safe_json_output(result, protocol_out)
             sys.exit(1)
         
-        # Extrair formulário e texto livre
-        formulario = data.get("formulario", {})
-        texto_livre = data.get("texto_livre", "")
-        
         # Validar dados mínimos
-        if not formulario.get("sdma") and not formulario.get("creatinina"):
-            result = {
-                "success": False,
-                "error": "Dados insuficientes: SDMA ou Creatinina são obrigatórios"
-            }
-            safe_json_output(result)
+        erro = validar_entrada(data)
+        if erro:
+            safe_json_output(erro, protocol_out)
             sys.exit(1)
         
         # Executar pipeline
-        result = run_pipeline_silent(formulario=formulario, texto_livre=texto_livre)
+        with contexto_requisicao():
+            result = run_pipeline_silent(
+                formulario=data.get("formulario", {}),
+                texto_livre=data.get("texto_livre", "")
+            )
         
         # Retornar resultado como JSON
-        safe_json_output(result)
+        safe_json_output(result, protocol_out)
         sys.exit(0 if result["success"] else 1)
         
     except Exception as e:
@@ -256,9 +734,211 @@ def main():
             "error": str(e),
             "error_type": type(e).__name__
         }
-        safe_json_output(result)
+        safe_json_output(result, protocol_out)
         sys.exit(1)
 
 
+# =====================================================================
+# MODO WORKER (PROCESSO PERSISTENTE)
+# =====================================================================
+
+def _aquecer_recursos():
+    """
+    Carrega grafo e módulos dos agentes antes da primeira requisição,
+    para que o custo de importação não caia sobre o primeiro diagnóstico.
+    """
+    get_async_graph() if PIPELINE_ASYNC else get_graph()
+    for modulo in ("Agent_A.agente_A", "Agent_B.agente_b", "Agent_C.agent_c"):
+        try:
+            __import__(modulo)
+        except Exception as e:
+            # O node correspondente reporta o erro na requisição
+            logger.warning("Falha ao pré-carregar %s: %s", modulo, e)
+
+    # Primeira ontologia do pool do Agente B (as demais, sob demanda)
+    try:
+        from Agent_B.agente_b import aquecer_ontologia
+        aquecer_ontologia()
+    except Exception as e:
+        logger.warning("Falha ao pré-carregar a ontologia: %s", e)
+
+    # Tokenizer do LLM (contexto do RAG em tokens): lido do disco aqui, e não
+    # na primeira consulta
+    try:
+        from Agent_C.context_packer import carregar_tokenizer
+        carregar_tokenizer()
+    except Exception as e:
+        logger.warning("Falha ao pré-carregar o tokenizer do LLM: %s", e)
+
+    # Cross-encoder (AGENTE_C_RAG_RERANK=1): carregado e aquecido aqui; sem
+    # ele pronto, as consultas ficam na ordem da busca
+    try:
+        from Agent_C.agent_c_db import carregar_reranker
+        carregar_reranker()
+    except Exception as e:
+        logger.warning("Falha ao pré-carregar o cross-encoder: %s", e)
+
+
+def _processar_requisicao_worker(data: dict) -> dict:
+    """Executa uma requisição do protocolo worker (sem o campo id)"""
+    op = data.get("op", "diagnosis")
+
+    if op == "ping":
+        return {"success": True, "pong": True}
+
+    if op == "stats":
+        from Agent_B.agente_b import inference_cache_stats
+        from llm_client import llm_cache_stats
+        try:
+            from Agent_C.agent_c_db import rag_cache_stats
+            rag_cache = rag_cache_stats()
+        except ImportError:
+            rag_cache = None
+        return {
+            "success": True,
+            "pid": os.getpid(),
+            "inference_cache": inference_cache_stats(),
+            "rag_cache": rag_cache,
+            "llm_cache": llm_cache_stats()
+        }
+
+    if op != "diagnosis":
+        return {"success": False, "error": f"Operação desconhecida: {op}"}
+
+    erro = validar_entrada(data)
+    if erro:
+        return erro
+
+    return run_pipeline_silent(
+        formulario=data.get("formulario", {}),
+        texto_livre=data.get("texto_livre", "")
+    )
+
+
+# Operações que respondem com vários eventos (o último é sempre "done")
+OPERACOES_COM_EVENTOS = {
+    "batch": eventos_lote,
+    "stream": eventos_stream
+}
+
+
+def _atender_requisicao(data: dict, request_id, responder):
+    """Executa uma requisição do worker e envia a(s) resposta(s) via responder"""
+    # Ids dos jobs são únicos por pool; o pid distingue os workers nos logs
+    with contexto_requisicao(f"{os.getpid()}-{request_id}"):
+        try:
+            # Lote/streaming: vários eventos com o mesmo id, emitidos conforme ficam prontos
+            if isinstance(data, dict) and data.get("op") in OPERACOES_COM_EVENTOS:
+                for evento in OPERACOES_COM_EVENTOS[data["op"]](data):
+                    responder({"id": request_id, **evento})
+                return
+
+            result = _processar_requisicao_worker(data)
+        except Exception as e:
+            logger.exception("Falha na requisição: %s", e)
+            result = {
+                "success": False,
+                "error": str(e),
+                "error_type": type(e).__name__
+            }
+
+    responder({"id": request_id, **result})
+
+
+def worker_main(threads: int = 1):
+    """
+    Modo worker: uma requisição JSON por linha no stdin, uma resposta JSON
+    por linha no stdout, marcada com o "id" da requisição.
+    
+    Args:
+        threads: Requisições atendidas em paralelo (1 = em ordem de chegada)
+    """
+    # stdout fica reservado ao protocolo; prints perdidos vão para stderr
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    configurar_logging(modo="api")
+
+    # Um World do owlready2 por requisição simultânea (lido na importação do Agente B)
+    os.environ.setdefault("AGENTE_B_ONTOLOGY_POOL_SIZE", str(max(1, threads)))
+    _aquecer_recursos()
+
+    # Uma linha JSON por write: threads não intercalam respostas
+    saida_lock = threading.Lock()
+
+    def responder(message):
+        with saida_lock:
+            safe_json_output(message, protocol_out)
+
+    threads = max(1, threads)
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="mas-worker") if threads > 1 else None
+    responder({"event": "ready", "pid": os.getpid(), "threads": threads})
+
+    stdin = sys.stdin.buffer if hasattr(sys.stdin, 'buffer') else sys.stdin
+    for raw_line in stdin:
+        line = raw_line.decode('utf-8') if isinstance(raw_line, bytes) else raw_line
+        if not line.strip():
+            continue
+
+        try:
+            data = json.loads(line)
+            request_id = data.get("id") if isinstance(data, dict) else None
+        except json.JSONDecodeError as e:
+            responder({"id": None, "success": False, "error": f"JSON inválido: {str(e)}"})
+            continue
+
+        if executor:
+            executor.submit(_atender_requisicao, data, request_id, responder)
+        else:
+            _atender_requisicao(data, request_id, responder)
+
+    # stdin fechado: concluir as requisições em andamento antes de sair
+    if executor:
+        executor.shutdown(wait=True)
+
+
+def _argumento_threads(argv: list) -> int:
+    """Valor de --threads N (padrão: MAS_WORKER_THREADS)"""
+    if "--threads" in argv:
+        indice = argv.index("--threads")
+        if indice + 1 < len(argv):
+            return int(argv[indice + 1])
+    return WORKER_THREADS
+
+
+def eventos_main(gerar_eventos):
+    """
+    Modos --batch/--stream: lê um JSON do stdin e escreve cada evento como
+    uma linha JSON no stdout conforme é produzido.
+    """
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    configurar_logging(modo="api")
+
+    try:
+        if hasattr(sys.stdin, 'buffer'):
+            data = json.loads(sys.stdin.buffer.read().decode('utf-8'))
+        else:
+            data = json.loads(sys.stdin.read())
+    except json.JSONDecodeError as e:
+        safe_json_output({"event": "done", "success": False, "error": f"JSON inválido: {str(e)}"}, protocol_out)
+        sys.exit(1)
+
+    sucesso = False
+    with contexto_requisicao():
+        for evento in gerar_eventos(data):
+            safe_json_output(evento, protocol_out)
+            if evento.get("event") == "done":
+                sucesso = evento.get("success", False)
+
+    sys.exit(0 if sucesso else 1)
+
+
 if __name__ == "__main__":
-    main()
+    if "--worker" in sys.argv[1:]:
+        worker_main(threads=_argumento_threads(sys.argv[1:]))
+    elif "--batch" in sys.argv[1:]:
+        eventos_main(eventos_lote)
+    elif "--stream" in sys.argv[1:]:
+        eventos_main(eventos_stream)
+    else:
+        main()
@@ -5,8 +5,15 @@ Execute este script antes de usar o sistema pela primeira vez
 
 Uso:
     python setup_rag.py          # Setup interativo
-    python setup_rag.py --auto   # Indexar pasta local automaticamente
-    python setup_rag.py --clear  # Limpar banco existente
+    python setup_rag.py --auto     # Indexar pasta local (incremental)
+    python setup_rag.py --rebuild  # Limpar o banco e reindexar a pasta local
+    python setup_rag.py --clear    # Limpar banco existente
+    python setup_rag.py --mmap     # Gerar a cópia mmap do banco (AGENTE_C_VECTOR_STORE=mmap)
+    python setup_rag.py --bm25     # Reconstruir o índice BM25 da busca híbrida
+
+A indexação é incremental: PDFs inalterados não são reabertos e só os
+chunks novos recebem embeddings (ver index_manifest.json no banco).
+Os PDFs são lidos em paralelo (AGENTE_C_INDEX_WORKERS processos).
 """
 
 import os
@@ -16,12 +23,16 @@ from pathlib import Path
 # Ajustar o path se necessário
 sys.path.insert(0, str(Path(__file__).parent))
 
+from log_config import configurar_logging
 from Agent_C.agent_c_db import (
     index_local_folder, 
     index_online_pdf,
     index_web_page,
     clear_chroma_db,
+    exportar_indice_mmap,
+    reconstruir_indice_bm25,
     test_rag_search,
+    VECTOR_STORE,
     CHROMA_PATH as DEFAULT_CHROMA_PATH
 )
 
@@ -63,7 +74,8 @@ def setup_rag_database():
     # Verificar se banco já existe
     if CHROMA_PATH.exists():
         print(f"\n⚠️  Banco vetorial já existe!")
-        resposta = input("Deseja limpar e reindexar tudo? (s/n): ")
+        print("   A indexação é incremental: só documentos novos ou alterados são processados.")
+        resposta = input("Deseja mesmo assim limpar e reindexar tudo? (s/n): ")
         if resposta.lower() == 's':
             result = clear_chroma_db(str(CHROMA_PATH))
             if "error" in result:
@@ -156,8 +168,8 @@ def indexar_pasta_local():
         print(f"❌ Erro: {result['error']}")
     else:
         print(f"\n✅ Indexação concluída com sucesso!")
-        print(f"   • Documentos: {result['source_documents']}")
-        print(f"   • Chunks: {result['indexed_chunks']}")
+        _imprimir_resumo(result)
+        _atualizar_mmap()
 
 
 def indexar_pdf_online():
@@ -208,7 +220,9 @@ def indexar_pdf_online():
         print(f"\n✅ Indexação concluída com sucesso!")
         print(f"   • URL: {result['source_url']}")
         print(f"   • Páginas: {result['source_documents']}")
-        print(f"   • Chunks: {result['indexed_chunks']}")
+        print(f"   • Chunks novos: {result['indexed_chunks']}")
+        print(f"   • Chunks removidos: {result['removed_chunks']}")
+        _atualizar_mmap()
 
 
 def indexar_pagina_web():
@@ -241,11 +255,43 @@ def indexar_pagina_web():
     else:
         print(f"\n✅ Indexação concluída com sucesso!")
         print(f"   • URL: {result['source_url']}")
-        print(f"   • Chunks: {result['indexed_chunks']}")
+        print(f"   • Chunks novos: {result['indexed_chunks']}")
+        print(f"   • Chunks removidos: {result['removed_chunks']}")
+        _atualizar_mmap()
+
 
+def _atualizar_mmap(forcar: bool = False) -> bool:
+    """Regrava a cópia mmap do banco (só se AGENTE_C_VECTOR_STORE=mmap ou forcar)"""
+    if VECTOR_STORE != "mmap" and not forcar:
+        return True
+    
+    result = exportar_indice_mmap(str(CHROMA_PATH))
+    if "error" in result:
+        print(f"❌ {result['error']}")
+        return False
+    print(f"   • Índice mmap: {result['exported_chunks']} chunks em {result['mmap_path']}")
+    return True
 
-def setup_automatico():
-    """Setup automático (indexa pasta local sem interação)"""
+
+def _imprimir_resumo(result: dict):
+    """Resumo de uma indexação incremental da pasta local"""
+    print(f"   • PDFs inalterados: {result['unchanged_files']}")
+    print(f"   • Páginas processadas: {result['source_documents']}")
+    print(f"   • Chunks novos: {result['indexed_chunks']}")
+    print(f"   • Chunks removidos: {result['removed_chunks']}")
+    print(f"   • Tempo: {result['elapsed_seconds']}s "
+          f"({result['pages_per_second']} páginas/s, {result['chunks_per_second']} chunks/s)")
+    for falha in result['failed_files']:
+        print(f"   ⚠️ Não foi possível ler: {falha}")
+
+
+def setup_automatico(reconstruir: bool = False):
+    """
+    Setup automático (indexa pasta local sem interação)
+    
+    Args:
+        reconstruir: Apaga o banco antes de indexar (padrão: incremental)
+    """
     print("=" * 70)
     print("🤖 SETUP AUTOMÁTICO")
     print("=" * 70)
@@ -264,8 +310,8 @@ def setup_automatico():
     
     print(f"\n✅ Encontrados {len(pdfs)} PDF(s)")
     
-    # Limpar banco existente
-    if CHROMA_PATH.exists():
+    # Limpar banco existente (só com --rebuild)
+    if reconstruir and CHROMA_PATH.exists():
         print(f"\n🗑️  Limpando banco existente...")
         clear_chroma_db(str(CHROMA_PATH))
     
@@ -281,20 +327,22 @@ def setup_automatico():
         return False
     
     print(f"\n✅ Setup concluído!")
-    print(f"   • Chunks indexados: {result['indexed_chunks']}")
-    return True
+    _imprimir_resumo(result)
+    return _atualizar_mmap()
 
 
 # =====================================================================
 # EXECUÇÃO
 # =====================================================================
 if __name__ == "__main__":
+    configurar_logging()
+    
     # Verificar argumentos
     if len(sys.argv) > 1:
         arg = sys.argv[1].lower()
         
-        if arg == "--auto":
-            success = setup_automatico()
+        if arg in ["--auto", "--rebuild"]:
+            success = setup_automatico(reconstruir=(arg == "--rebuild"))
             sys.exit(0 if success else 1)
         
         elif arg == "--clear":
@@ -307,12 +355,28 @@ if __name__ == "__main__":
                 print(f"✅ {result['message']}")
                 sys.exit(0)
         
+        elif arg == "--mmap":
+            print("🗺️  Exportando índice mmap...")
+            sys.exit(0 if _atualizar_mmap(forcar=True) else 1)
+        
+        elif arg == "--bm25":
+            print("🔤 Reconstruindo índice BM25...")
+            result = reconstruir_indice_bm25(str(CHROMA_PATH))
+            if "error" in result:
+                print(f"❌ {result['error']}")
+                sys.exit(1)
+            print(f"✅ {result['bm25_chunks']} chunks, {result['bm25_terms']} termos")
+            sys.exit(0)
+        
         elif arg in ["--help", "-h"]:
             print("Uso:")
             print("  python setup_rag.py          # Setup interativo")
-            print("  python setup_rag.py --auto   # Setup automático")
-            print("  python setup_rag.py --clear  # Limpar banco")
-            print("  python setup_rag.py --help   # Mostrar esta mensagem")
+            print("  python setup_rag.py --auto     # Setup automático (incremental)")
+            print("  python setup_rag.py --rebuild  # Limpar banco e reindexar tudo")
+            print("  python setup_rag.py --clear    # Limpar banco")
+            print("  python setup_rag.py --mmap     # Gerar cópia mmap do banco")
+            print("  python setup_rag.py --bm25     # Reconstruir índice BM25")
+            print("  python setup_rag.py --help     # Mostrar esta mensagem")
             sys.exit(0)
         
         else:
@@ -0,0 +1,179 @@
+"""
+Teste da Partição do Cache Semântico do RAG - Multi-Agent IRIS System
+======================================================================
+Verifica que o cache semântico de rag_search nunca devolve a um paciente o
+contexto buscado para outro estágio IRIS.
+
+As queries do Agente C (montar_query_rag) diferem só nos valores de
+creatinina e SDMA entre pacientes com a mesma pergunta, e os embeddings
+ficam dentro de AGENTE_C_RAG_CACHE_MAX_DISTANCE. O teste usa o pior caso:
+todas as queries com o MESMO embedding.
+
+1. particao_cache_rag dá o mesmo estágio que o Agente B em uma grade de
+   painéis em volta dos cortes IRIS
+2. Painéis de estágios diferentes nunca recebem um resultado em cache de
+   outro estágio; painéis do mesmo estágio e subestágios reutilizam
+3. rag_search_batch separa no cache a mesma query com partições diferentes
+
+Roda sem modelo de embeddings nem Chroma: o armazenamento é substituído
+por um armazenamento em memória do próprio teste.
+
+Uso:
+    python test_cache_rag_estagios.py
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import itertools
+
+# Configuração antes de importar os agentes (lida na importação)
+os.environ["AGENTE_C_RAG_HYBRID"] = "0"
+os.environ["AGENTE_C_RAG_RERANK"] = "0"
+os.environ["AGENTE_C_RAG_CACHE_SIZE"] = "100000"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_config import configurar_logging
+from Agent_B.agente_b import classificar_estagio_iris_com_validacao
+from Agent_C import agent_c_db
+from Agent_C.agent_c import montar_query_rag, particao_cache_rag
+
+# Valores dos dois lados de cada corte IRIS
+CREATININAS = [1.2, 1.59, 1.6, 2.5, 2.8, 2.9, 4.0, 5.0, 5.01, 7.0]
+SDMAS = [12.0, 17.9, 18.0, 22.0, 25.9, 26.0, 32.0, 38.0, 38.1, 50.0]
+UPCS = [None, 0.1, 0.3, 0.6]
+PRESSOES = [None, 130.0, 150.0, 170.0, 190.0]
+
+EMBEDDING = [1.0, 0.0, 0.0]  # pior caso: todas as queries colidem no vetor
+PERGUNTA = "Qual o manejo recomendado?"
+
+
+class Documento:
+    def __init__(self, texto: str, origem: tuple):
+        self.page_content = texto
+        self.metadata = {"source": "teste.pdf", "page": 0, "origem": origem}
+
+
+class ArmazenamentoEmMemoria:
+    """Devolve um doc marcado com a busca que o gerou (para saber de onde veio um resultado em cache)"""
+
+    def __init__(self):
+        self.origem = None  # (query, partição) da busca atual
+        self.buscas = 0
+
+    def versao(self):
+        return 1
+
+    def similarity_search_by_vector(self, embedding, k):
+        self.buscas += 1
+        return [Documento(f"Context for {self.origem[0]}.", self.origem)]
+
+
+def buscar(store: ArmazenamentoEmMemoria, dados: dict) -> dict:
+    """rag_search do Agente C para o painel, com o embedding fixo"""
+    query, particao = montar_query_rag(dados, PERGUNTA), particao_cache_rag(dados)
+    store.origem = (query, particao)
+    return agent_c_db._rag_search_by_vector("teste", EMBEDDING, 3, 3000, query=query, particao=particao)
+
+
+def painel(creat, sdma, upc=None, pressao=None) -> dict:
+    return {"creatinina": creat, "sdma": sdma, "upc": upc, "pressao": pressao}
+
+
+def estagio_agente_b(dados: dict):
+    estagio, valido, _ = classificar_estagio_iris_com_validacao(dados["creatinina"], dados["sdma"])
+    return int(estagio.replace("EstagioIRIS", "")) if valido else None
+
+
+def test_particao_igual_ao_agente_b() -> bool:
+    divergentes = [
+        (creat, sdma) for creat, sdma in itertools.product(CREATININAS, SDMAS)
+        if particao_cache_rag(painel(creat, sdma))[0] != estagio_agente_b(painel(creat, sdma))
+    ]
+    ok = not divergentes
+    print(f"{'✅' if ok else '❌'} Estágio da partição = estágio do Agente B em "
+          f"{len(CREATININAS) * len(SDMAS)} painéis (divergentes: {divergentes[:3]})")
+    return ok
+
+
+def test_estagios_nao_colidem(store: ArmazenamentoEmMemoria) -> bool:
+    agent_c_db._rag_cache.clear()
+    paineis = [painel(*valores) for valores in itertools.product(CREATININAS, SDMAS, UPCS, PRESSOES)]
+
+    colisoes, reutilizados = 0, 0
+    for dados in paineis:
+        resultado = buscar(store, dados)
+        if resultado["cache_hit"]:
+            reutilizados += 1
+            _, particao_origem = resultado["docs"][0].metadata["origem"]
+            if particao_origem != particao_cache_rag(dados):
+                colisoes += 1
+
+    particoes = {particao_cache_rag(dados) for dados in paineis}
+    ok = colisoes == 0 and store.buscas == len(particoes) and reutilizados == len(paineis) - len(particoes)
+    print(f"{'✅' if ok else '❌'} {len(paineis)} painéis com o mesmo embedding: {store.buscas} buscas "
+          f"({len(particoes)} partições), {reutilizados} do cache, {colisoes} entre partições diferentes")
+    return ok
+
+
+def test_estagio_2_e_4(store: ArmazenamentoEmMemoria) -> bool:
+    agent_c_db._rag_cache.clear()
+    estagio_2, estagio_4 = painel(2.1, 20), painel(5.5, 45)
+
+    buscar(store, estagio_2)
+    resultado = buscar(store, estagio_4)
+
+    ok = not resultado["cache_hit"] and resultado["docs"][0].metadata["origem"] == store.origem
+    print(f"{'✅' if ok else '❌'} Estágio 4 depois de estágio 2 (mesmo embedding): "
+          f"{'reutilizou o contexto do estágio 2' if resultado['cache_hit'] else 'nova busca'}")
+    return ok
+
+
+def test_lote(store: ArmazenamentoEmMemoria) -> bool:
+    agent_c_db._rag_cache.clear()
+
+    class Embeddings:
+        def embed_documents(self, textos):
+            return [EMBEDDING for _ in textos]
+
+    get_embeddings = agent_c_db._get_embeddings
+    agent_c_db._get_embeddings = lambda *args, **kwargs: Embeddings()
+    try:
+        store.origem = ("mesma query", None)
+        particoes = [(2, None, None), (4, None, None), (2, None, None)]
+        resultados = agent_c_db.rag_search_batch("teste", ["mesma query"] * 3, k=3, particoes=particoes)
+    finally:
+        agent_c_db._get_embeddings = get_embeddings
+
+    ok = [r["cache_hit"] for r in resultados] == [False, False, False] and agent_c_db.rag_cache_stats()["entries"] == 2
+    print(f"{'✅' if ok else '❌'} Lote com a mesma query em 2 partições: "
+          f"{agent_c_db.rag_cache_stats()['entries']} entradas no cache")
+    return ok
+
+
+def main():
+    configurar_logging(nivel="ERROR")
+
+    print("=" * 70)
+    print("TESTE DA PARTIÇÃO DO CACHE SEMÂNTICO DO RAG")
+    print("=" * 70)
+
+    store = ArmazenamentoEmMemoria()
+    agent_c_db._get_store = lambda chroma_path: store
+
+    resultados = [
+        test_particao_igual_ao_agente_b(),
+        test_estagios_nao_colidem(store),
+        test_estagio_2_e_4(store),
+        test_lote(store),
+    ]
+
+    print("=" * 70)
+    print(f"{sum(resultados)}/{len(resultados)} testes passaram")
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Teste de Estresse de Concorrência - Multi-Agent IRIS System
+============================================================
+Verifica que diagnósticos executados em paralelo no mesmo processo (como
+no worker com --threads N) produzem exatamente os mesmos resultados que a
+execução sequencial, e que o CSV de validações continua íntegro.
+
+1. Executa cada caso sequencialmente (referência)
+2. Executa todos os casos repetidos em paralelo (ThreadPoolExecutor)
+3. Compara os campos determinísticos de cada resposta com a referência
+4. Grava linhas concorrentes no CSV (threads + processos) e valida o arquivo
+
+Os caches de inferência e do RAG são desativados para que cada requisição
+passe de fato pelo owlready2 e pelo Chroma. Textos gerados por LLM não são
+comparados (não determinísticos).
+
+Uso:
+    python test_concorrencia.py
+    python test_concorrencia.py --threads 8 --repeticoes 5
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import csv
+import json
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+
+# Desativar caches antes de importar os agentes
+os.environ["AGENTE_B_INFERENCE_CACHE_SIZE"] = "0"
+os.environ["AGENTE_C_RAG_CACHE_SIZE"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_lg_api import run_pipeline_silent, get_graph
+from Agent_C import agent_c
+
+
+CASOS = [
+    {"nome": "Caso 1", "creatinina": 1.4, "sdma": 16, "pressao": 130, "upc": 0.1},
+    {"nome": "Caso 2", "creatinina": 2.3, "sdma": 18.5, "pressao": 145, "upc": 0.3},
+    {"nome": "Caso 3", "creatinina": 3.5, "sdma": 30, "pressao": 165, "upc": 0.5},
+    {"nome": "Caso 4", "creatinina": 5.5, "sdma": 45, "pressao": 185, "upc": 0.8},
+    {"nome": "Discrepância", "creatinina": 1.9, "sdma": 32, "pressao": 150, "upc": 0.2},
+]
+
+PERGUNTA = "Qual o estágio IRIS e o manejo recomendado?"
+
+
+def assinatura(resposta: dict) -> dict:
+    """Campos determinísticos de uma resposta do pipeline"""
+    if not resposta.get("success"):
+        return {"success": False, "error_type": resposta.get("error_type")}
+
+    resultado = resposta["resultado"]
+    inference = resposta["dados_completos"]["inference_result"]
+    validated = resposta["dados_completos"]["validated_result"]
+    return {
+        "success": True,
+        "biomarcadores": resultado["biomarcadores"],
+        "classificacao": resultado["classificacao"],
+        "validacao": resultado["validacao"],
+        "estagio_b": inference.get("estagio"),
+        "subestagio_ap_b": inference.get("subestagio_ap"),
+        "subestagio_ht_b": inference.get("subestagio_ht"),
+        "classificacao_valida": inference.get("classificacao_valida"),
+        "reasoner_ok": inference.get("reasoner_ok"),
+        "estagio_final": validated.get("estagio_final"),
+        "caso": validated.get("caso"),
+    }
+
+
+def executar(indice: int) -> dict:
+    caso = CASOS[indice]
+    return assinatura(run_pipeline_silent(formulario=dict(caso), texto_livre=PERGUNTA))
+
+
+def test_pipeline_concorrente(threads: int, repeticoes: int) -> bool:
+    """Resultados em paralelo idênticos aos sequenciais"""
+    print("\n" + "=" * 70)
+    print(f"🔀 TESTE 1: Pipeline concorrente ({threads} threads, {repeticoes}x cada caso)")
+    print("=" * 70)
+
+    referencia = [executar(i) for i in range(len(CASOS))]
+    for caso, ref in zip(CASOS, referencia):
+        print(f"   {caso['nome']:<14} → {ref.get('estagio_final')} (caso {ref.get('caso')})")
+
+    indices = list(range(len(CASOS))) * repeticoes
+    random.shuffle(indices)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        resultados = list(executor.map(executar, indices))
+
+    divergencias = 0
+    for indice, resultado in zip(indices, resultados):
+        if resultado != referencia[indice]:
+            divergencias += 1
+            print(f"❌ Divergência em {CASOS[indice]['nome']}:")
+            print(f"   esperado: {json.dumps(referencia[indice], ensure_ascii=False, default=str)}")
+            print(f"   obtido:   {json.dumps(resultado, ensure_ascii=False, default=str)}")
+
+    print(f"\n   {len(indices)} execuções concorrentes, {divergencias} divergência(s)")
+    return divergencias == 0
+
+
+def _gravar_linhas(args):
+    caminho, prefixo, quantidade = args
+    agent_c.CSV_DATABASE_PATH = Path(caminho)
+    for i in range(quantidade):
+        agent_c._anexar_linha_csv({campo: f"{prefixo}-{i}-{campo}" for campo in agent_c.CSV_HEADERS})
+
+
+def test_csv_concorrente(threads: int) -> bool:
+    """Gravações concorrentes no CSV sem linhas intercaladas nem headers duplicados"""
+    print("\n" + "=" * 70)
+    print("🗃️  TESTE 2: Gravações concorrentes no CSV de validações")
+    print("=" * 70)
+
+    original = agent_c.CSV_DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "validations_database.csv")
+        por_gravador = 100
+
+        with Pool(2) as pool:
+            pool.map(_gravar_linhas, [(caminho, f"p{i}", por_gravador) for i in range(2)])
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(_gravar_linhas, [(caminho, f"t{i}", por_gravador) for i in range(threads)]))
+        agent_c.CSV_DATABASE_PATH = original
+
+        with open(caminho, newline="", encoding="utf-8") as f:
+            conteudo = f.read()
+        with open(caminho, newline="", encoding="utf-8") as f:
+            linhas = list(csv.DictReader(f))
+
+    esperado = (2 + threads) * por_gravador
+    headers = conteudo.count(",".join(agent_c.CSV_HEADERS))
+    integras = all(
+        linha[campo].endswith(f"-{campo}") for linha in linhas for campo in agent_c.CSV_HEADERS
+    )
+
+    print(f"   linhas: {len(linhas)} (esperado {esperado}), headers: {headers}, íntegras: {integras}")
+    return len(linhas) == esperado and headers == 1 and integras
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de estresse de concorrência")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    # Validações do pipeline não entram no banco real
+    tmp_csv = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+    tmp_csv.close()
+    agent_c.CSV_DATABASE_PATH = Path(tmp_csv.name)
+    get_graph()
+
+    try:
+        resultados = {
+            "pipeline": test_pipeline_concorrente(args.threads, args.repeticoes),
+            "csv": test_csv_concorrente(args.threads),
+        }
+    finally:
+        os.unlink(tmp_csv.name)
+
+    print("\n" + "=" * 70)
+    for nome, ok in resultados.items():
+        print(f"{'✅' if ok else '❌'} {nome}")
+    print("=" * 70)
+
+    sys.exit(0 if all(resultados.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Teste da Tabela de Cortes IRIS com Valores Não Finitos - Multi-Agent IRIS System
+=================================================================================
+Verifica que NaN e ±inf não são estadiados (iris_thresholds.py):
+
+1. As consultas escalares (estagio_creatinina, estagio_sdma, subestagio_ap,
+   subestagio_ht) retornam None para NaN, inf e -inf
+2. estagiar_lote dá o mesmo resultado que as consultas escalares em uma
+   grade com valores válidos, ausentes e não finitos
+3. O Agente B não classifica um painel com creatinina e SDMA não finitos e
+   usa o biomarcador válido quando só o outro é não finito
+
+Uso:
+    python test_iris_thresholds.py
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import math
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_config import configurar_logging
+from iris_thresholds import (
+    estagio_creatinina, estagio_sdma, subestagio_ap, subestagio_ht,
+    combinar_estagios, estagiar_lote, SUBESTAGIOS_AP, SUBESTAGIOS_HT
+)
+from Agent_B.agente_b import classificar_estagio_iris_com_validacao
+
+NAO_FINITOS = [math.nan, math.inf, -math.inf]
+
+
+def test_escalares() -> bool:
+    consultas = (estagio_creatinina, estagio_sdma, subestagio_ap, subestagio_ht)
+    errados = [
+        (consulta.__name__, valor) for consulta, valor in itertools.product(consultas, NAO_FINITOS)
+        if consulta(valor) is not None
+    ]
+    ok = not errados
+    print(f"{'✅' if ok else '❌'} Consultas escalares com NaN/inf/-inf: "
+          f"{'todas sem classe' if ok else errados}")
+    return ok
+
+
+def test_lote_igual_escalar() -> bool:
+    creatininas = [None, 1.2, 1.6, 2.8, 5.0, 5.01] + NAO_FINITOS
+    sdmas = [None, 14.0, 18.0, 38.0, 38.1] + NAO_FINITOS
+    upcs = [None, 0.1, 0.4] + NAO_FINITOS
+    pressoes = [None, 150.0, 180.0] + NAO_FINITOS
+    paineis = list(itertools.product(creatininas, sdmas, upcs, pressoes))
+
+    lote = estagiar_lote(*zip(*paineis))
+    nomes_ap = SUBESTAGIOS_AP + (None,)
+    nomes_ht = SUBESTAGIOS_HT + (None,)
+
+    divergentes = []
+    for i, (creat, sdma, upc, pressao) in enumerate(paineis):
+        estagio, _ = combinar_estagios(estagio_creatinina(creat), estagio_sdma(sdma))
+        esperado = (estagio or 0, subestagio_ap(upc), subestagio_ht(pressao))
+        obtido = (int(lote["estagio"][i]), nomes_ap[lote["subestagio_ap"][i]], nomes_ht[lote["subestagio_ht"][i]])
+        if esperado != obtido:
+            divergentes.append(paineis[i])
+
+    ok = not divergentes
+    print(f"{'✅' if ok else '❌'} estagiar_lote = consultas escalares em {len(paineis)} painéis "
+          f"(divergentes: {divergentes[:3]})")
+    return ok
+
+
+def test_agente_b() -> bool:
+    casos = {
+        (math.nan, math.nan): (None, False),
+        (math.inf, 40.0): ("EstagioIRIS4", True),    # só o SDMA vale
+        (math.nan, 20.0): ("EstagioIRIS2", True),
+        (2.0, -math.inf): ("EstagioIRIS2", True),    # só a creatinina vale
+        (math.inf, math.nan): (None, False),
+    }
+    divergentes = []
+    for (creat, sdma), esperado in casos.items():
+        estagio, valido, _ = classificar_estagio_iris_com_validacao(creat, sdma)
+        if (estagio, valido) != esperado:
+            divergentes.append(((creat, sdma), (estagio, valido)))
+
+    ok = not divergentes
+    print(f"{'✅' if ok else '❌'} Agente B com biomarcadores não finitos: {len(casos)} casos "
+          f"(divergentes: {divergentes})")
+    return ok
+
+
+def main():
+    configurar_logging(nivel="ERROR")
+
+    print("=" * 70)
+    print("TESTE DA TABELA DE CORTES IRIS (NaN / inf)")
+    print("=" * 70)
+
+    resultados = [test_escalares(), test_lote_igual_escalar(), test_agente_b()]
+
+    print("=" * 70)
+    print(f"{sum(resultados)}/{len(resultados)} testes passaram")
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Teste do Cliente LLM Compartilhado - Multi-Agent IRIS System
+=============================================================
+Verifica llm_client.py com o provedor stub (LLM_PROVIDER=stub), sem rede
+nem API key:
+
+1. get_llm reutiliza o mesmo cliente por provedor/modelo/temperatura
+2. Prompt repetido é respondido pelo cache (o provedor é chamado uma vez)
+3. Erros transitórios são repetidos até LLM_MAX_RETRIES; outros não
+4. Chamada acima de LLM_TIMEOUT falha dentro do tempo previsto
+5. responder_pergunta_usuario (Agente C) com a mesma pergunta e contexto
+   chama o LLM uma vez só
+
+Uso:
+    python test_llm_client.py
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import time
+
+# Configuração antes de importar llm_client (lida na importação)
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ["LLM_TIMEOUT"] = "0.2"
+os.environ["LLM_MAX_RETRIES"] = "2"
+os.environ["LLM_BACKOFF_BASE"] = "0.01"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import llm_client
+from llm_client import LLMClient, StubLLM, get_llm, llm_cache_stats, limpar_cache_llm
+from log_config import configurar_logging
+
+
+def test_fabrica() -> bool:
+    a = get_llm("groq", "llama-3.1-8b-instant", 0.3)
+    b = get_llm("groq", "llama-3.1-8b-instant", 0.3)
+    c = get_llm("groq", "outro-modelo", 0.3)
+    ok = a is b and a is not c and isinstance(a.llm, StubLLM)
+    print(f"{'✅' if ok else '❌'} get_llm reutiliza o cliente (stub: {a.provedor})")
+    return ok
+
+
+def test_cache() -> bool:
+    limpar_cache_llm()
+    cliente = LLMClient(StubLLM(), "stub", "cache", 0.3)
+    antes = llm_cache_stats()["hits"]
+    respostas = [cliente.gerar("Qual o estágio IRIS com creatinina 2.3?") for _ in range(5)]
+    cliente.gerar("Outra pergunta")
+    ok = cliente.llm.chamadas == 2 and len(set(respostas)) == 1 and llm_cache_stats()["hits"] - antes == 4
+    print(f"{'✅' if ok else '❌'} 5 prompts iguais + 1 diferente: {cliente.llm.chamadas} chamadas ao provedor")
+    return ok
+
+
+def test_novas_tentativas() -> bool:
+    limpar_cache_llm()
+    recupera = LLMClient(StubLLM(falhas=2), "stub", "retry", 0.3)
+    texto = recupera.gerar("prompt")
+    ok = recupera.llm.chamadas == 3 and bool(texto)
+
+    desiste = LLMClient(StubLLM(falhas=10), "stub", "retry", 0.3)
+    try:
+        desiste.gerar("prompt 2")
+        ok = False
+    except TimeoutError:
+        ok = ok and desiste.llm.chamadas == llm_client.LLM_MAX_RETRIES + 1
+
+    class Invalido(StubLLM):
+        def invoke(self, prompt, timeout=None):
+            self.chamadas += 1
+            raise ValueError("requisição inválida")
+
+    permanente = LLMClient(Invalido(), "stub", "retry", 0.3)
+    try:
+        permanente.gerar("prompt 3")
+        ok = False
+    except ValueError:
+        ok = ok and permanente.llm.chamadas == 1
+
+    print(f"{'✅' if ok else '❌'} Novas tentativas: 2 falhas recuperadas em 3 chamadas, "
+          f"{desiste.llm.chamadas} chamadas antes de desistir, erro permanente sem repetição")
+    return ok
+
+
+def test_timeout() -> bool:
+    limpar_cache_llm()
+    lento = LLMClient(StubLLM(atraso=5), "stub", "timeout", 0.3)
+    inicio = time.perf_counter()
+    try:
+        lento.gerar("prompt lento")
+        ok = False
+    except TimeoutError:
+        ok = True
+    decorrido = time.perf_counter() - inicio
+    # 3 tentativas de LLM_TIMEOUT + esperas curtas
+    limite = (llm_client.LLM_MAX_RETRIES + 1) * llm_client.LLM_TIMEOUT + 0.5
+    ok = ok and decorrido < limite
+    print(f"{'✅' if ok else '❌'} Timeout: falhou em {decorrido:.2f}s (limite {limite:.2f}s)")
+    return ok
+
+
+def test_agente_c() -> bool:
+    from Agent_C import agent_c
+
+    limpar_cache_llm()
+    cliente = get_llm(agent_c.LLM_PROVEDOR, agent_c.LLM_MODELO, agent_c.LLM_TEMPERATURA)
+    antes = cliente.llm.chamadas
+    contexto = "IRIS stage 2 applies when creatinine is 1.6 to 2.8 mg/dL. Treat hypertension with amlodipine."
+    respostas = [
+        agent_c.responder_pergunta_usuario("Qual o tratamento para hipertensão?", contexto, [object()])
+        for _ in range(3)
+    ]
+    ok = cliente.llm.chamadas - antes == 1 and len(set(respostas)) == 1 and bool(respostas[0])
+    print(f"{'✅' if ok else '❌'} Agente C: 3 perguntas iguais, {cliente.llm.chamadas - antes} chamada(s) ao LLM")
+    return ok
+
+
+def main():
+    configurar_logging(nivel="WARNING")
+
+    print("=" * 70)
+    print("TESTE DO CLIENTE LLM (provedor stub)")
+    print("=" * 70)
+
+    resultados = [test_fabrica(), test_cache(), test_novas_tentativas(), test_timeout(), test_agente_c()]
+
+    print("=" * 70)
+    print(f"{sum(resultados)}/{len(resultados)} testes passaram")
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Teste de Paridade dos Embeddings ONNX - Multi-Agent IRIS System
+================================================================
+Verifica que os backends ONNX de Agent_C (AGENTE_C_EMBED_BACKEND=onnx e
+onnx-int8) produzem embeddings equivalentes aos do sentence-transformers
+(torch), usado para construir o índice.
+
+1. Carrega os chunks do banco Chroma (ou textos sintéticos, sem banco)
+2. Calcula os embeddings com torch e com cada backend ONNX
+3. Exige similaridade de cosseno >= --limite (padrão 0.99) em todos os
+   chunks e queries
+4. Compara o top-k de cada query no corpus (sobreposição com o torch)
+
+Requer o modelo exportado: python -m Agent_C.onnx_embeddings --exportar
+
+Uso:
+    python test_onnx_parity.py
+    python test_onnx_parity.py --chunks 2000 --backends onnx-int8
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_config import configurar_logging
+from Agent_C.agent_c_db import EMBED_MODEL, CHROMA_PATH
+from Agent_C.onnx_embeddings import OnnxEmbeddings, ONNX_MODEL_DIR
+from Agent_C.benchmark_embeddings import carregar_textos, QUERIES
+
+
+def embeddings_torch(textos, queries):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    modelo = HuggingFaceEmbeddings(
+        model_name=EMBED_MODEL,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True, "batch_size": 32}
+    )
+    return np.array(modelo.embed_documents(textos)), np.array([modelo.embed_query(q) for q in queries])
+
+
+def embeddings_onnx(backend, model_dir, textos, queries):
+    modelo = OnnxEmbeddings(model_dir, quantizado=(backend == "onnx-int8"))
+    return np.array(modelo.embed_documents(textos)), np.array([modelo.embed_query(q) for q in queries])
+
+
+def top_k(queries, corpus, k):
+    return [set(np.argsort(-(corpus @ q))[:k]) for q in queries]
+
+
+def test_paridade(backend, referencia, model_dir, textos, limite, k) -> bool:
+    print("\n" + "=" * 70)
+    print(f"🔬 {backend} vs torch ({len(textos)} chunks, {len(QUERIES)} queries)")
+    print("=" * 70)
+
+    docs_ref, queries_ref = referencia
+    docs, queries = embeddings_onnx(backend, model_dir, textos, QUERIES)
+
+    # Vetores normalizados: cosseno = produto interno
+    cos_docs = np.sum(docs * docs_ref, axis=1)
+    cos_queries = np.sum(queries * queries_ref, axis=1)
+    minimo = min(cos_docs.min(), cos_queries.min())
+
+    sobreposicao = [
+        len(a & b) / k for a, b in zip(top_k(queries, docs, k), top_k(queries_ref, docs_ref, k))
+    ]
+
+    print(f"   cosseno chunks:  mín {cos_docs.min():.4f}  média {cos_docs.mean():.4f}")
+    print(f"   cosseno queries: mín {cos_queries.min():.4f}  média {cos_queries.mean():.4f}")
+    print(f"   top-{k} igual ao torch: {np.mean(sobreposicao):.0%} (pior query {min(sobreposicao):.0%})")
+
+    abaixo = int((cos_docs < limite).sum() + (cos_queries < limite).sum())
+    if abaixo:
+        print(f"   ❌ {abaixo} vetor(es) com cosseno < {limite}")
+    return minimo >= limite
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridade dos embeddings ONNX com o torch")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"], choices=["onnx", "onnx-int8"])
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--limite", type=float, default=0.99)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--chroma-path", default=CHROMA_PATH)
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+
+    configurar_logging(nivel="WARNING")
+
+    textos = carregar_textos(args.chunks, args.chroma_path)
+    referencia = embeddings_torch(textos, QUERIES)
+
+    resultados = {
+        backend: test_paridade(backend, referencia, args.model_dir, textos, args.limite, args.k)
+        for backend in args.backends
+    }
+
+    print("\n" + "=" * 70)
+    for backend, ok in resultados.items():
+        print(f"{'✅' if ok else '❌'} {backend} (cosseno >= {args.limite})")
+    print("=" * 70)
+
+    sys.exit(0 if all(resultados.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Teste do Pool de Ontologias no Pipeline Assíncrono - Multi-Agent IRIS System
+=============================================================================
+Verifica que o grafo assíncrono (MAS_PIPELINE_ASYNC=1) não recarrega a
+ontologia a cada requisição.
+
+run_pipeline_silent chama asyncio.run por requisição e o Agente B roda via
+asyncio.to_thread, em um executor novo a cada vez: a thread que atende o
+Agente B nunca é a mesma. O pool do Agente B (PoolOntologias) não depende
+da thread, então:
+
+1. Duas requisições assíncronas seguidas carregam ontologia.owl uma vez só
+2. Requisições assíncronas concorrentes carregam no máximo
+   AGENTE_B_ONTOLOGY_POOL_SIZE ontologias e dão o mesmo resultado
+
+Os caches de inferência e do RAG são desativados para que toda requisição
+passe de fato pela ontologia; o LLM é o stub local (sem rede).
+
+Uso:
+    python test_ontologia_async.py
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuração antes de importar os agentes (lida na importação)
+os.environ["MAS_PIPELINE_ASYNC"] = "1"
+os.environ["AGENTE_B_INFERENCE_CACHE_SIZE"] = "0"
+os.environ["AGENTE_C_RAG_CACHE_SIZE"] = "0"
+os.environ["AGENTE_B_ONTOLOGY_POOL_SIZE"] = "2"
+os.environ["LLM_PROVIDER"] = "stub"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_config import configurar_logging
+from run_lg_api import run_pipeline_silent
+from Agent_B import agente_b
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_request.json"), encoding="utf-8") as f:
+    REQUISICAO = json.load(f)
+
+_carregamentos = []
+_load_ontology = agente_b._load_ontology
+
+
+def _load_ontology_contado():
+    _carregamentos.append(1)
+    return _load_ontology()
+
+
+agente_b._load_ontology = _load_ontology_contado
+
+
+def diagnosticar() -> dict:
+    resposta = run_pipeline_silent(formulario=dict(REQUISICAO["formulario"]), texto_livre=REQUISICAO["texto_livre"])
+    if not resposta.get("success"):
+        return {"success": False, "error": resposta.get("error")}
+    inference = resposta["dados_completos"]["inference_result"]
+    return {"success": True, "estagio": inference.get("estagio"), "subestagio": inference.get("subestagio")}
+
+
+def test_requisicoes_seguidas() -> bool:
+    primeira = diagnosticar()
+    segunda = diagnosticar()
+    ok = primeira["success"] and primeira == segunda and len(_carregamentos) == 1
+    print(f"{'✅' if ok else '❌'} 2 requisições assíncronas seguidas: ontologia carregada "
+          f"{len(_carregamentos)}x ({primeira.get('estagio') or primeira.get('error')})")
+    return ok
+
+
+def test_requisicoes_concorrentes() -> bool:
+    referencia = diagnosticar()
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        resultados = list(executor.map(lambda _: diagnosticar(), range(12)))
+    limite = agente_b.ONTOLOGY_POOL_SIZE
+    ok = all(r == referencia for r in resultados) and len(_carregamentos) <= limite
+    print(f"{'✅' if ok else '❌'} 12 requisições assíncronas em 6 threads: {len(_carregamentos)} ontologia(s) "
+          f"carregada(s) no total (limite {limite}), resultados {'idênticos' if ok else 'divergentes'}")
+    return ok
+
+
+def main():
+    configurar_logging(nivel="ERROR")
+
+    print("=" * 70)
+    print("TESTE DO POOL DE ONTOLOGIAS (pipeline assíncrono)")
+    print("=" * 70)
+
+    resultados = [test_requisicoes_seguidas(), test_requisicoes_concorrentes()]
+
+    print("=" * 70)
+    print(f"{sum(resultados)}/{len(resultados)} testes passaram")
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
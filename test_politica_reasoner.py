@@ -0,0 +1,111 @@
+"""
+Teste da Política do Reasoner - Multi-Agent IRIS System
+========================================================
+Verifica que, com AGENTE_B_REASONER_POLICY=only-when-needed (padrão), um
+formulário comum não executa o HermiT:
+
+1. O formulário de test_request.json (com idade) é classificado sem reasoner
+2. GatoIdoso sai da idade (>= 7 anos completos) com ou sem reasoner
+3. A política always continua executando o reasoner
+
+A etapa da ontologia (_inferir_na_ontologia) é substituída por um registro
+das chamadas, para saber se o reasoner foi pedido sem depender do
+owlready2 nem da JVM.
+
+Uso:
+    python test_politica_reasoner.py
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import json
+
+# Configuração antes de importar os agentes (lida na importação)
+os.environ["AGENTE_B_REASONER_POLICY"] = "only-when-needed"
+os.environ["AGENTE_B_REASONER_BACKEND"] = "local"
+os.environ["AGENTE_B_INFERENCE_CACHE_SIZE"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_config import configurar_logging
+from Agent_B import agente_b
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_request.json"), encoding="utf-8") as f:
+    FORMULARIO = json.load(f)["formulario"]
+
+_reasoner_pedido = []
+
+
+def _inferir_na_ontologia_registrado(world, onto, patient_id, clinical_data, estagio_name, executar_reasoner):
+    _reasoner_pedido.append(executar_reasoner)
+    return {
+        "is_a": ["Gato", estagio_name] if estagio_name else ["Gato"],
+        "properties": {"annotations": [], "data_properties": {}},
+        "reasoner_ok": executar_reasoner
+    }
+
+
+agente_b._load_ontology = lambda: (None, None)
+agente_b._inferir_na_ontologia = _inferir_na_ontologia_registrado
+
+
+def dados_do_formulario(**alteracoes) -> dict:
+    dados = {campo: FORMULARIO.get(campo) for campo in ("creatinina", "sdma", "idade", "peso", "pressao", "upc")}
+    dados.update(alteracoes)
+    return dados
+
+
+def test_formulario_sem_reasoner() -> bool:
+    _reasoner_pedido.clear()
+    resultado = agente_b.handle_inference(dados_do_formulario())
+    ok = (
+        resultado.get("classificacao_valida")
+        and not resultado["reasoner_executado"]
+        and _reasoner_pedido == [False]
+        and "GatoIdoso" in resultado["classes_definidas"]
+    )
+    print(f"{'✅' if ok else '❌'} Formulário de test_request.json (idade {FORMULARIO['idade']}): "
+          f"reasoner {'executado' if any(_reasoner_pedido) else 'não executado'}, "
+          f"classes {resultado.get('classes_definidas')} ({resultado.get('reasoner_motivo')})")
+    return ok
+
+
+def test_gato_idoso_pela_idade() -> bool:
+    esperados = {3: False, 6: False, 6.9: False, 7: True, 7.5: True, "12": True, None: False}
+    divergentes = []
+    for idade, idoso in esperados.items():
+        resultado = agente_b.handle_inference(dados_do_formulario(idade=idade))
+        if ("GatoIdoso" in resultado["classes_definidas"]) != idoso or resultado["reasoner_executado"]:
+            divergentes.append(idade)
+    ok = not divergentes
+    print(f"{'✅' if ok else '❌'} GatoIdoso pela idade em {len(esperados)} casos, sem reasoner "
+          f"(divergentes: {divergentes})")
+    return ok
+
+
+def test_always_executa() -> bool:
+    _reasoner_pedido.clear()
+    resultado = agente_b.handle_inference(dados_do_formulario(), reasoner_policy="always")
+    ok = resultado["reasoner_executado"] and _reasoner_pedido == [True]
+    print(f"{'✅' if ok else '❌'} Política always: reasoner {'executado' if ok else 'não executado'}")
+    return ok
+
+
+def main():
+    configurar_logging(nivel="ERROR")
+
+    print("=" * 70)
+    print("TESTE DA POLÍTICA DO REASONER")
+    print("=" * 70)
+
+    resultados = [test_formulario_sem_reasoner(), test_gato_idoso_pela_idade(), test_always_executa()]
+
+    print("=" * 70)
+    print(f"{sum(resultados)}/{len(resultados)} testes passaram")
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Teste do Reasoner Persistente - Multi-Agent IRIS System
+========================================================
+Verifica o backend AGENTE_B_REASONER_BACKEND=server do Agente B:
+
+1. Requisições seguidas usam o mesmo processo reasoner (mesmo pid, uma
+   única partida) e o Agente B não carrega a ontologia localmente
+2. Requisições concorrentes ficam em andamento ao mesmo tempo no mesmo
+   processo e cada uma recebe as classes do próprio paciente
+3. Se o processo morre, a requisição seguinte inicia outro
+
+Usa o substituto local (Agent_B/reasoner_substituto.py), que fala o mesmo
+protocolo do servidor HermiT (Agent_B/reasoner), para rodar sem JVM.
+
+Uso:
+    python test_reasoner_persistente.py
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Configuração antes de importar os agentes (lida na importação)
+os.environ["AGENTE_B_REASONER_BACKEND"] = "server"
+os.environ["AGENTE_B_REASONER_CMD"] = " ".join(shlex.quote(parte) for parte in (
+    sys.executable,
+    os.path.join(RAIZ, "Agent_B", "reasoner_substituto.py"),
+    os.path.join(RAIZ, "ontologia.owl"),
+))
+os.environ["AGENTE_B_REASONER_POLICY"] = "always"
+os.environ["AGENTE_B_INFERENCE_CACHE_SIZE"] = "0"
+
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from log_config import configurar_logging
+from Agent_B import agente_b
+
+_carregamentos = []
+
+
+def _load_ontology_contado():
+    _carregamentos.append(1)
+    raise RuntimeError("o backend server não deveria carregar a ontologia localmente")
+
+
+agente_b._load_ontology = _load_ontology_contado
+
+# (creatinina, sdma, idade) -> estágio esperado
+PAINEIS = [
+    ((1.2, 14.0, 3), "IRIS 1"),
+    ((2.1, 20.0, 9), "IRIS 2"),
+    ((3.5, 30.0, 6), "IRIS 3"),
+    ((6.0, 45.0, 12), "IRIS 4"),
+]
+
+
+def inferir(creat, sdma, idade) -> dict:
+    return agente_b.handle_inference({"creatinina": creat, "sdma": sdma, "idade": idade, "upc": 0.1})
+
+
+def correto(resultado: dict, painel: tuple, estagio: str) -> bool:
+    idoso = "GatoIdoso" in resultado.get("classes_definidas", [])
+    return (
+        resultado.get("reasoner_ok")
+        and resultado.get("estagio") == estagio
+        and idoso == (painel[2] >= 7)
+    )
+
+
+def test_requisicoes_seguidas() -> bool:
+    cliente = agente_b._get_reasoner_client()
+    pids, certos = set(), 0
+    for painel, estagio in PAINEIS * 2:
+        certos += correto(inferir(*painel), painel, estagio)
+        pids.add(cliente.pid)
+
+    ok = certos == len(PAINEIS) * 2 and len(pids) == 1 and cliente.partidas == 1 and not _carregamentos
+    print(f"{'✅' if ok else '❌'} {len(PAINEIS) * 2} requisições seguidas: {certos} corretas, "
+          f"pids {sorted(pids)}, {cliente.partidas} partida(s), ontologia local carregada {len(_carregamentos)}x")
+    return ok
+
+
+def test_requisicoes_concorrentes() -> bool:
+    cliente = agente_b._get_reasoner_client()
+    pid = cliente.pid
+    casos = PAINEIS * 10
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultados = list(executor.map(lambda caso: inferir(*caso[0]), casos))
+
+    certos = sum(correto(r, painel, estagio) for r, (painel, estagio) in zip(resultados, casos))
+    ok = certos == len(casos) and cliente.pid == pid and cliente.partidas == 1
+    print(f"{'✅' if ok else '❌'} {len(casos)} requisições em 8 threads: {certos} corretas, "
+          f"mesmo processo: {cliente.pid == pid}")
+    return ok
+
+
+def test_reinicio() -> bool:
+    cliente = agente_b._get_reasoner_client()
+    pid = cliente.pid
+    cliente._conexao.process.kill()
+    cliente._conexao.process.wait()
+
+    painel, estagio = PAINEIS[1]
+    resultado = inferir(*painel)
+    ok = correto(resultado, painel, estagio) and cliente.partidas == 2 and cliente.pid not in (None, pid)
+    print(f"{'✅' if ok else '❌'} Processo reasoner morto: nova partida (pid {pid} -> {cliente.pid}), "
+          f"resultado {'correto' if correto(resultado, painel, estagio) else 'incorreto'}")
+    return ok
+
+
+def main():
+    configurar_logging(nivel="ERROR")
+
+    print("=" * 70)
+    print("TESTE DO REASONER PERSISTENTE")
+    print("=" * 70)
+
+    resultados = [test_requisicoes_seguidas(), test_requisicoes_concorrentes(), test_reinicio()]
+
+    print("=" * 70)
+    print(f"{sum(resultados)}/{len(resultados)} testes passaram")
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Teste da Exportação do Índice mmap - Multi-Agent IRIS System
+=============================================================
+Verifica exportar_mmap e MmapVectorStore (Agent_C/vector_store.py):
+
+1. Uma coleção vazia gera um índice vazio que abre e responde às buscas
+   com listas vazias
+2. Exportar uma coleção com chunks dá uma matriz N x D normalizada
+3. Reexportar depois que a coleção ficou vazia troca a versão: o índice
+   aberto fica desatualizado e o novo não tem chunks
+
+Roda sem Chroma: a coleção é substituída por uma coleção em memória do
+próprio teste, com a mesma API de get(include, limit, offset).
+
+Uso:
+    python test_vector_store_mmap.py
+
+Autor: Sistema Multi-Agente IRIS
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Agent_C.vector_store import MmapVectorStore, exportar_mmap, ARQUIVO_EMBEDDINGS
+
+
+class ColecaoEmMemoria:
+    def __init__(self, embeddings):
+        self.embeddings = [list(e) for e in embeddings]
+
+    def get(self, include, limit, offset):
+        fatia = self.embeddings[offset:offset + limit]
+        return {
+            "ids": [f"c{offset + i}" for i in range(len(fatia))],
+            "embeddings": fatia,
+            "documents": [f"chunk {offset + i}" for i in range(len(fatia))],
+            "metadatas": [{"chunk_id": f"c{offset + i}"} for i in range(len(fatia))],
+        }
+
+
+def test_colecao_vazia(pasta: str) -> bool:
+    try:
+        total = exportar_mmap(ColecaoEmMemoria([]), pasta)
+        store = MmapVectorStore(pasta)
+        ok = (
+            total == 0 and len(store) == 0
+            and store.similarity_search_by_vector([1.0, 0.0, 0.0], k=3) == []
+            and store.get_by_ids(["c0"]) == []
+        )
+        detalhe = f"{total} chunks, {len(store)} no índice"
+    except Exception as e:
+        ok, detalhe = False, f"{type(e).__name__}: {e}"
+    print(f"{'✅' if ok else '❌'} Coleção vazia: {detalhe}")
+    return ok
+
+
+def test_colecao_com_chunks(pasta: str) -> bool:
+    embeddings = np.random.default_rng(0).normal(size=(2500, 8))
+    total = exportar_mmap(ColecaoEmMemoria(embeddings), pasta, lote=1000)
+    store = MmapVectorStore(pasta)
+    matriz = np.load(os.path.join(pasta, str(store.versao()), ARQUIVO_EMBEDDINGS))
+    ok = total == 2500 and matriz.shape == (2500, 8) and np.allclose(np.linalg.norm(matriz, axis=1), 1.0, atol=1e-5)
+    print(f"{'✅' if ok else '❌'} Coleção com chunks: {total} exportados, matriz {matriz.shape}")
+    return ok
+
+
+def test_reexportar_vazia(pasta: str) -> bool:
+    exportar_mmap(ColecaoEmMemoria(np.eye(4)), pasta)
+    aberto = MmapVectorStore(pasta)
+    total = exportar_mmap(ColecaoEmMemoria([]), pasta)
+    novo = MmapVectorStore(pasta)
+    ok = total == 0 and aberto.desatualizado() and len(aberto) == 4 and len(novo) == 0
+    print(f"{'✅' if ok else '❌'} Reexportar vazia: índice aberto desatualizado={aberto.desatualizado()}, "
+          f"novo com {len(novo)} chunks")
+    return ok
+
+
+def main():
+    print("=" * 70)
+    print("TESTE DA EXPORTAÇÃO DO ÍNDICE MMAP")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as vazia, tempfile.TemporaryDirectory() as cheia, \
+            tempfile.TemporaryDirectory() as reexportada:
+        resultados = [
+            test_colecao_vazia(vazia),
+            test_colecao_com_chunks(cheia),
+            test_reexportar_vazia(reexportada),
+        ]
+
+    print("=" * 70)
+    print(f"{sum(resultados)}/{len(resultados)} testes passaram")
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()